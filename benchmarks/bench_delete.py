@@ -0,0 +1,80 @@
+"""
+Deletes per second: loading each product then `session.delete` (the old
+way), one `DELETE ... RETURNING` per product, and bulk deletes of many
+products per statement.
+
+    ./run_benchmark.sh bench_delete --rows 20000
+    ./run_benchmark.sh bench_delete --rows 20000 --batch-size 500
+"""
+
+import argparse
+import asyncio
+import time
+from collections.abc import Awaitable, Callable
+
+from sqlalchemy import select
+
+from benchmarks.common import reset_database, seed_products
+from model import AsyncSessionMaker
+from model.product import Product
+from repository.product import delete_product, delete_products
+
+
+async def delete_with_orm(product_ids: list[int]) -> None:
+    """The old way: load each product, then delete it through the ORM."""
+    async with AsyncSessionMaker() as session:
+        for product_id in product_ids:
+            product = await session.get(Product, product_id)
+            await session.delete(product)
+            await session.commit()
+
+
+async def delete_one_by_one(product_ids: list[int]) -> None:
+    async with AsyncSessionMaker() as session:
+        for product_id in product_ids:
+            await delete_product(session, product_id)
+
+
+async def delete_in_bulk(product_ids: list[int], batch_size: int) -> None:
+    async with AsyncSessionMaker() as session:
+        for i in range(0, len(product_ids), batch_size):
+            await delete_products(session, product_ids[i : i + batch_size])
+
+
+async def measure(
+    name: str,
+    rows: int,
+    func: Callable[[list[int]], Awaitable[None]],
+) -> None:
+    # every run deletes a freshly seeded table
+    await reset_database()
+    await seed_products(rows)
+    async with AsyncSessionMaker() as session:
+        product_ids = list(
+            (await session.scalars(select(Product.product_id))).all()
+        )
+
+    start = time.perf_counter()
+    await func(product_ids)
+    seconds = time.perf_counter() - start
+    print(
+        f"{name:<24} {len(product_ids):>8,} rows in {seconds:8.2f}s "
+        f"({len(product_ids) / seconds:12,.0f} deletes/s)"
+    )
+
+
+async def run(args: argparse.Namespace) -> None:
+    await measure("session.delete", args.rows, delete_with_orm)
+    await measure("DELETE ... RETURNING", args.rows, delete_one_by_one)
+
+    async def bulk(product_ids: list[int]) -> None:
+        await delete_in_bulk(product_ids, args.batch_size)
+
+    await measure(f"bulk (batch {args.batch_size})", args.rows, bulk)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=20_000)
+    parser.add_argument("--batch-size", type=int, default=1000)
+    asyncio.run(run(parser.parse_args()))
@@ -0,0 +1,77 @@
+"""
+Memory use of the streaming product export: the RSS of the process is
+sampled while all products are exported, and should stay flat however many
+rows there are.
+
+    ./run_benchmark.sh bench_export --rows 5000000
+    ./run_benchmark.sh bench_export --skip-seed --format csv
+
+The export is consumed in-process (the iterator behind the streaming
+response), since the in-process test client buffers whole response bodies.
+"""
+
+import argparse
+import asyncio
+import resource
+import time
+
+from benchmarks.common import reset_database, seed_products
+from service.product import export_products
+
+
+def rss_mb() -> float:
+    """The current resident set size (Linux), or the peak one elsewhere."""
+    try:
+        with open("/proc/self/statm") as f:
+            pages = int(f.read().split()[1])
+        return pages * resource.getpagesize() / 1024**2
+    except OSError:
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+async def run(args: argparse.Namespace) -> None:
+    if not args.skip_seed:
+        print(f"Seeding {args.rows:,} products...")
+        await reset_database()
+        await seed_products(args.rows)
+
+    print(f"format={args.format} rss before export: {rss_mb():.1f}MB")
+    start = time.perf_counter()
+    exported_bytes = 0
+    lines = 0
+    next_report = args.report_every
+    samples = []
+    async for chunk in export_products(
+        "product_id", "asc", args.format, args.batch_size
+    ):
+        exported_bytes += len(chunk)
+        lines += chunk.count("\n")
+        if lines >= next_report:
+            samples.append(rss_mb())
+            print(f"{lines:>12,} rows: rss {samples[-1]:8.1f}MB")
+            next_report += args.report_every
+    seconds = time.perf_counter() - start
+
+    print(
+        f"exported {lines:,} lines ({exported_bytes / 1024**2:,.1f}MB) "
+        f"in {seconds:.1f}s ({lines / seconds:,.0f} rows/s)"
+    )
+    if samples:
+        print(
+            "rss min/max while exporting: "
+            f"{min(samples):.1f}/{max(samples):.1f}MB"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=5_000_000)
+    parser.add_argument("--skip-seed", action="store_true")
+    parser.add_argument(
+        "--format",
+        choices=["ndjson", "csv"],
+        default="ndjson",
+    )
+    parser.add_argument("--batch-size", type=int, default=1000)
+    parser.add_argument("--report-every", type=int, default=500_000)
+    asyncio.run(run(parser.parse_args()))
@@ -0,0 +1,87 @@
+"""
+Throughput of the product import (rows/s): a generated upload is imported
+into an empty table (inserts), then again (updates of the same names).
+
+    ./run_benchmark.sh bench_import --rows 500000
+    ./run_benchmark.sh bench_import --format csv --batch-size 10000
+"""
+
+import argparse
+import asyncio
+import json
+import time
+from collections.abc import AsyncIterator
+
+from benchmarks.common import reset_database
+from model import AsyncSessionMaker
+from service.product_import import import_products
+
+
+async def generate_upload(
+    rows: int,
+    format: str,
+    chunk_size: int,
+) -> AsyncIterator[bytes]:
+    """The upload body, `chunk_size` bytes at a time (like a request)."""
+    buffer = bytearray()
+    if format == "csv":
+        buffer += b"product_name,unit_price,units_in_stock,type\n"
+    for i in range(rows):
+        if format == "csv":
+            line = f"imported {i},{1 + i % 999}.99,{i % 100},{i % 3}\n"
+        else:
+            line = (
+                json.dumps(
+                    {
+                        "product_name": f"imported {i}",
+                        "unit_price": f"{1 + i % 999}.99",
+                        "units_in_stock": i % 100,
+                        "type": i % 3,
+                    }
+                )
+                + "\n"
+            )
+        buffer += line.encode()
+        if len(buffer) >= chunk_size:
+            yield bytes(buffer)
+            buffer.clear()
+    if buffer:
+        yield bytes(buffer)
+
+
+async def measure(name: str, args: argparse.Namespace) -> None:
+    start = time.perf_counter()
+    async with AsyncSessionMaker() as session:
+        summary = await import_products(
+            session,
+            generate_upload(args.rows, args.format, args.chunk_size),
+            args.format,
+            batch_size=args.batch_size,
+        )
+    seconds = time.perf_counter() - start
+    print(
+        f"{name:<8} {summary.rows:>10,} rows in {seconds:8.2f}s "
+        f"({summary.rows / seconds:10,.0f} rows/s) "
+        f"created={summary.created:,} updated={summary.updated:,} "
+        f"failed={summary.failed:,}"
+    )
+
+
+async def run(args: argparse.Namespace) -> None:
+    await reset_database()
+    print(f"format={args.format} batch_size={args.batch_size}")
+    await measure("insert", args)
+    await measure("update", args)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=500_000)
+    parser.add_argument(
+        "--format",
+        choices=["ndjson", "csv"],
+        default="ndjson",
+    )
+    parser.add_argument("--batch-size", type=int, default=5000)
+    parser.add_argument("--chunk-size", type=int, default=64 * 1024)
+    asyncio.run(run(parser.parse_args()))
@@ -0,0 +1,101 @@
+"""
+Latency of `GET /api/v1/products/` while logins (bcrypt) run at the same time.
+
+    ./run_benchmark.sh bench_login_latency --executor inline
+    ./run_benchmark.sh bench_login_latency --executor thread
+    ./run_benchmark.sh bench_login_latency --executor process
+
+"inline" verifies passwords on the event loop (the old behavior), for
+comparison with the password hashing executor.
+"""
+
+import argparse
+import asyncio
+import time
+
+from httpx import AsyncClient
+
+import core.auth as auth
+import service.auth as auth_service
+from benchmarks.common import get_client, report, reset_database
+from core.auth import verify_password
+from core.config import PROJECT_SETTINGS
+from core.hashing import PasswordHashingExecutor
+
+
+async def verify_password_inline(password: str, hashed_password: str) -> bool:
+    return verify_password(password, hashed_password)
+
+
+async def login_loop(client: AsyncClient, stop: asyncio.Event) -> int:
+    form_data = {
+        "username": PROJECT_SETTINGS.USER_USERNAME,
+        "password": PROJECT_SETTINGS.USER_PASSWORD,
+    }
+    count = 0
+    while not stop.is_set():
+        response = await client.post("/api/v1/auth/login", data=form_data)
+        assert response.status_code == 200
+        count += 1
+    return count
+
+
+async def read_loop(
+    client: AsyncClient,
+    stop: asyncio.Event,
+    latencies_ms: list[float],
+) -> None:
+    while not stop.is_set():
+        start = time.perf_counter()
+        response = await client.get("/api/v1/products/")
+        latencies_ms.append((time.perf_counter() - start) * 1000)
+        assert response.status_code == 200
+
+
+async def run(args: argparse.Namespace) -> None:
+    await reset_database()
+
+    if args.executor == "inline":
+        auth_service.verify_password_async = verify_password_inline
+    else:
+        auth.password_hashing_executor = PasswordHashingExecutor(
+            kind=args.executor,
+            max_workers=args.workers,
+        )
+
+    latencies_ms: list[float] = []
+    stop = asyncio.Event()
+    async with get_client() as client:
+        logins = [
+            asyncio.create_task(login_loop(client, stop))
+            for _ in range(args.logins)
+        ]
+        readers = [
+            asyncio.create_task(read_loop(client, stop, latencies_ms))
+            for _ in range(args.readers)
+        ]
+        await asyncio.sleep(args.seconds)
+        stop.set()
+        login_count = sum(await asyncio.gather(*logins))
+        await asyncio.gather(*readers)
+
+    print(
+        f"executor={args.executor} workers={args.workers} "
+        f"concurrent logins={args.logins} readers={args.readers}"
+    )
+    print(f"logins: {login_count / args.seconds:.1f}/s")
+    report("GET /api/v1/products/", latencies_ms)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        "--executor",
+        choices=["inline", "thread", "process"],
+        default="thread",
+    )
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--logins", type=int, default=8)
+    parser.add_argument("--readers", type=int, default=4)
+    parser.add_argument("--seconds", type=float, default=10.0)
+    asyncio.run(run(parser.parse_args()))
@@ -0,0 +1,134 @@
+"""
+Offset vs keyset (cursor) pagination of the product listing, at page 1,
+page 1,000 and page 100,000 of a multi-million-row product table.
+
+    ./run_benchmark.sh bench_pagination --rows 3000000
+    ./run_benchmark.sh bench_pagination --order-by unit_price --skip-seed
+
+Use `--skip-seed` to re-run against the rows of the last run.
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+from collections.abc import Awaitable, Callable
+from typing import Any
+
+from sqlalchemy import desc, select
+
+from benchmarks.common import reset_database, seed_products
+from model import AsyncSessionMaker
+from model.product import Product
+from repository.product import (
+    SORT_COLUMNS,
+    make_cursor,
+    get_products,
+    get_products_by_cursor,
+)
+from schema.product import ProductCursor
+
+
+async def measure(
+    func: Callable[[], Awaitable[Any]],
+    repeat: int,
+) -> float:
+    """The median duration (ms) of `func`."""
+    durations = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        await func()
+        durations.append((time.perf_counter() - start) * 1000)
+    return statistics.median(durations)
+
+
+async def cursor_before_page(
+    page: int,
+    page_size: int,
+    order_by: str,
+    direction: str,
+) -> ProductCursor | None:
+    """The cursor of the last product of the previous page (setup only)."""
+    if page == 1:
+        return None
+
+    column = SORT_COLUMNS[order_by]
+    order = (
+        (column, Product.product_id)
+        if direction == "asc"
+        else (desc(column), desc(Product.product_id))
+    )
+    stmt = (
+        select(Product)
+        .order_by(*order)
+        .offset((page - 1) * page_size - 1)
+        .limit(1)
+    )
+    async with AsyncSessionMaker() as session:
+        product = (await session.scalars(stmt)).one()
+    return make_cursor(product, order_by, direction, backwards=False)
+
+
+async def run(args: argparse.Namespace) -> None:
+    if not args.skip_seed:
+        print(f"Seeding {args.rows:,} products...")
+        await reset_database()
+        await seed_products(args.rows)
+
+    print(
+        f"order_by={args.order_by} direction={args.direction} "
+        f"page_size={args.page_size} (median of {args.repeat} runs)"
+    )
+    for page in args.pages:
+        cursor = await cursor_before_page(
+            page, args.page_size, args.order_by, args.direction
+        )
+
+        async with AsyncSessionMaker() as session:
+
+            async def by_offset() -> Any:
+                return await get_products(
+                    session,
+                    page,
+                    args.page_size,
+                    args.order_by,
+                    args.direction,
+                )
+
+            async def by_cursor() -> Any:
+                return await get_products_by_cursor(
+                    session,
+                    args.page_size,
+                    args.order_by,
+                    args.direction,
+                    cursor,
+                )
+
+            offset_ms = await measure(by_offset, args.repeat)
+            keyset_ms = await measure(by_cursor, args.repeat)
+
+        print(
+            f"page {page:>7,}: offset {offset_ms:9.2f}ms  "
+            f"keyset {keyset_ms:9.2f}ms"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=3_000_000)
+    parser.add_argument("--skip-seed", action="store_true")
+    parser.add_argument("--page-size", type=int, default=20)
+    parser.add_argument(
+        "--pages",
+        type=int,
+        nargs="+",
+        default=[1, 1_000, 100_000],
+    )
+    parser.add_argument(
+        "--order-by",
+        choices=list(SORT_COLUMNS),
+        default="product_id",
+    )
+    parser.add_argument("--direction", choices=["asc", "desc"], default="asc")
+    parser.add_argument("--repeat", type=int, default=5)
+    asyncio.run(run(parser.parse_args()))
@@ -0,0 +1,85 @@
+"""
+Latency of the hot-path queries (product by ID, first page of products)
+with each `DB_POOLER` setting: "pgbouncer" (no prepared statement cache,
+every query is prepared again) vs "none" (prepared once per connection, up
+to `--cache-size` statements).
+
+    ./run_benchmark.sh bench_prepared_statements --requests 5000
+    ./run_benchmark.sh bench_prepared_statements --url <PgBouncer URL>
+
+Without `--url`, every setting connects to the test database directly (run
+the "pgbouncer" setting through PgBouncer with `--url` to include its hop).
+"""
+
+import argparse
+import asyncio
+import time
+from typing import Any
+
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from benchmarks.common import report, reset_database, seed_products
+from model.base import DATABASE_URL, make_connect_args
+from repository.product import get_product, get_products
+
+
+async def measure(
+    name: str,
+    url: str,
+    connect_args: dict[str, Any],
+    requests: int,
+    rows: int,
+) -> None:
+    # one connection: the statements are cached per connection
+    engine = create_async_engine(url, connect_args=connect_args, pool_size=1)
+    session_maker = async_sessionmaker(engine, expire_on_commit=False)
+
+    latencies: dict[str, list[float]] = {"product": [], "products": []}
+    for i in range(requests + 100):
+        async with session_maker() as session:
+            start = time.perf_counter()
+            await get_product(session, 1 + i % rows)
+            product_ms = (time.perf_counter() - start) * 1000
+
+            start = time.perf_counter()
+            await get_products(session, 1, 20, "unit_price", "asc")
+            products_ms = (time.perf_counter() - start) * 1000
+        if i >= 100:  # warmed up (connection, caches)
+            latencies["product"].append(product_ms)
+            latencies["products"].append(products_ms)
+    await engine.dispose()
+
+    for query, values in latencies.items():
+        report(f"{name:<10} {query:<8}", values)
+
+
+async def run(args: argparse.Namespace) -> None:
+    if not args.skip_seed:
+        await reset_database()
+        await seed_products(args.rows)
+
+    url = args.url or DATABASE_URL
+    await measure(
+        "pgbouncer",
+        url,
+        make_connect_args("pgbouncer", 0),
+        args.requests,
+        args.rows,
+    )
+    await measure(
+        "none",
+        DATABASE_URL,
+        make_connect_args("none", args.cache_size),
+        args.requests,
+        args.rows,
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--rows", type=int, default=10_000)
+    parser.add_argument("--skip-seed", action="store_true")
+    parser.add_argument("--cache-size", type=int, default=500)
+    parser.add_argument("--url", help="connect through PgBouncer")
+    asyncio.run(run(parser.parse_args()))
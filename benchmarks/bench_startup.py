@@ -0,0 +1,65 @@
+"""
+Startup cost of a web worker: import time (`python -X importtime`) and peak
+memory (RSS) of importing the app, compared with also importing the Celery
+task module (Celery, kombu, and the psycopg2 engine), as the web process
+did before tasks were published by name.
+
+    ./run_benchmark.sh bench_startup --runs 10
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+
+# modules of the task stack, shouldn't be loaded by the web process
+TASK_MODULES = ("celery", "kombu", "psycopg2")
+
+VARIANTS = {
+    "web (lazy)": "import main",
+    "web + tasks": "import main, task_queue.tasks",
+}
+
+REPORT = (
+    "import resource, sys\n"
+    "print(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss)\n"
+    "print(','.join(sorted({m.split('.')[0] for m in sys.modules} & "
+    f"set({TASK_MODULES!r}))))\n"
+)
+
+
+def measure(code: str) -> tuple[float, int, str]:
+    """Import time (ms), max. RSS (KiB), and the task modules loaded."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"{code}\n{REPORT}"],
+        env=os.environ,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    # "import time: <self us> | <cumulative us> | <module>", sum of "self"
+    import_us = sum(
+        int(line.split(":")[1].split("|")[0])
+        for line in result.stderr.splitlines()
+        if line.startswith("import time:") and "self" not in line
+    )
+    rss_kib, loaded = result.stdout.splitlines()[-2:]
+    return import_us / 1000, int(rss_kib), loaded or "-"
+
+
+def run(args: argparse.Namespace) -> None:
+    for name, code in VARIANTS.items():
+        samples = [measure(code) for _ in range(args.runs)]
+        import_ms = statistics.median(sample[0] for sample in samples)
+        rss_mib = statistics.median(sample[1] for sample in samples) / 1024
+        print(
+            f"{name:<12} import={import_ms:8.1f}ms rss={rss_mib:7.1f}MiB "
+            f"task modules: {samples[0][2]}"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--runs", type=int, default=5)
+    run(parser.parse_args())
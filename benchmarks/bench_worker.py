@@ -0,0 +1,74 @@
+"""
+Throughput of the notification jobs (jobs/s): the asyncio worker (async
+engine, `--concurrency` jobs at once, send_email messages batched by up to
+`--batch-size`) vs the Celery task body (psycopg2 engine, one job at a time,
+like one Celery worker process).
+
+The broker is left out (in-memory queue / direct calls), so only the job
+execution is measured.
+
+    ./run_benchmark.sh bench_worker --jobs 5000 --concurrency 50
+    ./run_benchmark.sh bench_worker --batch-size 1  # no batching
+"""
+
+import argparse
+import asyncio
+import time
+import uuid
+
+import repository.outbox as outbox_repo
+from benchmarks.common import reset_database
+from task_queue.emails import create_and_send_system_email
+from task_queue.tasks import SessionMaker
+from task_queue.worker import AsyncWorker, InMemoryBroker, TaskMessage
+
+
+def report(name: str, jobs: int, seconds: float) -> None:
+    print(
+        f"{name:<14} {jobs:>8,} jobs in {seconds:8.2f}s "
+        f"({jobs / seconds:10,.0f} jobs/s)"
+    )
+
+
+def run_sync(jobs: int) -> None:
+    start = time.perf_counter()
+    for i in range(jobs):
+        with SessionMaker() as session:
+            create_and_send_system_email(session, str(uuid.uuid4()), i)
+    report("celery (sync)", jobs, time.perf_counter() - start)
+
+
+async def run_async(jobs: int, concurrency: int, batch_size: int) -> None:
+    broker = InMemoryBroker()
+    for i in range(jobs):
+        broker.put(
+            TaskMessage(outbox_repo.SEND_EMAIL_TASK, str(uuid.uuid4()), [i])
+        )
+    worker = AsyncWorker(broker, concurrency, batch_size=batch_size)
+    stop = asyncio.Event()
+
+    start = time.perf_counter()
+    run = asyncio.create_task(worker.run(stop))
+    while worker.succeeded + worker.failed < jobs:
+        await asyncio.sleep(0.01)
+    seconds = time.perf_counter() - start
+    stop.set()
+    await run
+
+    report(f"async ({concurrency}x{batch_size})", jobs, seconds)
+    if worker.failed:
+        print(f"  {worker.failed:,} jobs failed")
+
+
+async def run(args: argparse.Namespace) -> None:
+    await reset_database()
+    await asyncio.to_thread(run_sync, args.jobs)
+    await run_async(args.jobs, args.concurrency, args.batch_size)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--jobs", type=int, default=5000)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--batch-size", type=int, default=100)
+    asyncio.run(run(parser.parse_args()))
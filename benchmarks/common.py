@@ -0,0 +1,72 @@
+"""
+Shared helpers for the benchmark scripts, see "run_benchmark.sh".
+"""
+
+from httpx import AsyncClient
+from sqlalchemy import text
+
+from core.initialize_data import init_db
+from main import app
+from model import AsyncSessionMaker, Base, engine
+
+BASE_URL = "http://benchmark"
+
+# don't measure statement logging
+engine.echo = False
+
+
+async def reset_database() -> None:
+    """Drop and re-create the tables, then create the initial users."""
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all)
+        await conn.run_sync(Base.metadata.create_all)
+
+    async with AsyncSessionMaker() as session:
+        await init_db(session)
+
+
+async def seed_products(rows: int) -> None:
+    """Insert `rows` generated products (server side, in one statement)."""
+    async with engine.begin() as conn:
+        await conn.execute(
+            text(
+                "INSERT INTO product "
+                "(product_name, unit_price, units_in_stock, type) "
+                "SELECT 'Product ' || g, "
+                "(1 + random() * 999)::numeric(12, 2), "
+                "(random() * 100)::int, "
+                "(ARRAY['PHONE', 'ACCESSORY', 'OTHER'])[1 + g % 3]"
+                "::producttype "
+                "FROM generate_series(1, :rows) AS g"
+            ),
+            {"rows": rows},
+        )
+    # update the planner statistics
+    async with engine.connect() as conn:
+        await conn.execution_options(isolation_level="AUTOCOMMIT")
+        await conn.execute(text("VACUUM ANALYZE product"))
+
+
+def get_client() -> AsyncClient:
+    """An in-process client for the FastAPI app."""
+    return AsyncClient(app=app, base_url=BASE_URL)
+
+
+def percentile(values: list[float], p: float) -> float:
+    ordered = sorted(values)
+    index = round(p / 100 * (len(ordered) - 1))
+    return ordered[index]
+
+
+def report(name: str, latencies_ms: list[float]) -> None:
+    if not latencies_ms:
+        print(f"{name}: no samples")
+        return
+
+    print(
+        f"{name}: n={len(latencies_ms)} "
+        f"p50={percentile(latencies_ms, 50):.2f}ms "
+        f"p95={percentile(latencies_ms, 95):.2f}ms "
+        f"p99={percentile(latencies_ms, 99):.2f}ms "
+        f"max={max(latencies_ms):.2f}ms"
+    )
@@ -7,7 +7,8 @@ CELERY_APP="task_queue.tasks"  # Replace with your Celery application name
 
 start_celery() {
     echo "Starting Celery worker..."
-    nohup celery -A $CELERY_APP worker -Q default --loglevel=DEBUG > $CELERY_LOG_FILE 2>&1 &
+    # -B: also run the periodic tasks (only one worker should)
+    nohup celery -A $CELERY_APP worker -B -Q default --loglevel=DEBUG > $CELERY_LOG_FILE 2>&1 &
     CELERY_PID=$!
     echo $CELERY_PID > $CELERY_PID_FILE
     echo "Celery worker started with PID $CELERY_PID."
@@ -0,0 +1,31 @@
+#!/bin/bash
+# Usage: ./run_benchmark.sh <benchmark module> [options]
+# e.g.   ./run_benchmark.sh bench_login_latency --executor thread
+#
+# Benchmarks run against the "test" database and reset it first.
+
+if [ -z "$1" ]; then
+    echo "Usage: $0 <benchmark> [options]"
+    ls benchmarks | grep "^bench_" | sed "s/\.py$//"
+    exit 1
+fi
+
+export ENVIRONMENT=test
+export DB_DATABASE=test
+export DB_USER="postgres"
+export DB_PASSWORD="pw2023"
+export ADMIN_USERNAME="admin@meowfish.org"
+export ADMIN_PASSWORD="pw2023"
+export USER_USERNAME="alice@meowfish.org"
+export USER_PASSWORD="maxwell"
+export CORS_ORIGINS="http://localhost,http://meowfish.org,https://meowfish.org"
+export JWT_SECRET_KEY="45126bffdf6fe8197cac2e7aba1444054040cc048ed0c17e3a1356f6a59dac89"
+export REDIS_USERNAME="admin"
+export REDIS_PASSWORD="pw2024"
+export REDIS_DB_BROKER=14
+export REDIS_DB_RESULT_BACKEND=15
+export LOG_FILENAME="benchmark.log"
+
+benchmark="$1"
+shift
+PYTHONPATH=src python -m "benchmarks.${benchmark}" "$@"
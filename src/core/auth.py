@@ -1,12 +1,20 @@
+import hashlib
 from datetime import datetime, timedelta, timezone
 
 import bcrypt
 from jose import jwt
 
+from core.cache import TTLCache
 from core.config import PROJECT_SETTINGS
+from core.hashing import password_hashing_executor
 from model import Employee
 from schema.user import User
 
+# sha256 of the token -> decoded claims
+token_claims_cache: TTLCache[str, User] = TTLCache(
+    max_size=PROJECT_SETTINGS.JWT_CLAIMS_CACHE_SIZE,
+)
+
 
 def get_password_hash(password: str) -> str:
     """
@@ -40,6 +48,26 @@ def verify_password(password: str, hashed_password: str) -> bool:
     )
 
 
+async def get_password_hash_async(password: str) -> str:
+    """
+    Same as `get_password_hash`, but runs in the password hashing executor
+    so the event loop isn't blocked.
+    """
+    return await password_hashing_executor.run(get_password_hash, password)
+
+
+async def verify_password_async(password: str, hashed_password: str) -> bool:
+    """
+    Same as `verify_password`, but runs in the password hashing executor
+    so the event loop isn't blocked.
+    """
+    return await password_hashing_executor.run(
+        verify_password,
+        password,
+        hashed_password,
+    )
+
+
 def create_access_token(
     employee: Employee,
     expires_delta: timedelta | None = None,
@@ -66,3 +94,40 @@ def create_access_token(
     )
 
     return encoded_jwt
+
+
+def decode_access_token(token: str) -> User:
+    """
+    Verifies the JWT token and parses its claims.
+
+    Verified tokens are cached until they expire, so a token that is used
+    again skips the signature check. Don't modify the returned object, it's
+    shared by every request using the same token.
+
+    Args:
+        token (str): The encoded JWT token.
+
+    Raises:
+        JWTError: If the token is invalid or expired.
+        ValidationError: If the claims don't match the `User` model.
+
+    Returns:
+        User: The claims of the token.
+    """
+    key = hashlib.sha256(token.encode("utf-8")).hexdigest()
+    user = token_claims_cache.get(key)
+    if user is not None:
+        return user
+
+    payload = jwt.decode(
+        token,
+        PROJECT_SETTINGS.JWT_SECRET_KEY,
+        algorithms=[PROJECT_SETTINGS.JWT_ALGORITHM],
+    )
+    user = User.model_validate(payload)
+
+    ttl = (user.exp - datetime.now(timezone.utc)).total_seconds()
+    if ttl > 0:
+        token_claims_cache.set(key, user, ttl=ttl)
+
+    return user
@@ -0,0 +1,254 @@
+"""
+Caches: in-process (`TTLCache`), and a tiered cache of Pydantic models with
+an optional shared Redis tier behind the in-process one (`TieredCache`).
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Generic, TypeVar
+
+from pydantic import BaseModel
+
+if TYPE_CHECKING:
+    from redis.asyncio import Redis
+
+K = TypeVar("K")
+V = TypeVar("V")
+M = TypeVar("M", bound=BaseModel)
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class CacheStats:
+    hits: int
+    misses: int
+    size: int
+    max_size: int
+    hit_rate: float
+
+
+class TTLCache(Generic[K, V]):
+    """
+    A bounded LRU cache; entries can also expire after a TTL (in seconds).
+
+    Not thread-safe: use it from the event loop only.
+    """
+
+    def __init__(self, max_size: int, ttl: float | None = None) -> None:
+        self.max_size = max_size
+        self.ttl = ttl  # default TTL, None: entries never expire
+
+        # key -> (expire time on the monotonic clock, value)
+        self._entries: OrderedDict[K, tuple[float | None, V]] = OrderedDict()
+        self._hits = 0
+        self._misses = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: K) -> V | None:
+        entry = self._entries.get(key)
+        if entry is None:
+            self._misses += 1
+            return None
+
+        expires_at, value = entry
+        if expires_at is not None and expires_at <= time.monotonic():
+            del self._entries[key]
+            self._misses += 1
+            return None
+
+        self._entries.move_to_end(key)
+        self._hits += 1
+        return value
+
+    def set(self, key: K, value: V, ttl: float | None = None) -> None:
+        """Add or replace an entry; `ttl` overrides the default TTL."""
+        ttl = self.ttl if ttl is None else ttl
+        expires_at = None if ttl is None else time.monotonic() + ttl
+
+        self._entries[key] = (expires_at, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)  # evict the least recently used
+
+    def delete(self, key: K) -> None:
+        self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def stats(self) -> CacheStats:
+        lookups = self._hits + self._misses
+        return CacheStats(
+            hits=self._hits,
+            misses=self._misses,
+            size=len(self._entries),
+            max_size=self.max_size,
+            hit_rate=self._hits / lookups if lookups else 0.0,
+        )
+
+
+@dataclass(frozen=True)
+class TieredCacheStats(CacheStats):
+    redis_hits: int
+    redis_misses: int
+
+
+class RedisCache:
+    """
+    A thin wrapper of the async Redis client.
+
+    The cache is never required: Redis errors are logged and treated as
+    cache misses.
+    """
+
+    def __init__(self, url: str, prefix: str) -> None:
+        self.url = url
+        self.prefix = prefix
+        self._client: Redis | None = None
+
+    @property
+    def client(self) -> Redis:
+        if self._client is None:
+            from redis.asyncio import Redis
+
+            self._client = Redis.from_url(self.url)
+        return self._client
+
+    def _key(self, key: str) -> str:
+        return f"{self.prefix}:{key}"
+
+    async def get(self, key: str) -> bytes | None:
+        try:
+            value: bytes | None = await self.client.get(self._key(key))
+            return value
+        except Exception:
+            logger.exception(f"Redis cache error, reading {self._key(key)}")
+            return None
+
+    async def get_with_ttl(self, key: str) -> tuple[bytes | None, float]:
+        """The value and its remaining TTL in seconds (in one round trip)."""
+        try:
+            async with self.client.pipeline(transaction=False) as pipe:
+                pipe.get(self._key(key))
+                pipe.pttl(self._key(key))
+                value, ttl_ms = await pipe.execute()
+        except Exception:
+            logger.exception(f"Redis cache error, reading {self._key(key)}")
+            return None, 0.0
+        return value, max(ttl_ms, 0) / 1000
+
+    async def set(self, key: str, value: str, ttl: float) -> None:
+        try:
+            await self.client.set(self._key(key), value, px=int(ttl * 1000))
+        except Exception:
+            logger.exception(f"Redis cache error, writing {self._key(key)}")
+
+    async def delete(self, *keys: str) -> None:
+        try:
+            await self.client.delete(*[self._key(key) for key in keys])
+        except Exception:
+            logger.exception(f"Redis cache error, deleting {keys}")
+
+
+class TieredCache(Generic[M]):
+    """
+    Caches Pydantic models in-process, with an optional Redis tier (as JSON)
+    shared between workers.
+
+    Other workers only drop their in-process entries when they expire, so
+    keep the TTL short if entries can change. Entries can also get a shorter
+    TTL of their own (see `set`), kept when another worker reads them from
+    Redis.
+    """
+
+    def __init__(
+        self,
+        model: type[M],
+        max_size: int,
+        ttl: float,
+        redis: RedisCache | None = None,
+    ) -> None:
+        self.model = model
+        self.ttl = ttl
+        self.local: TTLCache[str, M] = TTLCache(max_size=max_size, ttl=ttl)
+        self.redis = redis
+
+        self._redis_hits = 0
+        self._redis_misses = 0
+        # keep references to background deletes (see `discard`)
+        self._tasks: set[asyncio.Task[None]] = set()
+
+    async def get(self, key: str) -> M | None:
+        value = self.local.get(key)
+        if value is not None or self.redis is None:
+            return value
+
+        data, ttl = await self.redis.get_with_ttl(key)
+        if data is None:
+            self._redis_misses += 1
+            return None
+
+        self._redis_hits += 1
+        value = self.model.model_validate_json(data)
+        if ttl > 0:
+            self.local.set(key, value, min(ttl, self.ttl))
+        return value
+
+    async def set(self, key: str, value: M, ttl: float | None = None) -> None:
+        """Add or replace an entry; `ttl` shortens the TTL of this entry
+        (0: don't cache it)."""
+        ttl = self.ttl if ttl is None else min(ttl, self.ttl)
+        if ttl <= 0:
+            return
+
+        self.local.set(key, value, ttl)
+        if self.redis is not None:
+            await self.redis.set(key, value.model_dump_json(), ttl)
+
+    async def delete(self, *keys: str) -> None:
+        for key in keys:
+            self.local.delete(key)
+        if self.redis is not None and keys:
+            await self.redis.delete(*keys)
+
+    def discard(self, *keys: str) -> None:
+        """Like `delete`, but for synchronous code (e.g. ORM events):
+        the Redis entries are deleted by a background task.
+        """
+        for key in keys:
+            self.local.delete(key)
+        if self.redis is None or not keys:
+            return
+
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:  # no event loop, can't reach Redis
+            return
+        task = loop.create_task(self.redis.delete(*keys))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    def clear_local(self) -> None:
+        self.local.clear()
+
+    def stats(self) -> TieredCacheStats:
+        local = self.local.stats()
+        lookups = local.hits + local.misses
+        hits = local.hits + self._redis_hits
+        return TieredCacheStats(
+            hits=hits,
+            misses=lookups - hits,
+            size=local.size,
+            max_size=local.max_size,
+            hit_rate=hits / lookups if lookups else 0.0,
+            redis_hits=self._redis_hits,
+            redis_misses=self._redis_misses,
+        )
@@ -4,64 +4,104 @@ For dependency injection.
 
 from typing import Annotated, AsyncGenerator
 
-from fastapi import Depends, HTTPException
+from fastapi import Depends, HTTPException, Request
 from fastapi.security import OAuth2PasswordBearer
-from jose import JWTError, jwt
+from jose import JWTError
+from pydantic import ValidationError
 from sqlalchemy.ext.asyncio import AsyncSession
 from starlette import status
 
-import repository.employee as employee_repo
 import service.auth as auth_service
+from core.auth import decode_access_token
 from core.config import PROJECT_SETTINGS
-from model import AsyncSessionMaker, Employee
+from model import AsyncSessionMaker
+from model.pool import current_route, release_connection
+from model.replicas import replica_set
+from schema.employee import EmployeePrincipal
+from schema.user import User
 
 
-async def get_session() -> AsyncGenerator[AsyncSession, None]:
+def set_current_route(request: Request) -> None:
+    """Attribute the connections of the request to its route (the path
+    template, e.g. "GET /api/v1/products/{product_id}"), for the hold time
+    metrics (see `model.pool.hold_times`)."""
+    route = request.scope.get("route")
+    path = getattr(route, "path", request.url.path)
+    current_route.set(f"{request.method} {path}")
+
+
+async def get_session(request: Request) -> AsyncGenerator[AsyncSession, None]:
+    # the connection is checked out by the first statement, not here
+    set_current_route(request)
     async with AsyncSessionMaker() as session:
         yield session
 
 
+async def get_read_session(
+    request: Request,
+) -> AsyncGenerator[AsyncSession, None]:
+    """A session for read-only endpoints: on a healthy read replica, or the
+    primary if there is none (see `model.replicas`). Don't write with it,
+    and expect data up to `DB_REPLICA_MAX_LAG_SECONDS` old."""
+    set_current_route(request)
+    async with replica_set.session() as session:
+        yield session
+
+
 oauth2_scheme = OAuth2PasswordBearer(
     tokenUrl=f"{PROJECT_SETTINGS.API_V1_PATH}auth/login",
 )
 
 
-async def get_current_user(
-    token: Annotated[str, Depends(oauth2_scheme)],
-    session: Annotated[AsyncSession, Depends(get_session)],
-) -> Employee:
-    credentials_exception = HTTPException(
+def credentials_exception() -> HTTPException:
+    return HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
 
+
+async def get_token_claims(
+    token: Annotated[str, Depends(oauth2_scheme)],
+) -> User:
+    """This DI function verifies the JWT token and parses its claims.
+    FastAPI caches dependencies per request, so every other dependency
+    (and endpoint) using the claims shares one decoded token.
+
+    Args:
+        token (Annotated[str, Depends): the JWT token
+
+    Raises:
+        HTTPException: if the token is invalid or expired
+
+    Returns:
+        User: the claims of the token
+    """
     try:
-        payload = jwt.decode(
-            token,
-            PROJECT_SETTINGS.JWT_SECRET_KEY,
-            algorithms=[PROJECT_SETTINGS.JWT_ALGORITHM],
-        )
-        username: str | None = payload.get("sub")
-        if username is None:
-            raise credentials_exception
-    except JWTError:
-        raise credentials_exception
+        return decode_access_token(token)
+    except (JWTError, ValidationError):
+        raise credentials_exception()
+
 
-    user = await employee_repo.get_employee_by_email(session, username)
+async def get_current_user(
+    claims: Annotated[User, Depends(get_token_claims)],
+    session: Annotated[AsyncSession, Depends(get_read_session)],
+) -> EmployeePrincipal:
+    user = await auth_service.get_principal(session, claims.sub)
+    await release_connection(session)  # a snapshot, no more reads
     if user is None:
-        raise credentials_exception
+        raise credentials_exception()
     return user
 
 
-def check_logged_in_user_is_manager(
-    token: Annotated[str, Depends(oauth2_scheme)]
+async def check_logged_in_user_is_manager(
+    claims: Annotated[User, Depends(get_token_claims)],
 ) -> bool:
     """This DI function checks if the user is a manager; if not, raises an
     exception.
 
     Args:
-        token (Annotated[str, Depends): the JWT token
+        claims (Annotated[User, Depends): the claims of the JWT token
 
     Raises:
         HTTPException: if the user is not a manager
@@ -69,7 +109,7 @@ def check_logged_in_user_is_manager(
     Returns:
         bool: True if the user is a manager
     """
-    result = auth_service.check_is_manager(token)
+    result = auth_service.check_is_manager(claims)
     if not result:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
@@ -81,6 +121,8 @@ def check_logged_in_user_is_manager(
 
 # define DI re-usable types:
 AsyncSessionDep = Annotated[AsyncSession, Depends(get_session)]
+ReadSessionDep = Annotated[AsyncSession, Depends(get_read_session)]
 TokenDep = Annotated[str, Depends(oauth2_scheme)]
-CurrentUserDep = Annotated[Employee, Depends(get_current_user)]
+ClaimsDep = Annotated[User, Depends(get_token_claims)]
+CurrentUserDep = Annotated[EmployeePrincipal, Depends(get_current_user)]
 IsManagerDep = Annotated[bool, Depends(check_logged_in_user_is_manager)]
@@ -0,0 +1,117 @@
+"""
+Executor for password hashing.
+
+bcrypt is slow on purpose, so calling it inside an async endpoint blocks the
+event loop (and every other request on the worker) for the whole hash.
+The hashing functions are run in a bounded thread or process pool instead;
+the number of workers caps how many hashes run at the same time, the rest
+wait in the executor's queue.
+"""
+
+import asyncio
+import multiprocessing
+from collections.abc import Callable
+from concurrent.futures import (
+    Executor,
+    ProcessPoolExecutor,
+    ThreadPoolExecutor,
+)
+from dataclasses import dataclass
+from typing import Any, Literal, TypeVar
+
+from core.config import PROJECT_SETTINGS
+
+T = TypeVar("T")
+
+
+@dataclass(frozen=True)
+class HashingExecutorStats:
+    """
+    A snapshot of the executor metrics.
+
+    in_flight: submitted jobs that haven't finished yet (running + queued),
+    queue_depth: jobs waiting for a free worker,
+    max_queue_depth: the highest queue depth seen so far.
+    """
+
+    kind: str
+    max_workers: int
+    in_flight: int
+    queue_depth: int
+    max_queue_depth: int
+    completed: int
+
+
+class PasswordHashingExecutor:
+    def __init__(
+        self,
+        kind: Literal["thread", "process"],
+        max_workers: int,
+    ) -> None:
+        self.kind = kind
+        self.max_workers = max_workers
+
+        self._executor: Executor | None = None
+        self._in_flight = 0
+        self._max_queue_depth = 0
+        self._completed = 0
+
+    def _get_executor(self) -> Executor:
+        # created on first use, so importing the module stays cheap
+        if self._executor is None:
+            if self.kind == "process":
+                # "spawn" avoids forking a process with a running event loop
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.max_workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                )
+            else:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.max_workers,
+                    thread_name_prefix="password-hashing",
+                )
+        return self._executor
+
+    @property
+    def queue_depth(self) -> int:
+        return max(0, self._in_flight - self.max_workers)
+
+    async def run(self, func: Callable[..., T], *args: Any) -> T:
+        """Run `func(*args)` in the executor and wait for the result.
+
+        For the process pool, `func` and `args` have to be picklable
+        (module level functions).
+        """
+        loop = asyncio.get_running_loop()
+
+        # counters are only touched from the event loop thread
+        self._in_flight += 1
+        self._max_queue_depth = max(self._max_queue_depth, self.queue_depth)
+        try:
+            return await loop.run_in_executor(
+                self._get_executor(), func, *args
+            )
+        finally:
+            self._in_flight -= 1
+            self._completed += 1
+
+    def stats(self) -> HashingExecutorStats:
+        return HashingExecutorStats(
+            kind=self.kind,
+            max_workers=self.max_workers,
+            in_flight=self._in_flight,
+            queue_depth=self.queue_depth,
+            max_queue_depth=self._max_queue_depth,
+            completed=self._completed,
+        )
+
+    def shutdown(self, wait: bool = True) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=wait)
+            self._executor = None
+
+
+password_hashing_executor = PasswordHashingExecutor(
+    kind=PROJECT_SETTINGS.PASSWORD_HASHING_EXECUTOR,
+    max_workers=PROJECT_SETTINGS.PASSWORD_HASHING_MAX_WORKERS,
+)
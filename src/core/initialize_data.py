@@ -6,7 +6,7 @@ from typing import Callable
 from sqlalchemy import Engine, select
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from core.auth import get_password_hash
+from core.auth import get_password_hash_async
 from core.config import PROJECT_SETTINGS
 from model import AsyncSessionMaker, Employee
 
@@ -44,7 +44,7 @@ async def check_and_create_user(
             first_name=first_name,
             last_name=last_name,
             email=email,
-            password_hash=get_password_hash(password),
+            password_hash=await get_password_hash_async(password),
             is_manager=is_manager,
             hire_date=hire_date,
         )
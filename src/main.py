@@ -2,17 +2,38 @@
 FastAPI main app.
 """
 
+from collections.abc import AsyncGenerator
+from contextlib import asynccontextmanager
+
 from fastapi import APIRouter, FastAPI
 from starlette.middleware.cors import CORSMiddleware
 
 from core.config import PROJECT_SETTINGS, initialize_settings
-from web import auth, product
+from core.hashing import password_hashing_executor
+from model.replicas import replica_set
+from task_queue.outbox import outbox_relay
+from web import auth, metrics, product, task
 
 initialize_settings()  # always run this first
 
+
+@asynccontextmanager
+async def lifespan(app: FastAPI) -> AsyncGenerator[None, None]:
+    """Start up and shut down shared resources."""
+    replica_set.start()  # health checks of the read replicas
+    if PROJECT_SETTINGS.OUTBOX_RELAY_ENABLED:
+        outbox_relay.start()
+    yield
+    if PROJECT_SETTINGS.OUTBOX_RELAY_ENABLED:
+        await outbox_relay.stop()
+    password_hashing_executor.shutdown()
+    await replica_set.stop()
+
+
 app = FastAPI(
     title="FastAPI + SQLAlchemy 2.0 Demo Project",
     version="1.0",
+    lifespan=lifespan,
 )
 
 app.add_middleware(
@@ -32,6 +53,12 @@ api_v1_router.include_router(
     tags=["product"],
 )
 api_v1_router.include_router(auth.router, prefix="/auth", tags=["auth"])
+api_v1_router.include_router(task.router, prefix="/tasks", tags=["task"])
+api_v1_router.include_router(
+    metrics.router,
+    prefix="/metrics",
+    tags=["metrics"],
+)
 
 app.include_router(api_v1_router, prefix=PROJECT_SETTINGS.API_V1_PATH)
 
@@ -0,0 +1,66 @@
+"""product sort indexes
+
+Revision ID: 3f9c1a7d2b64
+Revises: e52fb6232455
+Create Date: 2026-10-18 10:12:31.402118
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3f9c1a7d2b64'
+down_revision: Union[str, None] = 'e52fb6232455'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# one (column, product_id) index for each sortable product field
+SORT_INDEXES = {
+    'ix_product_product_name_id': ['product_name', 'product_id'],
+    'ix_product_unit_price_id': ['unit_price', 'product_id'],
+    'ix_product_units_in_stock_id': ['units_in_stock', 'product_id'],
+    'ix_product_type_id': ['type', 'product_id'],
+}
+
+
+def upgrade() -> None:
+    # CONCURRENTLY doesn't lock the table for writes, but can't run in a
+    # transaction
+    with op.get_context().autocommit_block():
+        for name, columns in SORT_INDEXES.items():
+            op.create_index(
+                name,
+                'product',
+                columns,
+                unique=False,
+                postgresql_concurrently=True,
+                if_not_exists=True,
+            )
+        # replaced by ix_product_product_name_id
+        op.drop_index(
+            'ix_product_product_name',
+            table_name='product',
+            postgresql_concurrently=True,
+            if_exists=True,
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_product_product_name',
+            'product',
+            ['product_name'],
+            unique=False,
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+        for name in SORT_INDEXES:
+            op.drop_index(
+                name,
+                table_name='product',
+                postgresql_concurrently=True,
+                if_exists=True,
+            )
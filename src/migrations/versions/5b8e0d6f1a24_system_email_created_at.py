@@ -0,0 +1,54 @@
+"""system email created_at
+
+Revision ID: 5b8e0d6f1a24
+Revises: c41a7e9f0d83
+Create Date: 2026-10-18 18:02:47.118356
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5b8e0d6f1a24'
+down_revision: Union[str, None] = 'c41a7e9f0d83'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # existing rows get the migration time
+    op.add_column(
+        'system_email',
+        sa.Column(
+            'created_at',
+            sa.DateTime(),
+            server_default=sa.text('now()'),
+            nullable=False,
+        ),
+    )
+    # CONCURRENTLY doesn't lock the table for writes, but can't run in a
+    # transaction
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_system_email_unsent_created_at',
+            'system_email',
+            ['created_at'],
+            unique=False,
+            postgresql_where=sa.text('NOT is_sent'),
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            'ix_system_email_unsent_created_at',
+            table_name='system_email',
+            postgresql_concurrently=True,
+            if_exists=True,
+        )
+    op.drop_column('system_email', 'created_at')
@@ -0,0 +1,132 @@
+"""partition system email
+
+Revision ID: 9a4c7e2b5d18
+Revises: 5b8e0d6f1a24
+Create Date: 2026-10-18 19:41:05.227613
+
+"""
+import datetime
+from typing import Any, Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9a4c7e2b5d18'
+down_revision: Union[str, None] = '5b8e0d6f1a24'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# partitions created ahead of time; afterwards, run `python -m
+# model.partitions` (or the Celery beat task) to keep creating them
+MONTHS_AHEAD = 3
+
+
+def add_months(month: datetime.date, months: int) -> datetime.date:
+    index = month.year * 12 + month.month - 1 + months
+    return datetime.date(index // 12, index % 12 + 1, 1)
+
+
+def create_table(name: str, *args: Any, **kwargs: Any) -> None:
+    op.create_table(name,
+    sa.Column('task_id', sa.Uuid(), nullable=False),
+    sa.Column('target_id', sa.Integer(), nullable=False),
+    sa.Column('type', postgresql.ENUM('PRODUCT', 'OTHER', name='notificationtype', create_type=False), nullable=False),
+    sa.Column('is_sent', sa.Boolean(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), server_default=sa.text('now()'), nullable=False),
+    *args,
+    **kwargs,
+    )
+
+
+def upgrade() -> None:
+    # a table can't be partitioned in place: create the partitioned table,
+    # then copy the rows (the table is locked meanwhile)
+    op.drop_index(
+        'ix_system_email_unsent_created_at', table_name='system_email'
+    )
+    op.rename_table('system_email', 'system_email_unpartitioned')
+    op.execute(
+        'ALTER TABLE system_email_unpartitioned '
+        'RENAME CONSTRAINT system_email_pkey '
+        'TO system_email_unpartitioned_pkey'
+    )
+
+    # the primary key has to include the partition key
+    create_table(
+        'system_email',
+        sa.PrimaryKeyConstraint('task_id', 'created_at'),
+        postgresql_partition_by='RANGE (created_at)',
+    )
+
+    bind = op.get_bind()
+    month = add_months(
+        bind.scalar(
+            sa.text(
+                'SELECT coalesce(min(created_at), now())::date '
+                'FROM system_email_unpartitioned'
+            )
+        ),
+        0,
+    )
+    last_month = add_months(
+        bind.scalar(sa.text('SELECT current_date')), MONTHS_AHEAD
+    )
+    while month <= last_month:
+        op.execute(
+            f'CREATE TABLE system_email_y{month.year:04d}m{month.month:02d} '
+            f'PARTITION OF system_email '
+            f"FOR VALUES FROM ('{month}') TO ('{add_months(month, 1)}')"
+        )
+        month = add_months(month, 1)
+
+    op.execute(
+        'INSERT INTO system_email '
+        '(task_id, target_id, type, is_sent, created_at) '
+        'SELECT task_id, target_id, type, is_sent, created_at '
+        'FROM system_email_unpartitioned'
+    )
+    op.drop_table('system_email_unpartitioned')
+
+    # created on every partition (CONCURRENTLY isn't supported here)
+    op.create_index(
+        'ix_system_email_unsent_created_at',
+        'system_email',
+        ['created_at'],
+        unique=False,
+        postgresql_where=sa.text('NOT is_sent'),
+    )
+
+
+def downgrade() -> None:
+    op.drop_index(
+        'ix_system_email_unsent_created_at', table_name='system_email'
+    )
+    op.rename_table('system_email', 'system_email_partitioned')
+    op.execute(
+        'ALTER TABLE system_email_partitioned '
+        'RENAME CONSTRAINT system_email_pkey '
+        'TO system_email_partitioned_pkey'
+    )
+
+    create_table('system_email', sa.PrimaryKeyConstraint('task_id'))
+    # task IDs are only unique per partition: keep the first email
+    op.execute(
+        'INSERT INTO system_email '
+        '(task_id, target_id, type, is_sent, created_at) '
+        'SELECT DISTINCT ON (task_id) '
+        'task_id, target_id, type, is_sent, created_at '
+        'FROM system_email_partitioned ORDER BY task_id, created_at'
+    )
+    # drops the partitions too
+    op.drop_table('system_email_partitioned')
+
+    op.create_index(
+        'ix_system_email_unsent_created_at',
+        'system_email',
+        ['created_at'],
+        unique=False,
+        postgresql_where=sa.text('NOT is_sent'),
+    )
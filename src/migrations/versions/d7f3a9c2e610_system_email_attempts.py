@@ -0,0 +1,40 @@
+"""system email attempts
+
+Revision ID: d7f3a9c2e610
+Revises: 9a4c7e2b5d18
+Create Date: 2026-10-18 21:12:38.504127
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd7f3a9c2e610'
+down_revision: Union[str, None] = '9a4c7e2b5d18'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # added to every partition; a constant default doesn't rewrite them
+    op.add_column(
+        'system_email',
+        sa.Column(
+            'attempts',
+            sa.Integer(),
+            server_default=sa.text('0'),
+            nullable=False,
+        ),
+    )
+    op.add_column(
+        'system_email',
+        sa.Column('last_attempt_at', sa.DateTime(), nullable=True),
+    )
+
+
+def downgrade() -> None:
+    op.drop_column('system_email', 'last_attempt_at')
+    op.drop_column('system_email', 'attempts')
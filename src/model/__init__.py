@@ -4,6 +4,7 @@ from __future__ import annotations
 from .base import (  # noqa: F401
     Base,
     engine,
+    sql_logger,
     AsyncSessionMaker,
     date_auto,
     int_pk,
@@ -18,4 +19,9 @@ from .employee import Employee  # noqa: F401
 from .order import Order  # noqa: F401
 from .order_detail import OrderDetail  # noqa: F401
 from .product import Product, ProductType  # noqa: F401
-from .email import SystemEmail, NotificationType  # noqa: F401
+from .email import (  # noqa: F401
+    SystemEmail,
+    SystemEmailTaskId,
+    NotificationType,
+)
+from .outbox import OutboxMessage  # noqa: F401
@@ -1,12 +1,14 @@
 from __future__ import annotations  # PEP-563
 
 import datetime
+import uuid
 from decimal import Decimal
-from typing import Annotated
+from typing import Annotated, Any, Literal
 
 from sqlalchemy import Numeric, String
 from sqlalchemy.ext.asyncio import (
     AsyncAttrs,
+    AsyncEngine,
     async_sessionmaker,
     create_async_engine,
 )
@@ -14,14 +16,70 @@ from sqlalchemy.orm import DeclarativeBase, MappedAsDataclass, mapped_column
 
 from core.config import PROJECT_SETTINGS
 
+from .pool import InstrumentedAsyncQueuePool, hold_times
+from .sql_logging import SqlLogger
+
 DATABASE_URL = str(PROJECT_SETTINGS.SQLALCHEMY_DATABASE_URL)
 
-# use create_async_engine
-engine = create_async_engine(
-    DATABASE_URL,
-    echo=True,
+# statement logging (`SQL_LOG_MODE`, see `model.sql_logging`)
+sql_logger = SqlLogger(
+    mode=PROJECT_SETTINGS.SQL_LOG_MODE,
+    sample_rate=PROJECT_SETTINGS.SQL_LOG_SAMPLE_RATE,
+    slow_threshold_ms=PROJECT_SETTINGS.SQL_LOG_SLOW_THRESHOLD_MS,
 )
 
+
+def unique_statement_name() -> str:
+    return f"__asyncpg_{uuid.uuid4()}__"
+
+
+def make_connect_args(
+    pooler: Literal["none", "pgbouncer"],
+    prepared_statement_cache_size: int,
+) -> dict[str, Any]:
+    """The asyncpg arguments for what the app connects to (`DB_POOLER`).
+
+    Behind PgBouncer in transaction pooling mode, each transaction may run on
+    a different server connection: a statement prepared on one is unknown on
+    the next, and the names asyncpg numbers per (client) connection clash.
+    So nothing is cached, and every prepared statement gets a unique name.
+
+    Connected to Postgres directly, the hot queries are prepared (parsed and
+    planned) once per connection, as long as they fit in the cache.
+    """
+    if pooler == "pgbouncer":
+        return {
+            "statement_cache_size": 0,  # asyncpg's own cache
+            "prepared_statement_cache_size": 0,  # the dialect's
+            "prepared_statement_name_func": unique_statement_name,
+        }
+    return {"prepared_statement_cache_size": prepared_statement_cache_size}
+
+
+def make_engine(url: str) -> AsyncEngine:
+    """An engine with the pool, pooler and logging settings (the primary's,
+    or a replica's)."""
+    engine = create_async_engine(
+        url,
+        poolclass=InstrumentedAsyncQueuePool,  # see `model.pool`
+        pool_size=PROJECT_SETTINGS.DB_POOL_SIZE,
+        max_overflow=PROJECT_SETTINGS.DB_MAX_OVERFLOW,
+        pool_timeout=PROJECT_SETTINGS.DB_POOL_TIMEOUT,
+        pool_recycle=PROJECT_SETTINGS.DB_POOL_RECYCLE,
+        pool_pre_ping=PROJECT_SETTINGS.DB_POOL_PRE_PING,
+        connect_args=make_connect_args(
+            PROJECT_SETTINGS.DB_POOLER,
+            PROJECT_SETTINGS.DB_PREPARED_STATEMENT_CACHE_SIZE,
+        ),
+    )
+    sql_logger.install(engine.sync_engine)
+    hold_times.install(engine.sync_engine)
+    return engine
+
+
+# use create_async_engine
+engine = make_engine(DATABASE_URL)
+
 # async_sessionmaker: a factory for new AsyncSession objects.
 # expire_on_commit - don't expire objects after transaction commit
 AsyncSessionMaker = async_sessionmaker(
@@ -1,7 +1,10 @@
+import datetime
 import enum
-from sqlalchemy import Uuid
+from typing import Any
+from sqlalchemy import Connection, Index, MetaData, Uuid, event, func, text
 from sqlalchemy.orm import Mapped, mapped_column
 from model import Base, uuid_pk
+from model.partitions import maintain_system_email_partitions
 
 
 class NotificationType(enum.Enum):
@@ -12,7 +15,22 @@ class NotificationType(enum.Enum):
 class SystemEmail(Base):
     __tablename__ = "system_email"
 
-    # Celery task UUID as PK (chance of collision is low)
+    # partitioned by month of creation (see `model.partitions`); a primary
+    # key (and any unique index) has to include the partition key
+    __table_args__ = (
+        # only the unsent emails are indexed (for the retry sweeper, see
+        # `task_queue.tasks.resend_unsent_emails`), so the index stays small
+        # while the table grows
+        Index(
+            "ix_system_email_unsent_created_at",
+            "created_at",
+            postgresql_where=text("NOT is_sent"),
+        ),
+        {"postgresql_partition_by": "RANGE (created_at)"},
+    )
+
+    # Celery task UUID as PK (chance of collision is low); the ORM identifies
+    # emails by task ID alone, kept unique by `SystemEmailTaskId`
     task_id: Mapped[uuid_pk] = mapped_column(Uuid)
 
     target_id: Mapped[int]
@@ -20,3 +38,53 @@ class SystemEmail(Base):
         default=NotificationType.OTHER,
     )
     is_sent: Mapped[bool] = mapped_column(default=False)
+    # set by the database (retries keep the time of the first attempt)
+    created_at: Mapped[datetime.datetime] = mapped_column(
+        init=False,
+        primary_key=True,
+        server_default=func.now(),
+    )
+    # sweeps that re-enqueued the email (see
+    # `task_queue.tasks.resend_unsent_emails`), and when the last one did
+    attempts: Mapped[int] = mapped_column(
+        init=False,
+        default=0,
+        server_default=text("0"),
+    )
+    last_attempt_at: Mapped[datetime.datetime | None] = mapped_column(
+        init=False,
+        default=None,
+    )
+
+    __mapper_args__ = {"primary_key": [task_id]}
+
+
+class SystemEmailTaskId(Base):
+    """The task UUIDs of the system emails: a partitioned table can't have a
+    unique index on the task UUID alone, this (not partitioned) one can.
+
+    Writers insert the UUID here first (`ON CONFLICT DO NOTHING`): a
+    concurrent writer of the same UUID waits for the first one to commit,
+    then updates its email instead of inserting another one. The rows are
+    deleted with the partitions of their emails (see `model.partitions`).
+    """
+
+    __tablename__ = "system_email_task_id"
+
+    task_id: Mapped[uuid_pk] = mapped_column(Uuid)
+    created_at: Mapped[datetime.datetime] = mapped_column(
+        init=False,
+        index=True,
+        server_default=func.now(),
+    )
+
+
+@event.listens_for(Base.metadata, "after_create")
+def create_system_email_partitions(
+    target: MetaData,
+    connection: Connection,
+    **kwargs: Any,
+) -> None:
+    # `create_all` (tests, benchmarks), once both tables exist; migrations
+    # create them on their own
+    maintain_system_email_partitions(connection)
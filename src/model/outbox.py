@@ -0,0 +1,24 @@
+from typing import Any
+
+from sqlalchemy import String
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.orm import Mapped, mapped_column
+
+from model import Base, int_pk, str_255, timestamp_auto
+
+
+class OutboxMessage(Base):
+    """
+    A task to publish, written in the same transaction as the change it's
+    about; `task_queue.outbox` relays the messages to the broker.
+    """
+
+    __tablename__ = "outbox"
+
+    outbox_id: Mapped[int_pk] = mapped_column(init=False)
+
+    task_name: Mapped[str_255]  # the name of the Celery task
+    task_id: Mapped[str] = mapped_column(String(36))
+    args: Mapped[list[Any]] = mapped_column(JSONB)
+
+    created_at: Mapped[timestamp_auto] = mapped_column(init=False)
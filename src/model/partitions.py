@@ -0,0 +1,247 @@
+"""
+Monthly range partitions (by a creation timestamp) of append-only tables,
+e.g. `system_email`.
+
+Every month has its own partition, named `<table>_yYYYYmMM`. The maintenance
+creates the partitions of the next months ahead of time (inserts fail if
+their month has no partition), and removes the partitions older than the
+retention period: dropping (or detaching) a whole partition is instant, and
+leaves no dead rows to vacuum, unlike a `DELETE` of old rows.
+
+Run it daily, with Celery beat (`maintain_system_email_partitions`) or:
+
+    python -m model.partitions
+    python -m model.partitions --months-ahead 6 --retention-months 24
+    python -m model.partitions --detach-only  # keep the old tables
+"""
+
+import argparse
+import asyncio
+import datetime
+import logging
+import re
+from dataclasses import dataclass, field
+
+from sqlalchemy import Connection, text
+
+from core.config import PROJECT_SETTINGS, initialize_settings
+
+logger = logging.getLogger(__name__)
+
+PARTITION_NAME = re.compile(r"_y(\d{4})m(\d{2})$")
+
+
+def add_months(month: datetime.date, months: int) -> datetime.date:
+    """The first day of the month `months` after the month of `month`."""
+    index = month.year * 12 + month.month - 1 + months
+    return datetime.date(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(table_name: str, month: datetime.date) -> str:
+    return f"{table_name}_y{month.year:04d}m{month.month:02d}"
+
+
+def partition_month(
+    table_name: str,
+    name: str,
+) -> datetime.date | None:
+    """The month of a partition, None if it isn't a monthly partition."""
+    match = PARTITION_NAME.search(name)
+    if match is None or name != partition_name(
+        table_name, datetime.date(int(match[1]), int(match[2]), 1)
+    ):
+        return None
+    return datetime.date(int(match[1]), int(match[2]), 1)
+
+
+def get_partitions(
+    connection: Connection,
+    table_name: str,
+) -> dict[str, datetime.date]:
+    """The monthly partitions attached to a table (name -> month)."""
+    names = connection.scalars(
+        text(
+            "SELECT child.relname FROM pg_inherits "
+            "JOIN pg_class parent ON pg_inherits.inhparent = parent.oid "
+            "JOIN pg_class child ON pg_inherits.inhrelid = child.oid "
+            "WHERE parent.relname = :table_name"
+        ),
+        {"table_name": table_name},
+    )
+    partitions = {}
+    for name in names:
+        month = partition_month(table_name, name)
+        if month is not None:
+            partitions[name] = month
+    return partitions
+
+
+def create_partitions(
+    connection: Connection,
+    table_name: str,
+    first_month: datetime.date,
+    last_month: datetime.date,
+) -> list[str]:
+    """Create the missing partitions from `first_month` to `last_month`
+    (included).
+
+    Returns:
+        list[str]: The names of the partitions created.
+    """
+    existing = get_partitions(connection, table_name)
+    created = []
+    month = add_months(first_month, 0)
+    while month <= last_month:
+        name = partition_name(table_name, month)
+        if name not in existing:
+            connection.execute(
+                text(
+                    f"CREATE TABLE {name} PARTITION OF {table_name} "
+                    f"FOR VALUES FROM ('{month}') "
+                    f"TO ('{add_months(month, 1)}')"
+                )
+            )
+            created.append(name)
+        month = add_months(month, 1)
+    return created
+
+
+def remove_partitions(
+    connection: Connection,
+    table_name: str,
+    before: datetime.date,
+    detach_only: bool = False,
+) -> list[str]:
+    """Drop (or only detach) the partitions of the months before `before`.
+
+    Returns:
+        list[str]: The names of the partitions removed.
+    """
+    removed = []
+    for name, month in sorted(get_partitions(connection, table_name).items()):
+        if month >= add_months(before, 0):
+            continue
+        connection.execute(
+            text(f"ALTER TABLE {table_name} DETACH PARTITION {name}")
+        )
+        if not detach_only:
+            connection.execute(text(f"DROP TABLE {name}"))
+        removed.append(name)
+    return removed
+
+
+@dataclass
+class PartitionChanges:
+    created: list[str] = field(default_factory=list)
+    removed: list[str] = field(default_factory=list)
+    # the first month kept
+    retained_from: datetime.date | None = None
+
+
+def maintain_partitions(
+    connection: Connection,
+    table_name: str,
+    months_ahead: int,
+    retention_months: int,
+    detach_only: bool = False,
+    today: datetime.date | None = None,
+) -> PartitionChanges:
+    """Create the partitions from `retention_months` ago (in case they're
+    missing) to `months_ahead` from now, and remove the older ones.
+
+    Args:
+        connection (Connection): A connection, in a transaction.
+        table_name (str): The partitioned table.
+        months_ahead (int): Partitions of the next months to create.
+        retention_months (int): Partitions of the previous months to keep.
+        detach_only (bool, optional): Keep the removed partitions as tables
+        (e.g. to archive them). Defaults to False.
+        today (datetime.date | None, optional): Defaults to the database's
+        current date (the timestamps are set by the database).
+    """
+    if today is None:
+        today = connection.scalar(text("SELECT current_date"))
+        assert today is not None
+    this_month = add_months(today, 0)
+    first_month = add_months(this_month, -retention_months)
+
+    changes = PartitionChanges(
+        created=create_partitions(
+            connection,
+            table_name,
+            first_month,
+            add_months(this_month, months_ahead),
+        ),
+        removed=remove_partitions(
+            connection, table_name, first_month, detach_only
+        ),
+        retained_from=first_month,
+    )
+    if changes.created or changes.removed:
+        logger.info(
+            f"Partitions of {table_name}: created {changes.created}, "
+            f"removed {changes.removed}"
+        )
+    return changes
+
+
+def maintain_system_email_partitions(
+    connection: Connection,
+    detach_only: bool | None = None,
+    months_ahead: int | None = None,
+    retention_months: int | None = None,
+) -> PartitionChanges:
+    """`maintain_partitions` of `system_email`, with the project settings
+    (`SYSTEM_EMAIL_PARTITION_*`) by default. Also deletes the task UUIDs of
+    the emails removed (`system_email_task_id`)."""
+    changes = maintain_partitions(
+        connection,
+        "system_email",
+        months_ahead=(
+            PROJECT_SETTINGS.SYSTEM_EMAIL_PARTITION_MONTHS_AHEAD
+            if months_ahead is None
+            else months_ahead
+        ),
+        retention_months=(
+            PROJECT_SETTINGS.SYSTEM_EMAIL_RETENTION_MONTHS
+            if retention_months is None
+            else retention_months
+        ),
+        detach_only=(
+            PROJECT_SETTINGS.SYSTEM_EMAIL_PARTITION_DETACH_ONLY
+            if detach_only is None
+            else detach_only
+        ),
+    )
+    connection.execute(
+        text("DELETE FROM system_email_task_id WHERE created_at < :month"),
+        {"month": changes.retained_from},
+    )
+    return changes
+
+
+async def main(args: argparse.Namespace) -> None:
+    from model import engine
+
+    async with engine.begin() as conn:
+        changes = await conn.run_sync(
+            maintain_system_email_partitions,
+            args.detach_only or None,
+            args.months_ahead,
+            args.retention_months,
+        )
+    await engine.dispose()
+    print(f"created: {changes.created}, removed: {changes.removed}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description=__doc__,
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+    parser.add_argument("--months-ahead", type=int)
+    parser.add_argument("--retention-months", type=int)
+    parser.add_argument("--detach-only", action="store_true")
+    args = parser.parse_args()
+    initialize_settings()
+    asyncio.run(main(args))
@@ -0,0 +1,205 @@
+"""
+Connection pools that record how long getting a connection takes.
+
+Each API (or Celery) worker process has its own pool, so the database sees
+up to `workers * (DB_POOL_SIZE + DB_MAX_OVERFLOW)` connections: keep that
+under Postgres' `max_connections`. When the pool is exhausted, requests
+wait for a connection (up to `DB_POOL_TIMEOUT`); the wait time histogram
+shows it, managers can read it at `/api/v1/metrics/db-pool`.
+
+How long each route keeps its connections checked out is recorded too
+(`hold_times`, at `/api/v1/metrics/db-hold-times`): the shorter, the more
+requests a pool serves.
+"""
+
+import bisect
+import time
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Any
+
+from sqlalchemy import Engine, event, exc
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession
+from sqlalchemy.pool import (
+    AsyncAdaptedQueuePool,
+    PoolProxiedConnection,
+    QueuePool,
+)
+
+# upper bounds of the wait time buckets, in ms (plus one for slower ones)
+WAIT_BUCKETS_MS = (1, 5, 10, 50, 100, 500, 1000, 5000)
+
+
+class WaitTimeHistogram:
+    def __init__(self) -> None:
+        self.counts = [0] * (len(WAIT_BUCKETS_MS) + 1)
+        self.max_ms = 0.0
+        self.timeouts = 0
+
+    def record(self, wait_ms: float) -> None:
+        self.counts[bisect.bisect_left(WAIT_BUCKETS_MS, wait_ms)] += 1
+        self.max_ms = max(self.max_ms, wait_ms)
+
+    def buckets(self) -> dict[str, int]:
+        labels = [f"<={bound}ms" for bound in WAIT_BUCKETS_MS] + [
+            f">{WAIT_BUCKETS_MS[-1]}ms"
+        ]
+        return dict(zip(labels, self.counts))
+
+
+class InstrumentedQueuePool(QueuePool):
+    """Times `connect` (checkouts): waiting for a free connection, or
+    opening a new one."""
+
+    def __init__(self, *args: Any, **kwargs: Any) -> None:
+        super().__init__(*args, **kwargs)
+        self.wait_times = WaitTimeHistogram()
+
+    def connect(self) -> PoolProxiedConnection:
+        started_at = time.perf_counter()
+        try:
+            connection = super().connect()
+        except exc.TimeoutError:
+            self.wait_times.timeouts += 1
+            raise
+        self.wait_times.record((time.perf_counter() - started_at) * 1000)
+        return connection
+
+    def recreate(self) -> QueuePool:
+        # `engine.dispose()` replaces the pool, keep the histogram
+        pool = super().recreate()
+        assert isinstance(pool, InstrumentedQueuePool)
+        pool.wait_times = self.wait_times
+        return pool
+
+
+# the pool of async engines (an asyncio queue instead of a thread-safe one)
+class InstrumentedAsyncQueuePool(
+    InstrumentedQueuePool,
+    AsyncAdaptedQueuePool,
+):
+    pass
+
+
+@dataclass(frozen=True)
+class PoolStats:
+    """
+    A snapshot of the pool.
+
+    checked_out: connections in use,
+    overflow: connections opened beyond `pool_size` (negative: the pool isn't
+    full yet),
+    wait_ms: how long checkouts took, by bucket.
+    """
+
+    pool_size: int
+    max_overflow: int
+    timeout: float
+    checked_in: int
+    checked_out: int
+    overflow: int
+    checkouts: int
+    timeouts: int
+    max_wait_ms: float
+    wait_ms: dict[str, int]
+
+
+def get_pool_stats(engine: Engine | AsyncEngine) -> PoolStats:
+    if isinstance(engine, AsyncEngine):
+        engine = engine.sync_engine
+    pool = engine.pool  # replaced by `engine.dispose()`
+    assert isinstance(pool, InstrumentedQueuePool)
+    wait_times = pool.wait_times
+    return PoolStats(
+        pool_size=pool.size(),
+        max_overflow=pool._max_overflow,
+        timeout=pool.timeout(),
+        checked_in=pool.checkedin(),
+        checked_out=pool.checkedout(),
+        overflow=pool.overflow(),
+        checkouts=sum(wait_times.counts),
+        timeouts=wait_times.timeouts,
+        max_wait_ms=wait_times.max_ms,
+        wait_ms=wait_times.buckets(),
+    )
+
+
+# the route of the current request (set by the session dependencies), to
+# attribute the hold times; "-" outside of requests (background jobs)
+current_route: ContextVar[str] = ContextVar("current_route", default="-")
+
+# (route, checkout time), on the connection record while checked out
+HOLD_ATTRIBUTE = "_hold_started_at"
+
+
+@dataclass
+class HoldTimeStats:
+    count: int = 0
+    total_ms: float = 0.0
+    max_ms: float = 0.0
+
+
+class ConnectionHoldTimes:
+    """How long connections stay checked out, by route."""
+
+    def __init__(self) -> None:
+        self.routes: dict[str, HoldTimeStats] = {}
+
+    def install(self, engine: Engine) -> None:
+        """Record the checkouts of an engine; for an async engine, pass its
+        `sync_engine`."""
+        event.listen(engine, "checkout", self._checkout)
+        event.listen(engine, "checkin", self._checkin)
+
+    def _checkout(
+        self,
+        dbapi_connection: Any,
+        connection_record: Any,
+        connection_proxy: Any,
+    ) -> None:
+        connection_record.info[HOLD_ATTRIBUTE] = (
+            current_route.get(),
+            time.perf_counter(),
+        )
+
+    def _checkin(self, dbapi_connection: Any, connection_record: Any) -> None:
+        checkout = connection_record.info.pop(HOLD_ATTRIBUTE, None)
+        if checkout is not None:
+            route, started_at = checkout
+            self.record(route, (time.perf_counter() - started_at) * 1000)
+
+    def record(self, route: str, hold_ms: float) -> None:
+        stats = self.routes.setdefault(route, HoldTimeStats())
+        stats.count += 1
+        stats.total_ms += hold_ms
+        stats.max_ms = max(stats.max_ms, hold_ms)
+
+    def stats(self) -> dict[str, dict[str, float]]:
+        return {
+            route: {
+                "count": stats.count,
+                "avg_ms": stats.total_ms / stats.count,
+                "max_ms": stats.max_ms,
+            }
+            for route, stats in sorted(self.routes.items())
+        }
+
+
+hold_times = ConnectionHoldTimes()
+
+
+async def release_connection(session: AsyncSession) -> None:
+    """Give the connection of a read-only session back to the pool now,
+    instead of when the request ends (after the response is serialized).
+
+    Sessions only check out a connection with their first statement, and
+    keep it until the transaction ends: call this once the reads of a
+    request are done. The loaded objects are detached but keep their state,
+    and the session can be used again (with a new checkout). Does nothing if
+    changes are pending; don't use it after flushing uncommitted changes,
+    they would be rolled back.
+    """
+    if session.new or session.dirty or session.deleted:
+        return
+    if session.in_transaction():
+        await session.close()
@@ -3,7 +3,7 @@ from __future__ import annotations  # PEP-563
 import enum
 from typing import TYPE_CHECKING, Any
 
-from sqlalchemy import CheckConstraint
+from sqlalchemy import CheckConstraint, Index, text
 from sqlalchemy.orm import Mapped, mapped_column, relationship, validates
 
 from model import Base, int_pk, num_12_2, str_255
@@ -23,12 +23,21 @@ class ProductType(enum.Enum):
     OTHER = 2
 
 
+def normalize_product_name(value: str) -> str:
+    """Product names are stored in title case.
+
+    Also use this for Core INSERT/UPDATE statements, which skip the
+    `validates` hook of the model.
+    """
+    return value.title()
+
+
 class Product(Base, repr=False):  # type: ignore
     __tablename__ = "product"
 
     product_id: Mapped[int_pk] = mapped_column(init=False)
 
-    product_name: Mapped[str_255] = mapped_column(index=True)
+    product_name: Mapped[str_255]
     unit_price: Mapped[num_12_2] = mapped_column(
         CheckConstraint("unit_price>0")
     )
@@ -39,6 +48,23 @@ class Product(Base, repr=False):  # type: ignore
     type: Mapped[ProductType] = mapped_column(
         default=ProductType.OTHER,
     )
+    # incremented by each update (`repository.product.update_product`), for
+    # optimistic concurrency control (ETag/If-Match)
+    version: Mapped[int] = mapped_column(
+        init=False,
+        default=1,
+        server_default=text("1"),
+    )
+
+    # one index for each sortable field (see `repository.product`), so that
+    # sorted listings (and keyset pagination) don't need to sort the table;
+    # the product_name one also serves lookups by name
+    __table_args__ = (
+        Index("ix_product_product_name_id", "product_name", "product_id"),
+        Index("ix_product_unit_price_id", "unit_price", "product_id"),
+        Index("ix_product_units_in_stock_id", "units_in_stock", "product_id"),
+        Index("ix_product_type_id", "type", "product_id"),
+    )
 
     order_details: Mapped[list[OrderDetail]] = relationship(
         init=False,
@@ -68,4 +94,4 @@ class Product(Base, repr=False):  # type: ignore
 
     @validates("product_name")
     def validate_product_name(self, key: Any, value: str) -> str:
-        return value.title()
+        return normalize_product_name(value)
@@ -0,0 +1,192 @@
+"""
+Read replicas (`DB_REPLICA_SERVERS`), for the read-only endpoints.
+
+A background monitor checks every replica (every
+`DB_REPLICA_CHECK_INTERVAL_SECONDS`): a replica is used while it answers
+(within `DB_REPLICA_CHECK_TIMEOUT_SECONDS`) and its replication lag is at
+most `DB_REPLICA_MAX_LAG_SECONDS`. Read sessions
+go to the healthy replicas in turn, and to the primary when there is none
+(or no replica is configured); the write paths always use the primary.
+
+Replicas are asynchronous: a read right after a write may not see it yet
+(up to the max. lag), so only use read sessions where that's fine. Cache
+what they read for the max. lag at most (see `ReplicaSet.cache_ttl`).
+"""
+
+import asyncio
+import contextlib
+import datetime
+import itertools
+import logging
+from dataclasses import dataclass
+
+from sqlalchemy import event, text
+from sqlalchemy.engine import ExceptionContext
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession
+
+from core.config import PROJECT_SETTINGS
+
+from .base import AsyncSessionMaker, make_engine
+
+logger = logging.getLogger(__name__)
+
+# seconds since the last replayed transaction, 0 if everything received has
+# been replayed (an idle primary sends no transactions, that isn't lag)
+REPLICATION_LAG = text(
+    "SELECT CASE "
+    "WHEN NOT pg_is_in_recovery() "
+    "OR pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0 "
+    "ELSE COALESCE("
+    "EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0) END"
+)
+
+
+class Replica:
+    def __init__(self, name: str, engine: AsyncEngine) -> None:
+        self.name = name  # host:port, no credentials
+        self.engine = engine
+        # unknown until the first check
+        self.healthy = False
+        self.lag_seconds: float | None = None
+        self.error: str | None = None
+        self.checked_at: datetime.datetime | None = None
+
+        event.listen(engine.sync_engine, "handle_error", self._handle_error)
+
+    def _handle_error(self, context: ExceptionContext) -> None:
+        # the replica went away between checks: stop using it right away
+        if context.is_disconnect:
+            self.healthy = False
+            self.error = str(context.original_exception)
+
+
+@dataclass(frozen=True)
+class ReplicaStats:
+    name: str
+    healthy: bool
+    lag_seconds: float | None
+    error: str | None
+    checked_at: datetime.datetime | None
+
+
+class ReplicaSet:
+    def __init__(
+        self,
+        replicas: list[Replica],
+        max_lag_seconds: float,
+        check_interval: float,
+        check_timeout: float,
+    ) -> None:
+        self.replicas = replicas
+        self.max_lag_seconds = max_lag_seconds
+        self.check_interval = check_interval
+        # a replica that doesn't answer in time (e.g. a dropped network) is
+        # unhealthy too
+        self.check_timeout = check_timeout
+
+        self._next = itertools.count()
+        self._runner: asyncio.Task[None] | None = None
+        self.primary_reads = 0  # read sessions that fell back to the primary
+
+    async def _get_lag(self, replica: Replica) -> float:
+        async with replica.engine.connect() as conn:
+            return float(await conn.scalar(REPLICATION_LAG) or 0)
+
+    async def check(self, replica: Replica) -> None:
+        try:
+            lag = await asyncio.wait_for(
+                self._get_lag(replica), timeout=self.check_timeout
+            )
+        except Exception as e:
+            error = (
+                f"No answer in {self.check_timeout}s"
+                if isinstance(e, TimeoutError)
+                else str(e)
+            )
+            if replica.healthy:
+                logger.warning(f"Replica {replica.name} is down: {error}")
+            replica.healthy = False
+            replica.lag_seconds = None
+            replica.error = error
+        else:
+            replica.lag_seconds = lag
+            replica.error = None
+            healthy = replica.lag_seconds <= self.max_lag_seconds
+            if replica.healthy and not healthy:
+                logger.warning(
+                    f"Replica {replica.name} is lagging "
+                    f"{replica.lag_seconds:.1f}s behind"
+                )
+            replica.healthy = healthy
+        replica.checked_at = datetime.datetime.now(datetime.UTC)
+
+    async def check_all(self) -> None:
+        await asyncio.gather(*(self.check(r) for r in self.replicas))
+
+    def get_engine(self) -> AsyncEngine | None:
+        """The engine of the next healthy replica, None if there is none."""
+        healthy = [replica for replica in self.replicas if replica.healthy]
+        if not healthy:
+            return None
+        return healthy[next(self._next) % len(healthy)].engine
+
+    def session(self) -> AsyncSession:
+        """A session for reads: on a healthy replica, else on the primary."""
+        replica_engine = self.get_engine()
+        if replica_engine is None:
+            self.primary_reads += 1
+            return AsyncSessionMaker()
+        return AsyncSessionMaker(bind=replica_engine)
+
+    def cache_ttl(self, session: AsyncSession) -> float | None:
+        """The TTL of cache entries read with `session`: on a replica, the
+        max. lag (it may have missed the latest write, after the write
+        refreshed the cache), else None (the TTL of the cache)."""
+        if any(session.bind is replica.engine for replica in self.replicas):
+            return self.max_lag_seconds
+        return None
+
+    def start(self) -> None:
+        if self.replicas:
+            self._runner = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._runner is not None:
+            # let it exit before disposing of the engines it's checking
+            self._runner.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._runner
+            self._runner = None
+        for replica in self.replicas:
+            await replica.engine.dispose()
+
+    async def _run(self) -> None:
+        while True:
+            await self.check_all()
+            await asyncio.sleep(self.check_interval)
+
+    def stats(self) -> list[ReplicaStats]:
+        return [
+            ReplicaStats(
+                name=replica.name,
+                healthy=replica.healthy,
+                lag_seconds=replica.lag_seconds,
+                error=replica.error,
+                checked_at=replica.checked_at,
+            )
+            for replica in self.replicas
+        ]
+
+
+replica_set = ReplicaSet(
+    replicas=[
+        Replica(
+            f"{url.hosts()[0]['host']}:{url.hosts()[0]['port']}",
+            make_engine(str(url)),
+        )
+        for url in PROJECT_SETTINGS.SQLALCHEMY_REPLICA_URLS
+    ],
+    max_lag_seconds=PROJECT_SETTINGS.DB_REPLICA_MAX_LAG_SECONDS,
+    check_interval=PROJECT_SETTINGS.DB_REPLICA_CHECK_INTERVAL_SECONDS,
+    check_timeout=PROJECT_SETTINGS.DB_REPLICA_CHECK_TIMEOUT_SECONDS,
+)
@@ -0,0 +1,121 @@
+"""
+SQL statement logging (`SQL_LOG_MODE`):
+
+- "off": nothing is logged,
+- "echo": every statement and its parameters (SQLAlchemy's `echo`; for
+  development, it's slow),
+- "sampled": a fraction of the statements (`SQL_LOG_SAMPLE_RATE`),
+- "slow": the statements slower than `SQL_LOG_SLOW_THRESHOLD_MS`.
+
+Sampled and slow statements are logged (as warnings for slow ones) with
+their duration and a fingerprint of the parameters (names and types, no
+values), so the log neither leaks data nor grows with the parameters.
+"""
+
+import hashlib
+import logging
+import random
+import time
+from typing import Any, Literal
+
+from sqlalchemy import Engine, event
+from sqlalchemy.engine import Connection, ExecutionContext
+
+logger = logging.getLogger(__name__)
+
+SqlLogMode = Literal["off", "echo", "sampled", "slow"]
+
+# start time of the statement, on its execution context
+START_ATTRIBUTE = "_sql_log_started_at"
+
+
+def fingerprint_parameters(parameters: Any, executemany: bool) -> str:
+    """The shape of the parameters: names (or positions) and types."""
+    if executemany and isinstance(parameters, list | tuple):
+        if not parameters:
+            return "[]"
+        first = fingerprint_parameters(parameters[0], False)
+        return f"{len(parameters)} x {first}"
+    if isinstance(parameters, dict):
+        fields = ", ".join(
+            f"{name}: {type(value).__name__}"
+            for name, value in sorted(parameters.items())
+        )
+        return f"{{{fields}}}"
+    if isinstance(parameters, list | tuple):
+        fields = ", ".join(type(value).__name__ for value in parameters)
+        return f"({fields})"
+    return type(parameters).__name__
+
+
+def fingerprint_statement(statement: str) -> str:
+    """A short hash of the statement, to group the log lines by query."""
+    normalized = " ".join(statement.split())
+    return hashlib.sha1(normalized.encode()).hexdigest()[:8]
+
+
+class SqlLogger:
+    def __init__(
+        self,
+        mode: SqlLogMode,
+        sample_rate: float,
+        slow_threshold_ms: float,
+    ) -> None:
+        self.mode = mode
+        self.sample_rate = sample_rate
+        self.slow_threshold_ms = slow_threshold_ms
+
+    def install(self, engine: Engine) -> None:
+        """Set up the logging of a (sync) engine; for an async engine, pass
+        its `sync_engine`."""
+        engine.echo = self.mode == "echo"
+        if self.mode in ("sampled", "slow"):
+            event.listen(
+                engine, "before_cursor_execute", self.before_cursor_execute
+            )
+            event.listen(
+                engine, "after_cursor_execute", self.after_cursor_execute
+            )
+
+    def before_cursor_execute(
+        self,
+        conn: Connection,
+        cursor: Any,
+        statement: str,
+        parameters: Any,
+        context: ExecutionContext | None,
+        executemany: bool,
+    ) -> None:
+        if context is None:
+            return
+        if self.mode == "sampled" and random.random() >= self.sample_rate:
+            return
+        setattr(context, START_ATTRIBUTE, time.perf_counter())
+
+    def after_cursor_execute(
+        self,
+        conn: Connection,
+        cursor: Any,
+        statement: str,
+        parameters: Any,
+        context: ExecutionContext | None,
+        executemany: bool,
+    ) -> None:
+        started_at = getattr(context, START_ATTRIBUTE, None)
+        if started_at is None:
+            return
+        duration_ms = (time.perf_counter() - started_at) * 1000
+
+        if self.mode == "slow":
+            if duration_ms < self.slow_threshold_ms:
+                return
+            level = logging.WARNING
+        else:
+            level = logging.INFO
+        logger.log(
+            level,
+            f"SQL {self.mode} [{fingerprint_statement(statement)}] "
+            f"{duration_ms:.1f}ms params="
+            f"{fingerprint_parameters(parameters, executemany)}: "
+            f"{' '.join(statement.split())}",
+        )
@@ -1,10 +1,29 @@
 """
 Note that this repository uses "synchronous" operations (for use in Celery tasks).
+Except `get_system_emails`, which is for the API (async).
 """
 
+import datetime
+import uuid
+from collections.abc import Sequence
+
+from sqlalchemy import (
+    Integer,
+    Uuid,
+    column,
+    func,
+    insert,
+    or_,
+    select,
+    tuple_,
+    update,
+    values,
+)
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
-from model.email import NotificationType, SystemEmail
+from model.email import NotificationType, SystemEmail, SystemEmailTaskId
 
 
 def create_system_email(
@@ -26,12 +45,101 @@ def create_system_email(
         target_id=target_id,
         type=type,
     )
+    # fails if the task UUID is taken (see `SystemEmailTaskId`)
+    session.add(SystemEmailTaskId(task_id=task_id))
     session.add(system_email)
     session.commit()
 
     return system_email
 
 
+def upsert_system_emails(
+    session: Session,
+    targets: Sequence[tuple[str, int]],
+    type: NotificationType,
+    is_sent: bool = False,
+) -> list[SystemEmail]:
+    """Create (or overwrite) many system emails with their status, in one
+    commit.
+
+    Existing emails with the same task UUID (retries of the same task) get
+    the new target ID, type and status instead. The table is partitioned,
+    so there's no unique index on the task UUID alone for an `ON CONFLICT`:
+    the UUIDs are claimed in `system_email_task_id` first (which waits for
+    concurrent writers of the same UUIDs), then the existing emails are
+    updated and the others inserted (one statement each).
+
+    The same task can be in `targets` more than once (the outbox delivers at
+    least once): it's written once, with its last target ID.
+
+    Args:
+        session (Session): The session object.
+        targets (Sequence[tuple[str, int]]): (task UUID, target ID) pairs.
+        type (NotificationType): Type of the target objects.
+        is_sent (bool, optional): The `is_sent` status. Defaults to False.
+
+    Returns:
+        list[SystemEmail]: The system emails, in the order of `targets`.
+    """
+    if not targets:
+        return []
+
+    # task UUID -> target ID
+    unique_targets = {
+        str(task_id): target_id for task_id, target_id in targets
+    }
+    # in the same order for every writer, so they can't deadlock
+    session.execute(
+        pg_insert(SystemEmailTaskId)
+        .values([{"task_id": task_id} for task_id in sorted(unique_targets)])
+        .on_conflict_do_nothing()
+    )
+
+    target_rows = values(
+        column("task_id", Uuid),
+        column("target_id", Integer),
+        name="targets",
+    ).data(
+        [
+            (uuid.UUID(task_id), target_id)
+            for task_id, target_id in unique_targets.items()
+        ]
+    )
+    emails = {
+        str(email.task_id): email
+        for email in session.scalars(
+            update(SystemEmail)
+            .where(SystemEmail.task_id == target_rows.c.task_id)
+            .values(
+                target_id=target_rows.c.target_id,
+                type=type,
+                is_sent=is_sent,
+            )
+            .returning(SystemEmail),
+            # refresh the emails already in the session
+            execution_options={"populate_existing": True},
+        )
+    }
+    new_emails = [
+        {
+            "task_id": task_id,
+            "target_id": target_id,
+            "type": type,
+            "is_sent": is_sent,
+        }
+        for task_id, target_id in unique_targets.items()
+        if task_id not in emails
+    ]
+    if new_emails:
+        for email in session.scalars(
+            insert(SystemEmail).returning(SystemEmail), new_emails
+        ):
+            emails[str(email.task_id)] = email
+    session.commit()
+
+    return [emails[str(task_id)] for task_id, _ in targets]
+
+
 def update_system_email_status(
     session: Session,
     system_email_task_id: str,
@@ -52,3 +160,110 @@ def update_system_email_status(
     session.commit()
 
     return system_email
+
+
+def update_system_emails_status(
+    session: Session,
+    system_email_task_ids: Sequence[str],
+    status: bool = True,
+) -> list[str]:
+    """Update the `is_sent` status of many system emails in one statement.
+
+    Args:
+        session (Session): The session object.
+        system_email_task_ids (Sequence[str]): The task UUIDs of the emails.
+        status (bool, optional): The new `is_sent` status. Defaults to True.
+
+    Returns:
+        list[str]: The task UUIDs of the emails found (and updated).
+    """
+    task_ids = session.scalars(
+        update(SystemEmail)
+        .where(SystemEmail.task_id.in_(system_email_task_ids))
+        .values(is_sent=status)
+        .returning(SystemEmail.task_id)
+    ).all()
+    session.commit()
+
+    return [str(task_id) for task_id in task_ids]
+
+
+def get_unsent_system_emails(
+    session: Session,
+    type: NotificationType,
+    min_age: datetime.timedelta,
+    max_age: datetime.timedelta,
+    retry_interval: datetime.timedelta,
+    max_attempts: int,
+    limit: int,
+) -> Sequence[SystemEmail]:
+    """Get the oldest emails that haven't been sent, created between
+    `max_age` and `min_age` ago (uses the partial index of unsent emails),
+    and record the attempt, in one statement (and one commit).
+
+    Emails attempted less than `retry_interval` ago, or `max_attempts`
+    times, are skipped; so are the emails locked by another sweep.
+
+    Args:
+        session (Session): The session object.
+        type (NotificationType): Type of the target objects.
+        min_age (datetime.timedelta): Skip the newer emails (still retried
+        by their own task).
+        max_age (datetime.timedelta): Skip the older emails (given up on).
+        retry_interval (datetime.timedelta): Min. time between attempts.
+        max_attempts (int): Max. number of attempts.
+        limit (int): Max. number of emails.
+
+    Returns:
+        Sequence[SystemEmail]: The emails, oldest first, with the attempt
+        recorded.
+    """
+    now = func.now()
+    unsent = (
+        select(SystemEmail.task_id, SystemEmail.created_at)
+        .where(
+            ~SystemEmail.is_sent,
+            SystemEmail.type == type,
+            SystemEmail.created_at > now - max_age,
+            SystemEmail.created_at <= now - min_age,
+            SystemEmail.attempts < max_attempts,
+            or_(
+                SystemEmail.last_attempt_at.is_(None),
+                SystemEmail.last_attempt_at <= now - retry_interval,
+            ),
+        )
+        .order_by(SystemEmail.created_at)
+        .limit(limit)
+        .with_for_update(skip_locked=True)
+    )
+    stmt = (
+        update(SystemEmail)
+        .where(
+            tuple_(SystemEmail.task_id, SystemEmail.created_at).in_(unsent)
+        )
+        .values(attempts=SystemEmail.attempts + 1, last_attempt_at=now)
+        .returning(SystemEmail)
+    )
+    system_emails = session.scalars(
+        stmt, execution_options={"populate_existing": True}
+    ).all()
+    session.commit()
+
+    return sorted(system_emails, key=lambda email: email.created_at)
+
+
+async def get_system_emails(
+    session: AsyncSession,
+    task_ids: Sequence[uuid.UUID],
+) -> Sequence[SystemEmail]:
+    """Get the system emails of many tasks, in one query (by primary key).
+
+    Args:
+        session (AsyncSession): The async session object.
+        task_ids (Sequence[uuid.UUID]): The task UUIDs.
+
+    Returns:
+        Sequence[SystemEmail]: The emails found, in no particular order.
+    """
+    stmt = select(SystemEmail).where(SystemEmail.task_id.in_(task_ids))
+    return (await session.scalars(stmt)).all()
@@ -0,0 +1,57 @@
+"""
+The outbox: tasks to publish, written in the transaction of the change that
+triggers them (so they're never lost, or sent for a rolled back change).
+"""
+
+from collections.abc import Sequence
+from typing import Any
+
+from sqlalchemy import delete, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from model.outbox import OutboxMessage
+
+# Celery task names (see `task_queue.tasks`)
+SEND_EMAIL_TASK = "task_queue.tasks.send_email"
+SEND_EMAILS_TASK = "task_queue.tasks.send_emails"
+
+
+def add_message(
+    session: AsyncSession,
+    task_name: str,
+    task_id: str,
+    args: list[Any],
+) -> OutboxMessage:
+    """Add a message to the session; it's written with the next flush, in
+    the current transaction (the caller commits)."""
+    message = OutboxMessage(task_name=task_name, task_id=task_id, args=args)
+    session.add(message)
+    return message
+
+
+async def lock_pending_messages(
+    session: AsyncSession,
+    limit: int,
+) -> Sequence[OutboxMessage]:
+    """Lock the oldest messages for relaying (until the transaction ends).
+
+    Messages locked by another relay are skipped, so relays can run in
+    parallel without sending a message twice.
+    """
+    stmt = (
+        select(OutboxMessage)
+        .order_by(OutboxMessage.outbox_id)
+        .limit(limit)
+        .with_for_update(skip_locked=True)
+    )
+    return (await session.scalars(stmt)).all()
+
+
+async def delete_messages(
+    session: AsyncSession,
+    outbox_ids: Sequence[int],
+) -> None:
+    await session.execute(
+        delete(OutboxMessage).where(OutboxMessage.outbox_id.in_(outbox_ids))
+    )
+    await session.commit()
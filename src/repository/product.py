@@ -1,29 +1,337 @@
-from collections.abc import Sequence
+import enum
+import uuid
+from collections.abc import AsyncIterator, Sequence
+from decimal import Decimal
+from typing import Any, NoReturn
 
 from fastapi import HTTPException
-from sqlalchemy import desc, select
+from sqlalchemy import (
+    Row,
+    Select,
+    delete,
+    desc,
+    insert,
+    literal,
+    select,
+    text,
+    tuple_,
+    update,
+)
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import InstrumentedAttribute
 
-from model.product import Product
-from schema.product import ProductCreate, ProductUpdate
+import repository.outbox as outbox_repo
+from core.cache import RedisCache, TieredCache
+from core.config import PROJECT_SETTINGS
+from model import Order, OrderDetail
+from model.product import Product, normalize_product_name
+from schema.product import (
+    ProductCreate,
+    ProductCursor,
+    ProductOutput,
+    ProductSortField,
+    ProductUpdate,
+)
+
+# product_id -> product details; the write functions below refresh or drop
+# the entries of the products they change, in this worker (and Redis) only:
+# the other workers keep theirs until they expire (a short TTL)
+product_cache = TieredCache(
+    ProductOutput,
+    max_size=PROJECT_SETTINGS.PRODUCT_CACHE_MAX_SIZE,
+    ttl=PROJECT_SETTINGS.PRODUCT_CACHE_TTL_SECONDS,
+    redis=(
+        RedisCache(str(PROJECT_SETTINGS.CACHE_REDIS_URL), prefix="product")
+        if PROJECT_SETTINGS.PRODUCT_CACHE_REDIS
+        else None
+    ),
+)
+
+# The registry of fields product listings can be sorted by. Each one has a
+# `(column, product_id)` index (see `Product.__table_args__`), so sorted pages
+# are read from an index instead of sorting the whole table.
+SORT_COLUMNS: dict[str, InstrumentedAttribute[Any]] = {
+    ProductSortField.PRODUCT_ID: Product.product_id,
+    ProductSortField.PRODUCT_NAME: Product.product_name,
+    ProductSortField.UNIT_PRICE: Product.unit_price,
+    ProductSortField.UNITS_IN_STOCK: Product.units_in_stock,
+    ProductSortField.TYPE: Product.type,
+}
+
+
+# the columns of exported products; exports read rows instead of ORM objects,
+# so nothing piles up in the session while streaming
+EXPORT_COLUMNS = (
+    Product.product_id,
+    Product.product_name,
+    Product.unit_price,
+    Product.units_in_stock,
+    Product.type,
+    Product.version,
+)
+
+
+def get_sort_key(
+    order_by: str,
+    direction: str,
+) -> list[InstrumentedAttribute[Any]]:
+    """Validate the sort of a product listing, before any SQL is issued.
+
+    Args:
+        order_by (str): The field to sort by, see `SORT_COLUMNS`.
+        direction (str): asc or desc.
+
+    Raises:
+        HTTPException: For unknown fields or directions.
+
+    Returns:
+        list: The columns to sort by; product_id breaks ties.
+    """
+    if direction not in ("asc", "desc"):
+        raise HTTPException(
+            status_code=400,
+            detail="Use asc or desc for the direction parameter.",
+        )
+
+    column = SORT_COLUMNS.get(order_by)
+    if column is None:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Cannot sort products by {order_by}.",
+        )
+
+    if column is Product.product_id:
+        return [column]
+    return [column, Product.product_id]
 
 
 async def create_product(
-    session: AsyncSession, product: ProductCreate
+    session: AsyncSession,
+    product: ProductCreate,
+    notification_task_id: str | None = None,
 ) -> Product:
+    """Create a product.
+
+    Args:
+        session (AsyncSession): The session object.
+        product (ProductCreate): The product input model.
+        notification_task_id (str | None, optional): If set, the product
+        creation email is queued in the outbox (same transaction), with this
+        task ID.
+    """
     db_product = Product(**product.model_dump())
     session.add(db_product)
+    if notification_task_id is not None:
+        await session.flush()  # for the product ID
+        outbox_repo.add_message(
+            session,
+            outbox_repo.SEND_EMAIL_TASK,
+            notification_task_id,
+            [db_product.product_id],
+        )
     await session.commit()
 
+    await product_cache.set(
+        str(db_product.product_id),
+        ProductOutput.model_validate(db_product),
+    )
+
     return db_product
 
 
+async def create_products(
+    session: AsyncSession,
+    products: Sequence[ProductCreate],
+    notification_task_ids: Sequence[str] | None = None,
+) -> list[int]:
+    """Create many products with multi-row `INSERT ... RETURNING` statements
+    (one transaction).
+
+    Args:
+        session (AsyncSession): The session object.
+        products (Sequence[ProductCreate]): The product input models.
+        notification_task_ids (Sequence[str] | None, optional): If set, one
+        outbox message (same transaction) sends the creation emails, with
+        these task IDs (one for each product).
+
+    Returns:
+        list[int]: The IDs of the new products, in the order of `products`.
+    """
+    rows = [product.model_dump() for product in products]
+    for row in rows:
+        # Core inserts skip the `validates` hook of the model
+        row["product_name"] = normalize_product_name(row["product_name"])
+
+    product_ids = await session.scalars(
+        insert(Product).returning(
+            Product.product_id, sort_by_parameter_order=True
+        ),
+        rows,
+    )
+    product_ids_list = list(product_ids.all())
+    if notification_task_ids is not None:
+        outbox_repo.add_message(
+            session,
+            outbox_repo.SEND_EMAILS_TASK,
+            str(uuid.uuid4()),
+            [list(zip(product_ids_list, notification_task_ids))],
+        )
+    await session.commit()
+
+    return product_ids_list
+
+
+# imports COPY each batch into this staging table first (dropped at the end
+# of the transaction), then merge it into `product` with two statements
+IMPORT_STAGING_TABLE = "product_import"
+IMPORT_COLUMNS = ["product_name", "unit_price", "units_in_stock", "type"]
+
+
+async def import_products(
+    session: AsyncSession,
+    products: Sequence[ProductCreate],
+) -> tuple[int, int]:
+    """Upsert a batch of products by name (one transaction): existing
+    products with the same name are updated, the others are created.
+
+    The rows are sent with COPY (asyncpg) into a temporary staging table,
+    so a batch takes a few round trips whatever its size. Names should be
+    unique within a batch.
+
+    Returns:
+        tuple[int, int]: The number of created and updated products.
+    """
+    conn = await session.connection()
+    await conn.execute(
+        text(
+            f"CREATE TEMPORARY TABLE {IMPORT_STAGING_TABLE} ("
+            "product_name varchar(255) NOT NULL, "
+            "unit_price numeric(12, 2) NOT NULL, "
+            "units_in_stock integer NOT NULL, "
+            "type text NOT NULL"
+            ") ON COMMIT DROP"
+        )
+    )
+
+    # the asyncpg connection, for COPY
+    driver_connection = (await conn.get_raw_connection()).driver_connection
+    assert driver_connection is not None
+    await driver_connection.copy_records_to_table(
+        IMPORT_STAGING_TABLE,
+        records=[
+            (
+                normalize_product_name(product.product_name),
+                product.unit_price,
+                product.units_in_stock,
+                product.type.name,
+            )
+            for product in products
+        ],
+        columns=IMPORT_COLUMNS,
+    )
+
+    updated_ids = (
+        await conn.scalars(
+            text(
+                "UPDATE product AS p SET "
+                "unit_price = s.unit_price, "
+                "units_in_stock = s.units_in_stock, "
+                "type = s.type::producttype, "
+                "version = p.version + 1 "
+                f"FROM {IMPORT_STAGING_TABLE} AS s "
+                "WHERE p.product_name = s.product_name "
+                "RETURNING p.product_id"
+            )
+        )
+    ).all()
+    created = await conn.execute(
+        text(
+            "INSERT INTO product "
+            "(product_name, unit_price, units_in_stock, type, version) "
+            "SELECT s.product_name, s.unit_price, s.units_in_stock, "
+            "s.type::producttype, 1 "
+            f"FROM {IMPORT_STAGING_TABLE} AS s "
+            "WHERE NOT EXISTS ("
+            "SELECT 1 FROM product AS p "
+            "WHERE p.product_name = s.product_name)"
+        )
+    )
+
+    await session.commit()
+
+    await product_cache.delete(*[str(id) for id in updated_ids])
+
+    return created.rowcount, len(updated_ids)
+
+
 async def get_product(
     session: AsyncSession, product_id: int
 ) -> Product | None:
     return await session.get(Product, product_id)
 
 
+def build_products_statement(
+    page: int,
+    page_size: int,
+    order_by: str,
+    direction: str,
+) -> Select[tuple[Product]]:
+    """The statement of a product listing page (offset pagination)."""
+    sort_key = get_sort_key(order_by, direction)
+
+    stmt = select(Product).offset((page - 1) * page_size).limit(page_size)
+    if direction == "desc":
+        return stmt.order_by(*[desc(column) for column in sort_key])
+    return stmt.order_by(*sort_key)
+
+
+def build_products_export_statement(
+    order_by: str,
+    direction: str,
+) -> Select[Any]:
+    """The statement of a product export: all products, sorted like the
+    listing."""
+    sort_key = get_sort_key(order_by, direction)
+
+    stmt = select(*EXPORT_COLUMNS)
+    if direction == "desc":
+        return stmt.order_by(*[desc(column) for column in sort_key])
+    return stmt.order_by(*sort_key)
+
+
+async def stream_products(
+    session: AsyncSession,
+    stmt: Select[Any],
+    batch_size: int,
+) -> AsyncIterator[Sequence[Row[Any]]]:
+    """Stream the rows of `stmt` from a server side cursor, `batch_size`
+    rows at a time; memory use doesn't depend on the number of rows."""
+    result = await session.stream(
+        stmt.execution_options(yield_per=batch_size)
+    )
+    async for rows in result.partitions():
+        yield rows
+
+
+async def get_product_orders(
+    session: AsyncSession,
+    product_id: int,
+    limit: int,
+) -> Sequence[Order]:
+    """Get the latest orders of a product (one query, at most `limit`)."""
+    stmt = (
+        select(Order)
+        .join(OrderDetail, OrderDetail.order_id == Order.order_id)
+        .where(OrderDetail.product_id == product_id)
+        .order_by(desc(Order.order_id))
+        .limit(limit)
+    )
+    orders = (await session.scalars(stmt)).all()
+
+    return orders
+
+
 async def get_products(
     session: AsyncSession,
     page: int,
@@ -31,55 +339,280 @@ async def get_products(
     order_by: str,
     direction: str,
 ) -> Sequence[Product]:
-    stmt = select(Product).offset((page - 1) * page_size).limit(page_size)
+    stmt = build_products_statement(page, page_size, order_by, direction)
+    products = (await session.scalars(stmt)).all()
 
-    if direction == "asc":
-        stmt = stmt.order_by(order_by)
-    elif direction == "desc":
-        stmt = stmt.order_by(desc(order_by))
+    return products
+
+
+def _to_cursor_value(value: Any) -> Any:
+    """Convert a column value to JSON (for cursors)."""
+    if isinstance(value, enum.Enum):
+        return value.name
+    if isinstance(value, Decimal):
+        return str(value)
+    return value
+
+
+def _from_cursor_value(column: InstrumentedAttribute[Any], value: Any) -> Any:
+    python_type = column.type.python_type
+    if issubclass(python_type, enum.Enum):
+        return python_type[value]
+    return python_type(value)
+
+
+def make_cursor(
+    product: Product,
+    order_by: str,
+    direction: str,
+    backwards: bool,
+) -> ProductCursor:
+    return ProductCursor(
+        order_by=order_by,
+        direction=direction,
+        value=_to_cursor_value(getattr(product, order_by)),
+        product_id=product.product_id,
+        backwards=backwards,
+    )
+
+
+def build_products_by_cursor_statement(
+    page_size: int,
+    order_by: str,
+    direction: str,
+    cursor: ProductCursor | None = None,
+) -> Select[tuple[Product]]:
+    """The statement of a product listing page (keyset pagination), see
+    `get_products_by_cursor`. It fetches one extra row to tell if there's
+    more; pages read backwards come in reverse order.
+    """
+    sort_key = get_sort_key(order_by, direction)
+    backwards = cursor is not None and cursor.backwards
+    # reading backwards means scanning in the opposite order
+    scan_desc = (direction == "desc") != backwards
+
+    stmt = select(Product)
+    if cursor is not None:
+        column = sort_key[0]
+        try:
+            value = _from_cursor_value(column, cursor.value)
+        except (KeyError, TypeError, ValueError, ArithmeticError):
+            raise HTTPException(status_code=400, detail="Invalid cursor.")
+
+        bound_values = [literal(value, column.type)]
+        if len(sort_key) > 1:
+            bound_values.append(literal(cursor.product_id))
+        key, bound = tuple_(*sort_key), tuple_(*bound_values)
+        stmt = stmt.where(key < bound if scan_desc else key > bound)
+
+    if scan_desc:
+        stmt = stmt.order_by(*[desc(column) for column in sort_key])
     else:
-        raise HTTPException(
-            status_code=400,
-            detail="Use asc or desc for the direction parameter.",
-        )
+        stmt = stmt.order_by(*sort_key)
 
-    products = (await session.scalars(stmt)).all()
+    return stmt.limit(page_size + 1)
 
-    return products
+
+async def get_products_by_cursor(
+    session: AsyncSession,
+    page_size: int,
+    order_by: str,
+    direction: str,
+    cursor: ProductCursor | None = None,
+) -> tuple[Sequence[Product], ProductCursor | None, ProductCursor | None]:
+    """Get a page of products with keyset pagination.
+
+    Instead of skipping `OFFSET` rows, the page starts right after (or before)
+    the sort key `(order_by column, product_id)` of the cursor, so the
+    database can seek in the matching index and deep pages cost the same as
+    the first one.
+
+    Args:
+        session (AsyncSession): The session object.
+        page_size (int): The size of each page.
+        order_by (str): The column to sort by (ignored if there's a cursor).
+        direction (str): asc or desc (ignored if there's a cursor).
+        cursor (ProductCursor | None): The position to continue from,
+        None for the first page.
+
+    Raises:
+        HTTPException: For unsupported sort columns, directions or cursors.
+
+    Returns:
+        tuple: The products, and the cursors of the next and previous pages
+        (None if there's no such page).
+    """
+    if cursor is not None:
+        order_by, direction = cursor.order_by, cursor.direction
+
+    stmt = build_products_by_cursor_statement(
+        page_size, order_by, direction, cursor
+    )
+    products = list((await session.scalars(stmt)).all())
+    has_more = len(products) > page_size
+    products = products[:page_size]
+
+    backwards = cursor is not None and cursor.backwards
+    if backwards:
+        products.reverse()
+
+    if not products:
+        return products, None, None
+
+    if backwards:
+        has_next, has_prev = True, has_more
+    else:
+        has_next, has_prev = has_more, cursor is not None
+
+    next_cursor = (
+        make_cursor(products[-1], order_by, direction, backwards=False)
+        if has_next
+        else None
+    )
+    prev_cursor = (
+        make_cursor(products[0], order_by, direction, backwards=True)
+        if has_prev
+        else None
+    )
+
+    return products, next_cursor, prev_cursor
 
 
 async def update_product(
     session: AsyncSession,
     product_id: int,
     product_data: ProductUpdate,
+    expected_version: int | None = None,
 ) -> Product:
-    # check if the model exists in the database
-    product = await session.get(Product, product_id)
+    """Update a product with one `UPDATE ... RETURNING` statement.
+
+    Args:
+        session (AsyncSession): The session object.
+        product_id (int): The product ID (primary key).
+        product_data (ProductUpdate): The fields to update (None: unchanged).
+        expected_version (int | None, optional): Only update the product if
+        it's still at this version (optimistic concurrency control).
+
+    Raises:
+        HTTPException: 404 if the product doesn't exist, 412 if its version
+        isn't `expected_version`.
+    """
+    values = product_data.model_dump(exclude_none=True)
+    if "product_name" in values:
+        values["product_name"] = normalize_product_name(values["product_name"])
+
+    criteria = [Product.product_id == product_id]
+    if expected_version is not None:
+        criteria.append(Product.version == expected_version)
+
+    if values:
+        product = (
+            await session.scalars(
+                update(Product)
+                .where(*criteria)
+                .values(**values, version=Product.version + 1)
+                .returning(Product)
+                .execution_options(populate_existing=True)
+            )
+        ).one_or_none()
+    else:
+        # nothing to change, don't bump the version
+        product = (
+            await session.scalars(select(Product).where(*criteria))
+        ).one_or_none()
+
     if product is None:
+        await _raise_update_failure(session, product_id, expected_version)
+    await session.commit()
+
+    await product_cache.set(
+        str(product_id),
+        ProductOutput.model_validate(product),
+    )
+
+    return product
+
+
+async def _raise_update_failure(
+    session: AsyncSession,
+    product_id: int,
+    expected_version: int | None,
+) -> NoReturn:
+    # only reached when no row matched: tell a missing product from a stale
+    # version
+    version = None
+    if expected_version is not None:
+        version = await session.scalar(
+            select(Product.version).where(Product.product_id == product_id)
+        )
+    if version is None:
         raise HTTPException(
             status_code=404,
             detail=f"Product #{product_id} not found! Aborting the update.",
         )
-
-    # if it does, update its attributes with values from the Pydantic model
-    for key, value in product_data.model_dump(exclude_none=True).items():
-        setattr(product, key, value)
-    await session.commit()
-
-    return product
+    raise HTTPException(
+        status_code=412,
+        detail=(
+            f"Product #{product_id} was modified (version {version}); "
+            "reload it and retry the update."
+        ),
+    )
 
 
 async def delete_product(
     session: AsyncSession,
     product_id: int,
 ) -> None:
-    product = await session.get(Product, product_id)
+    """Delete a product with one `DELETE ... RETURNING` statement.
 
-    if product is None:
+    Raises:
+        HTTPException: 404 if the product doesn't exist, 409 if it's still
+        referenced by orders.
+    """
+    deleted_ids = await _delete_products(session, [product_id])
+    if not deleted_ids:
         raise HTTPException(
             status_code=404,
             detail=f"Product #{product_id} not found! Cannot delete product.",
         )
 
-    await session.delete(product)
-    await session.commit()
+
+async def delete_products(
+    session: AsyncSession,
+    product_ids: Sequence[int],
+) -> list[int]:
+    """Delete many products in one statement.
+
+    Returns:
+        list[int]: The IDs of the deleted products (IDs that don't exist are
+        ignored).
+
+    Raises:
+        HTTPException: 409 if some of the products are still referenced by
+        orders (nothing is deleted then).
+    """
+    return await _delete_products(session, product_ids)
+
+
+async def _delete_products(
+    session: AsyncSession,
+    product_ids: Sequence[int],
+) -> list[int]:
+    stmt = (
+        delete(Product)
+        .where(Product.product_id.in_(product_ids))
+        .returning(Product.product_id)
+    )
+    try:
+        deleted_ids = list((await session.scalars(stmt)).all())
+        await session.commit()
+    except IntegrityError:
+        await session.rollback()
+        raise HTTPException(
+            status_code=409,
+            detail="Products with orders cannot be deleted.",
+        )
+
+    await product_cache.delete(*[str(id) for id in deleted_ids])
+
+    return deleted_ids
@@ -9,3 +9,12 @@ class EmployeeBase(BaseModel):
     first_name: str
     last_name: str
     is_manager: bool
+
+
+class EmployeePrincipal(EmployeeBase):
+    """
+    An immutable snapshot of a logged in employee (no password hash),
+    safe to cache and share between requests.
+    """
+
+    model_config = ConfigDict(from_attributes=True, frozen=True)
@@ -0,0 +1,12 @@
+from datetime import datetime
+
+from pydantic import BaseModel, ConfigDict
+
+
+class OrderOutput(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    order_id: int
+    customer_id: int
+    order_datetime: datetime
+    is_shipped: bool
@@ -2,12 +2,27 @@
 Pydantic models for FastAPI.
 """
 
+import base64
+import enum
 from decimal import Decimal
-from typing import Annotated
+from typing import Annotated, Any
 
 from pydantic import BaseModel, ConfigDict, PlainSerializer
 
 from model.product import ProductType
+from schema.order import OrderOutput
+
+
+class ProductSortField(enum.StrEnum):
+    """
+    Fields product listings can be sorted by.
+    """
+
+    PRODUCT_ID = "product_id"
+    PRODUCT_NAME = "product_name"
+    UNIT_PRICE = "unit_price"
+    UNITS_IN_STOCK = "units_in_stock"
+    TYPE = "type"
 
 
 class ProductBase(BaseModel):
@@ -60,3 +75,73 @@ class ProductOutput(ProductBase):
     ]
     units_in_stock: int
     type: ProductType
+    version: int
+
+
+class ProductDetailOutput(ProductOutput):
+    """
+    Product details, with optional relationship fields (None unless they're
+    requested with `include`).
+    """
+
+    orders: list[OrderOutput] | None = None
+
+
+class ProductImportError(BaseModel):
+    line: int  # 1-based, the CSV header is line 1
+    error: str
+
+
+class ProductImportSummary(BaseModel):
+    """
+    The result of a product import; `errors` is capped, `failed` counts all
+    rejected rows.
+    """
+
+    rows: int = 0
+    created: int = 0
+    updated: int = 0
+    failed: int = 0
+    errors: list[ProductImportError] = []
+
+
+class ProductCursor(BaseModel):
+    """
+    The position in a keyset paginated listing: the sort key
+    `(order_by column, product_id)` of a product, and whether to read the
+    page after it or (backwards) before it.
+
+    Clients only see it as an opaque string, see `encode`.
+    """
+
+    order_by: str
+    direction: str
+    value: Any
+    product_id: int
+    backwards: bool = False
+
+    def encode(self) -> str:
+        return base64.urlsafe_b64encode(
+            self.model_dump_json().encode("utf-8")
+        ).decode("ascii")
+
+    @classmethod
+    def decode(cls, cursor: str) -> "ProductCursor":
+        """Raises ValueError (ValidationError) for invalid cursors."""
+        try:
+            data = base64.urlsafe_b64decode(cursor.encode("ascii"))
+        except Exception as exc:
+            raise ValueError(f"Invalid cursor: {cursor}") from exc
+        return cls.model_validate_json(data)
+
+
+class ProductPage(BaseModel):
+    """
+    A page of a keyset (cursor) paginated product listing.
+    Pass `next_cursor` or `prev_cursor` back to get the next/previous page;
+    they're None at the end/start of the listing.
+    """
+
+    items: list[ProductOutput]
+    next_cursor: str | None = None
+    prev_cursor: str | None = None
@@ -0,0 +1,18 @@
+import enum
+import uuid
+
+from pydantic import BaseModel
+
+
+class TaskState(enum.StrEnum):
+    # not handled by a worker yet (or an unknown task ID)
+    PENDING = "pending"
+    # the email couldn't be sent, it will be retried
+    RETRYING = "retrying"
+    SENT = "sent"
+
+
+class TaskStatus(BaseModel):
+    task_id: uuid.UUID
+    state: TaskState
+    target_id: int | None = None
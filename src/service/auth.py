@@ -1,15 +1,38 @@
 import logging
+from typing import Any
 
-from jose import jwt
+from sqlalchemy import event, inspect
+from sqlalchemy.engine import Connection
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Mapper, Session, SessionTransaction, object_session
 
 import repository.employee as employee_repo
-from core.auth import verify_password
+from core.auth import verify_password_async
+from core.cache import RedisCache, TieredCache
 from core.config import PROJECT_SETTINGS
 from model import Employee
+from model.replicas import replica_set
+from schema.employee import EmployeePrincipal
+from schema.user import User
 
 logger = logging.getLogger(__name__)
 
+# the emails of the employees changed in a session, until it commits (see
+# `invalidate_principal`)
+CHANGED_PRINCIPALS = "changed_principals"
+
+# email (JWT "sub") -> employee snapshot
+principal_cache = TieredCache(
+    EmployeePrincipal,
+    max_size=PROJECT_SETTINGS.PRINCIPAL_CACHE_MAX_SIZE,
+    ttl=PROJECT_SETTINGS.PRINCIPAL_CACHE_TTL_SECONDS,
+    redis=(
+        RedisCache(str(PROJECT_SETTINGS.CACHE_REDIS_URL), prefix="principal")
+        if PROJECT_SETTINGS.PRINCIPAL_CACHE_REDIS
+        else None
+    ),
+)
+
 
 async def authenticate_user(
     session: AsyncSession,
@@ -38,18 +61,81 @@ async def authenticate_user(
     if employee is None:
         return False
 
-    if not verify_password(password, employee.password_hash):
+    if not await verify_password_async(password, employee.password_hash):
         return False
 
     return employee
 
 
-def check_is_manager(token: str) -> bool:
-    token_dict = jwt.decode(
-        token,
-        PROJECT_SETTINGS.JWT_SECRET_KEY,
-        algorithms=[PROJECT_SETTINGS.JWT_ALGORITHM],
+async def get_principal(
+    session: AsyncSession,
+    email: str,
+) -> EmployeePrincipal | None:
+    """
+    Get the logged in employee by email, from the principal cache if
+    possible.
+
+    Parameters:
+        session (AsyncSession): The database session, used on cache misses.
+        email (str): The email of the employee (the "sub" of the token).
+
+    Returns:
+        EmployeePrincipal | None: The employee snapshot, or None if there's
+        no such employee.
+    """
+    principal = await principal_cache.get(email)
+    if principal is not None:
+        return principal
+
+    employee = await employee_repo.get_employee_by_email(session, email)
+    if employee is None:
+        return None
+
+    principal = EmployeePrincipal.model_validate(employee)
+    await principal_cache.set(
+        email, principal, ttl=replica_set.cache_ttl(session)
     )
-    is_manager: bool = token_dict["is_manager"]
+    return principal
+
+
+@event.listens_for(Employee, "after_update")
+@event.listens_for(Employee, "after_delete")
+def invalidate_principal(
+    mapper: Mapper[Any],
+    connection: Connection,
+    target: Employee,
+) -> None:
+    """
+    Drop cached snapshots of changed or deleted employees (ORM flushes only,
+    bulk UPDATE/DELETE statements don't trigger this).
+
+    They're dropped again after the commit: until then, a concurrent
+    `get_principal` can cache the old row again.
+    """
+    emails = {target.email}
+    # the email itself may have changed
+    emails.update(inspect(target).attrs.email.history.deleted or ())
+    principal_cache.discard(*emails)
+
+    session = object_session(target)
+    if session is not None:
+        session.info.setdefault(CHANGED_PRINCIPALS, set()).update(emails)
+
+
+@event.listens_for(Session, "after_commit")
+def invalidate_committed_principals(session: Session) -> None:
+    emails = session.info.pop(CHANGED_PRINCIPALS, None)
+    if emails:
+        principal_cache.discard(*emails)
+
+
+@event.listens_for(Session, "after_soft_rollback")
+def forget_changed_principals(
+    session: Session,
+    previous_transaction: SessionTransaction,
+) -> None:
+    session.info.pop(CHANGED_PRINCIPALS, None)
+
 
-    return is_manager
+def check_is_manager(user: User) -> bool:
+    return user.is_manager
@@ -2,59 +2,146 @@
 Database CRUD operations for FastAPI service.
 """
 
+import csv
+import io
 import logging
-from collections.abc import Sequence
+import uuid
+from collections.abc import AsyncIterator, Sequence
+from typing import Any, Literal
 
-from celery.result import AsyncResult
 from fastapi import HTTPException
+from sqlalchemy import Select
 from sqlalchemy.ext.asyncio import AsyncSession
 
 import repository.product as product_repo
+from core.config import PROJECT_SETTINGS
+from model import AsyncSessionMaker
 from model.product import Product
-from schema.product import ProductCreate, ProductUpdate
-from task_queue.tasks import send_email
+from model.replicas import replica_set
+from schema.order import OrderOutput
+from schema.product import (
+    ProductCreate,
+    ProductCursor,
+    ProductDetailOutput,
+    ProductOutput,
+    ProductPage,
+    ProductUpdate,
+)
+from task_queue.outbox import outbox_relay
 
 logger = logging.getLogger(__name__)
 
+# relationships product details can include (`include=orders`)
+PRODUCT_INCLUDES = frozenset({"orders"})
+
 
 async def create_product(
     session: AsyncSession,
     product: ProductCreate,
 ) -> tuple[Product, str]:
-    db_product = await product_repo.create_product(session, product)
+    # the notification email is queued in the outbox with the product (one
+    # transaction), the relay publishes it
+    task_id = str(uuid.uuid4())
+    db_product = await product_repo.create_product(
+        session,
+        product,
+        notification_task_id=task_id,
+    )
+    outbox_relay.notify()
 
     # test: try and comment out `expire_on_commit=False`
     product_id = db_product.product_id
     logger.debug(f"Product created: {product_id}")
 
-    # send a notification email for product creation
-    result: AsyncResult = send_email.delay(product_id)
+    return db_product, task_id
+
+
+async def create_products(
+    session: AsyncSession,
+    products: Sequence[ProductCreate],
+) -> tuple[list[int], list[str]]:
+    """Create many products, and send their notification emails with one
+    task (queued in the outbox, in the same transaction).
+
+    Returns:
+        tuple[list[int], list[str]]: The product IDs, and the task ID of the
+        notification email of each product.
+    """
+    task_ids = [str(uuid.uuid4()) for _ in products]
+    product_ids = await product_repo.create_products(
+        session,
+        products,
+        notification_task_ids=task_ids,
+    )
+    outbox_relay.notify()
+    logger.debug(f"{len(product_ids)} products created")
 
-    return db_product, result.id
+    return product_ids, task_ids
 
 
 async def get_product(
     session: AsyncSession,
     product_id: int,
-) -> Product:
-    product = await product_repo.get_product(session, product_id)
+    include: frozenset[str] = frozenset(),
+    orders_limit: int = 20,
+) -> ProductDetailOutput:
+    """Get the details of a product.
+
+    Args:
+        session (AsyncSession): The session object.
+        product_id (int): The product ID (primary key).
+        include (frozenset[str], optional): Relationships to include, see
+        `PRODUCT_INCLUDES`. Nothing by default: only the product itself is
+        read (from the cache, or with one primary key query).
+        orders_limit (int, optional): The max. number of (latest) orders
+        to include.
 
-    if product is not None:
-        # test: load relationship (lazy loading in async)
-        orders = await product.awaitable_attrs.orders
-        logger.debug(f"Orders should be empty: {orders}")
+    Raises:
+        HTTPException: If the product doesn't exist, or for unknown includes.
+    """
+    unknown = include - PRODUCT_INCLUDES
+    if unknown:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Cannot include: {', '.join(sorted(unknown))}.",
+        )
+
+    product = await _get_product_output(session, product_id)
+    product_detail = ProductDetailOutput(**product.model_dump())
+
+    if "orders" in include:
+        orders = await product_repo.get_product_orders(
+            session, product_id, orders_limit
+        )
+        product_detail.orders = [OrderOutput.model_validate(o) for o in orders]
+
+    return product_detail
 
-        # you can NOT directly access orders
-        # without explicitly loading it first
-        # (try and comment out the above)
-        logger.debug(f"product.orders: {product.orders}")
-    else:
+
+async def _get_product_output(
+    session: AsyncSession,
+    product_id: int,
+) -> ProductOutput:
+    # read-through: the repository refreshes the cache on writes
+    cached_product = await product_repo.product_cache.get(str(product_id))
+    if cached_product is not None:
+        return cached_product
+
+    product = await product_repo.get_product(session, product_id)
+    if product is None:
         raise HTTPException(
             status_code=404,
             detail=f"Product #{product_id} not found!",
         )
 
-    return product
+    product_output = ProductOutput.model_validate(product)
+    await product_repo.product_cache.set(
+        str(product_id),
+        product_output,
+        ttl=replica_set.cache_ttl(session),
+    )
+
+    return product_output
 
 
 async def get_products(
@@ -73,15 +160,89 @@ async def get_products(
     )
 
 
+def export_products(
+    order_by: str,
+    direction: str,
+    format: Literal["ndjson", "csv"],
+    batch_size: int = PROJECT_SETTINGS.PRODUCT_EXPORT_BATCH_SIZE,
+) -> AsyncIterator[str]:
+    """Export all products as NDJSON or CSV (for a streaming response).
+
+    The sort is validated right away (HTTPException), the rows are only
+    read while the returned iterator is consumed, in chunks of `batch_size`
+    rows.
+    """
+    stmt = product_repo.build_products_export_statement(order_by, direction)
+    return _export_products(stmt, format, batch_size)
+
+
+async def _export_products(
+    stmt: Select[Any],
+    format: Literal["ndjson", "csv"],
+    batch_size: int,
+) -> AsyncIterator[str]:
+    # the session of the request is closed before a streaming response is
+    # sent, so the export uses its own
+    async with AsyncSessionMaker() as session:
+        fieldnames = list(ProductOutput.model_fields)
+        if format == "csv":
+            yield ",".join(fieldnames) + "\r\n"
+
+        async for rows in product_repo.stream_products(
+            session, stmt, batch_size
+        ):
+            products = [ProductOutput.model_validate(row) for row in rows]
+            if format == "ndjson":
+                yield "".join(p.model_dump_json() + "\n" for p in products)
+            else:
+                buffer = io.StringIO()
+                writer = csv.DictWriter(buffer, fieldnames=fieldnames)
+                writer.writerows(p.model_dump(mode="json") for p in products)
+                yield buffer.getvalue()
+
+
+async def get_products_by_cursor(
+    session: AsyncSession,
+    page_size: int,
+    order_by: str,
+    direction: str,
+    cursor: str | None = None,
+) -> ProductPage:
+    decoded_cursor = None
+    if cursor is not None:
+        try:
+            decoded_cursor = ProductCursor.decode(cursor)
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Invalid cursor.")
+
+    products, next_cursor, prev_cursor = (
+        await product_repo.get_products_by_cursor(
+            session,
+            page_size,
+            order_by,
+            direction,
+            decoded_cursor,
+        )
+    )
+
+    return ProductPage(
+        items=[ProductOutput.model_validate(p) for p in products],
+        next_cursor=next_cursor.encode() if next_cursor else None,
+        prev_cursor=prev_cursor.encode() if prev_cursor else None,
+    )
+
+
 async def update_product(
     session: AsyncSession,
     product_id: int,
     product_data: ProductUpdate,
+    expected_version: int | None = None,
 ) -> Product:
     return await product_repo.update_product(
         session,
         product_id,
         product_data,
+        expected_version,
     )
 
 
@@ -90,3 +251,10 @@ async def delete_product(
     product_id: int,
 ) -> None:
     await product_repo.delete_product(session, product_id)
+
+
+async def delete_products(
+    session: AsyncSession,
+    product_ids: Sequence[int],
+) -> list[int]:
+    return await product_repo.delete_products(session, product_ids)
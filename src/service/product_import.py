@@ -0,0 +1,190 @@
+"""
+Product imports from CSV or NDJSON uploads.
+
+The body is parsed line by line as it arrives, and rows are validated and
+written in batches, so an upload is never held in memory whatever its size.
+CSV values can't contain line breaks.
+"""
+
+import codecs
+import csv
+import json
+import logging
+from collections.abc import AsyncIterator
+from decimal import Decimal
+from typing import Any, Literal
+
+from pydantic import ValidationError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+import repository.product as product_repo
+from core.config import PROJECT_SETTINGS
+from model.product import normalize_product_name
+from schema.product import (
+    ProductCreate,
+    ProductImportError,
+    ProductImportSummary,
+)
+
+logger = logging.getLogger(__name__)
+
+# numeric(12, 2)
+MAX_UNIT_PRICE = Decimal(10) ** 10
+
+# (line number, the row or the reason it couldn't be parsed)
+ParsedRow = tuple[int, dict[str, Any] | str]
+
+
+async def iter_lines(chunks: AsyncIterator[bytes]) -> AsyncIterator[str]:
+    """Split a stream of UTF-8 bytes into lines."""
+    decoder = codecs.getincrementaldecoder("utf-8")()
+    pending = ""
+    async for chunk in chunks:
+        pending += decoder.decode(chunk)
+        *lines, pending = pending.split("\n")
+        for line in lines:
+            yield line.rstrip("\r")
+
+    pending += decoder.decode(b"", final=True)
+    if pending:
+        yield pending.rstrip("\r")
+
+
+async def iter_ndjson_rows(
+    lines: AsyncIterator[str],
+) -> AsyncIterator[ParsedRow]:
+    line_number = 0
+    async for line in lines:
+        line_number += 1
+        if not line.strip():
+            continue
+
+        try:
+            row = json.loads(line)
+        except json.JSONDecodeError as exc:
+            yield line_number, f"Invalid JSON: {exc.msg}."
+            continue
+        if not isinstance(row, dict):
+            yield line_number, "Expected a JSON object."
+            continue
+        yield line_number, row
+
+
+async def iter_csv_rows(
+    lines: AsyncIterator[str],
+) -> AsyncIterator[ParsedRow]:
+    header: list[str] | None = None
+    line_number = 0
+    async for line in lines:
+        line_number += 1
+        if not line.strip():
+            continue
+
+        values = next(csv.reader([line]))
+        if header is None:
+            header = [name.strip() for name in values]
+            continue
+        if len(values) != len(header):
+            yield line_number, (
+                f"Expected {len(header)} values, got {len(values)}."
+            )
+            continue
+
+        row: dict[str, Any] = {}
+        for name, value in zip(header, values):
+            if value == "":
+                continue  # use the default
+            if name == "type" and value.isdigit():
+                row[name] = int(value)  # product types are exported as numbers
+            else:
+                row[name] = value
+        yield line_number, row
+
+
+def validate_row(row: dict[str, Any]) -> ProductCreate | str:
+    """The product of a row, or why it's rejected."""
+    try:
+        product = ProductCreate.model_validate(row)
+    except ValidationError as exc:
+        return "; ".join(
+            f"{'.'.join(str(loc) for loc in error['loc'])}: {error['msg']}"
+            for error in exc.errors()
+        )
+
+    # the constraints of the product table, so that one bad row can't fail
+    # the whole batch
+    if not 0 < len(product.product_name) <= 255:
+        return "product_name: should have 1 to 255 characters"
+    if not 0 < product.unit_price < MAX_UNIT_PRICE:
+        return (
+            "unit_price: should be greater than 0 "
+            f"and less than {MAX_UNIT_PRICE}"
+        )
+    if product.units_in_stock < 0:
+        return "units_in_stock: should be greater than or equal to 0"
+    return product
+
+
+async def import_products(
+    session: AsyncSession,
+    chunks: AsyncIterator[bytes],
+    format: Literal["ndjson", "csv"],
+    batch_size: int = PROJECT_SETTINGS.PRODUCT_IMPORT_BATCH_SIZE,
+    max_errors: int = PROJECT_SETTINGS.PRODUCT_IMPORT_MAX_ERRORS,
+) -> ProductImportSummary:
+    """Import (upsert by name) the products of an upload.
+
+    Each batch of `batch_size` valid rows is written in its own transaction;
+    if a name appears more than once in a batch, the last row wins. Invalid
+    rows are skipped and reported in the summary.
+
+    Args:
+        session (AsyncSession): The session object.
+        chunks (AsyncIterator[bytes]): The body of the upload.
+        format (str): "ndjson" (one JSON product per line) or "csv" (with a
+        header row).
+        batch_size (int, optional): Rows per batch.
+        max_errors (int, optional): Max. number of errors in the summary.
+
+    Returns:
+        ProductImportSummary: Row counts, and the first errors.
+    """
+    iter_rows = iter_csv_rows if format == "csv" else iter_ndjson_rows
+    summary = ProductImportSummary()
+    batch: dict[str, ProductCreate] = {}
+
+    async def write_batch() -> None:
+        created, updated = await product_repo.import_products(
+            session, list(batch.values())
+        )
+        summary.created += created
+        summary.updated += updated
+        batch.clear()
+        logger.info(
+            f"Product import: {summary.rows} rows read, "
+            f"{summary.created} created, {summary.updated} updated, "
+            f"{summary.failed} failed"
+        )
+
+    async for line_number, row in iter_rows(iter_lines(chunks)):
+        summary.rows += 1
+        product = row if isinstance(row, str) else validate_row(row)
+        if isinstance(product, str):
+            summary.failed += 1
+            if len(summary.errors) < max_errors:
+                summary.errors.append(
+                    ProductImportError(line=line_number, error=product)
+                )
+            continue
+
+        # re-inserting moves the name to the end (last row wins)
+        name = normalize_product_name(product.product_name)
+        batch.pop(name, None)
+        batch[name] = product
+        if len(batch) >= batch_size:
+            await write_batch()
+
+    if batch:
+        await write_batch()
+
+    return summary
@@ -0,0 +1,86 @@
+import uuid
+from collections.abc import Sequence
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+import repository.email as email_repo
+from core.cache import RedisCache, TieredCache
+from core.config import PROJECT_SETTINGS
+from model.email import SystemEmail
+from schema.task import TaskState, TaskStatus
+
+# task ID -> status; a short TTL, statuses aren't refreshed when they change
+task_status_cache = TieredCache(
+    TaskStatus,
+    max_size=PROJECT_SETTINGS.TASK_STATUS_CACHE_MAX_SIZE,
+    ttl=PROJECT_SETTINGS.TASK_STATUS_CACHE_TTL_SECONDS,
+    redis=(
+        RedisCache(str(PROJECT_SETTINGS.CACHE_REDIS_URL), prefix="task")
+        if PROJECT_SETTINGS.TASK_STATUS_CACHE_REDIS
+        else None
+    ),
+)
+
+
+def make_task_status(
+    task_id: uuid.UUID,
+    system_email: SystemEmail | None,
+) -> TaskStatus:
+    if system_email is None:
+        return TaskStatus(task_id=task_id, state=TaskState.PENDING)
+    return TaskStatus(
+        task_id=task_id,
+        state=TaskState.SENT if system_email.is_sent else TaskState.RETRYING,
+        target_id=system_email.target_id,
+    )
+
+
+async def get_task_statuses(
+    session: AsyncSession,
+    task_ids: Sequence[uuid.UUID],
+) -> list[TaskStatus]:
+    """Get the status of the notification tasks (product creation emails).
+    Cached statuses are used first, the others are read in one query.
+
+    Args:
+        session (AsyncSession): The session object, used on cache misses.
+        task_ids (Sequence[uuid.UUID]): The task IDs.
+
+    Returns:
+        list[TaskStatus]: The statuses, in the order of `task_ids`.
+    """
+    statuses: dict[uuid.UUID, TaskStatus] = {}
+    for task_id in task_ids:
+        if task_id not in statuses:
+            status = await task_status_cache.get(str(task_id))
+            if status is not None:
+                statuses[task_id] = status
+
+    missing = list(
+        dict.fromkeys(
+            task_id for task_id in task_ids if task_id not in statuses
+        )
+    )
+    if missing:
+        system_emails = {
+            str(system_email.task_id): system_email
+            for system_email in await email_repo.get_system_emails(
+                session, missing
+            )
+        }
+        for task_id in missing:
+            status = make_task_status(
+                task_id, system_emails.get(str(task_id))
+            )
+            statuses[task_id] = status
+            await task_status_cache.set(str(task_id), status)
+
+    return [statuses[task_id] for task_id in task_ids]
+
+
+async def get_task_status(
+    session: AsyncSession,
+    task_id: uuid.UUID,
+) -> TaskStatus:
+    (status,) = await get_task_statuses(session, [task_id])
+    return status
@@ -0,0 +1,12 @@
+"""
+The Celery app, without the tasks: publishing a task by name
+(`celery_app.send_task`, see `task_queue.dispatch.TaskRef`) doesn't need the
+task module, nor its synchronous (psycopg2) engine.
+"""
+
+from celery import Celery
+
+from .config import Config
+
+celery_app = Celery("tasks", include=["task_queue.tasks"])
+celery_app.config_from_object(Config)
@@ -28,6 +28,18 @@ class Config:
     task_default_exchange_type = "direct"
     task_default_routing_key = "default"
 
+    # periodic tasks, run `celery beat` (or a worker with `-B`)
+    beat_schedule = {
+        "resend-unsent-emails": {
+            "task": "task_queue.tasks.resend_unsent_emails",
+            "schedule": PROJECT_SETTINGS.SYSTEM_EMAIL_SWEEP_INTERVAL_SECONDS,
+        },
+        "maintain-partitions": {
+            "task": "task_queue.tasks.maintain_partitions",
+            "schedule": 24 * 60 * 60,
+        },
+    }
+
 
 class BaseTask(Task):  # pragma: no cover
     autoretry_for = (Exception,)
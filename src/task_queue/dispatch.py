@@ -0,0 +1,67 @@
+"""
+Publishing Celery tasks from async code.
+
+`Task.delay` is a blocking call to the broker (plus connection setup the
+first time), so it's never called in an endpoint: tasks are written to the
+outbox (see `task_queue.outbox`), whose relay sends them in batches with
+`send_tasks`, in a thread, over one producer connection.
+"""
+
+from collections.abc import Sequence
+from dataclasses import dataclass
+from typing import Any
+
+
+class TaskRef:
+    """
+    A Celery task by name, published with `send_task`: the Celery app is
+    imported on first use, and the task module never is (the web process
+    doesn't need Celery until it publishes, nor psycopg2 at all).
+
+    Pass the publishing options of the task decorator (e.g. `compression`),
+    they aren't known without the task. `ignore_result` defaults to True,
+    like the tasks of this app: otherwise `send_task` subscribes to the
+    result of every task (Redis pubsub), and nothing ever unsubscribes.
+    """
+
+    def __init__(self, name: str, **options: Any) -> None:
+        self.name = name
+        self.options = {"ignore_result": True, **options}
+
+    @property
+    def app(self) -> Any:
+        from task_queue.app import celery_app
+
+        return celery_app
+
+    def apply_async(
+        self,
+        args: tuple[Any, ...],
+        task_id: str,
+        producer: Any = None,
+    ) -> Any:
+        return self.app.send_task(
+            self.name,
+            args,
+            task_id=task_id,
+            producer=producer,
+            **self.options,
+        )
+
+
+@dataclass(frozen=True)
+class PendingTask:
+    task: Any  # a Celery task, or a `TaskRef`
+    args: tuple[Any, ...]
+    task_id: str
+
+
+def send_tasks(batch: Sequence[PendingTask]) -> None:
+    """Send tasks to the broker, over one producer (connection); blocking."""
+    with batch[0].task.app.producer_or_acquire() as producer:
+        for pending in batch:
+            pending.task.apply_async(
+                pending.args,
+                task_id=pending.task_id,
+                producer=producer,
+            )
@@ -0,0 +1,119 @@
+"""
+The notification email jobs, shared by the Celery tasks and the asyncio
+worker. They take a synchronous session: the asyncio worker runs them with
+`AsyncSession.run_sync`.
+
+Each job writes its system emails once, after sending them: one upsert
+(and one commit) for any number of emails, which also makes retries safe.
+"""
+
+import datetime
+from collections.abc import Sequence
+
+from sqlalchemy.orm import Session
+
+import repository.email as repo_email
+from core.config import PROJECT_SETTINGS
+from model.email import NotificationType, SystemEmail
+
+
+def send_product_emails(product_ids: Sequence[int]) -> None:
+    """Send the product creation emails."""
+    # TODO send the emails, query for current product info to construct them
+
+
+def send_and_record_product_emails(
+    session: Session,
+    targets: Sequence[tuple[str, int]],
+) -> list[SystemEmail]:
+    """Send the emails, then record them as sent. If sending fails, they're
+    recorded as not sent, and the error is raised.
+
+    Args:
+        session (Session): The synchronous session object.
+        targets (Sequence[tuple[str, int]]): (email task UUID, product ID)
+        pairs.
+
+    Returns:
+        list[SystemEmail]: The system emails, in the order of `targets`.
+    """
+    try:
+        send_product_emails([product_id for _, product_id in targets])
+    except Exception:
+        repo_email.upsert_system_emails(
+            session, targets, type=NotificationType.PRODUCT, is_sent=False
+        )
+        raise
+
+    return repo_email.upsert_system_emails(
+        session, targets, type=NotificationType.PRODUCT, is_sent=True
+    )
+
+
+def create_and_send_system_email(
+    session: Session,
+    task_id: str,
+    product_id: int,
+) -> SystemEmail:
+    """Create system email for the product, send it, and update its status.
+
+    Args:
+        session (Session): The synchronous session object.
+        task_id (str): Celery task UUID.
+        product_id (int): PK of target product.
+
+    Returns:
+        SystemEmail: The system email object created.
+    """
+    (system_email,) = send_and_record_product_emails(
+        session, [(task_id, product_id)]
+    )
+    return system_email
+
+
+def create_and_send_system_emails(
+    session: Session,
+    notifications: Sequence[tuple[int, str]],
+) -> list[str]:
+    """Create the system emails of many products, send them, and update their
+    status, with one statement.
+
+    Args:
+        session (Session): The synchronous session object.
+        notifications (Sequence[tuple[int, str]]): (product ID, email task
+        UUID) pairs.
+
+    Returns:
+        list[str]: The task UUIDs of the emails.
+    """
+    send_and_record_product_emails(
+        session,
+        [(task_id, product_id) for product_id, task_id in notifications],
+    )
+    return [task_id for _, task_id in notifications]
+
+
+def get_unsent_product_emails(session: Session) -> list[tuple[int, str]]:
+    """The product emails to retry (see the `SYSTEM_EMAIL_SWEEP_*` settings),
+    oldest first; the attempt is recorded, so the next sweeps skip them until
+    the retry interval has passed.
+
+    Returns:
+        list[tuple[int, str]]: (product ID, email task UUID) pairs.
+    """
+    system_emails = repo_email.get_unsent_system_emails(
+        session,
+        type=NotificationType.PRODUCT,
+        min_age=datetime.timedelta(
+            seconds=PROJECT_SETTINGS.SYSTEM_EMAIL_SWEEP_MIN_AGE_SECONDS
+        ),
+        max_age=datetime.timedelta(
+            seconds=PROJECT_SETTINGS.SYSTEM_EMAIL_SWEEP_MAX_AGE_SECONDS
+        ),
+        retry_interval=datetime.timedelta(
+            seconds=PROJECT_SETTINGS.SYSTEM_EMAIL_SWEEP_RETRY_INTERVAL_SECONDS
+        ),
+        max_attempts=PROJECT_SETTINGS.SYSTEM_EMAIL_SWEEP_MAX_ATTEMPTS,
+        limit=PROJECT_SETTINGS.SYSTEM_EMAIL_SWEEP_BATCH_SIZE,
+    )
+    return [(email.target_id, str(email.task_id)) for email in system_emails]
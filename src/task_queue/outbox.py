@@ -0,0 +1,134 @@
+"""
+The outbox relay: publishes the tasks of the outbox table (see
+`repository.outbox`) to the broker, in batches.
+
+Each batch is locked with `SELECT ... FOR UPDATE SKIP LOCKED`, published,
+then deleted in the same transaction. If publishing fails, the transaction
+is rolled back and the messages are retried with the next batch; a message
+can be published twice (if the delete fails), never lost.
+"""
+
+import asyncio
+import logging
+from collections.abc import Mapping
+from typing import Any
+
+import repository.outbox as outbox_repo
+from core.config import PROJECT_SETTINGS
+from model import AsyncSessionMaker
+from task_queue.dispatch import PendingTask, TaskRef, send_tasks
+
+logger = logging.getLogger(__name__)
+
+# the tasks of the outbox, by name (with the options of their decorators in
+# `task_queue.tasks`)
+OUTBOX_TASKS: dict[str, TaskRef] = {
+    name: TaskRef(name, compression="gzip")
+    for name in (outbox_repo.SEND_EMAIL_TASK, outbox_repo.SEND_EMAILS_TASK)
+}
+
+
+class OutboxRelay:
+    def __init__(
+        self,
+        batch_size: int,
+        interval: float,
+        tasks: Mapping[str, Any] | None = None,
+    ) -> None:
+        self.batch_size = batch_size
+        self.interval = interval  # seconds between polls when idle
+
+        self.tasks = OUTBOX_TASKS if tasks is None else tasks
+        self._runner: asyncio.Task[None] | None = None
+        self._wakeup: asyncio.Event | None = None
+        self._stopping = False
+        self.relayed = 0
+
+    async def relay_once(self) -> int:
+        """Publish (and delete) one batch of messages.
+
+        Returns:
+            int: The number of messages handled.
+        """
+        async with AsyncSessionMaker() as session:
+            messages = await outbox_repo.lock_pending_messages(
+                session, self.batch_size
+            )
+            if not messages:
+                return 0
+
+            batch = []
+            for message in messages:
+                task = self.tasks.get(message.task_name)
+                if task is None:
+                    # would block the outbox forever, drop it
+                    logger.error(f"Unknown task in the outbox: {message}")
+                    continue
+                batch.append(
+                    PendingTask(task, tuple(message.args), message.task_id)
+                )
+
+            if batch:
+                await asyncio.to_thread(send_tasks, batch)
+            await outbox_repo.delete_messages(
+                session, [message.outbox_id for message in messages]
+            )
+
+        self.relayed += len(messages)
+        return len(messages)
+
+    async def relay_pending(self) -> None:
+        """Relay messages until the outbox is empty."""
+        while await self.relay_once() == self.batch_size:
+            pass
+
+    def notify(self) -> None:
+        """Wake the relay up (new messages), instead of waiting for the next
+        poll."""
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    def start(self) -> None:
+        self._stopping = False
+        self._wakeup = asyncio.Event()
+        self._runner = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Stop the relay, after relaying the remaining messages."""
+        if self._runner is not None:
+            # not `cancel`: the batch being published (in a thread) would
+            # be unlocked while still being sent, then sent again below
+            self._stopping = True
+            self.notify()
+            await self._runner
+            self._runner = None
+        self._wakeup = None
+        try:
+            await self.relay_pending()
+        except Exception:
+            logger.exception("Failed to relay the outbox at shutdown")
+
+    async def _run(self) -> None:
+        assert self._wakeup is not None
+        while not self._stopping:
+            try:
+                relayed = await self.relay_once()
+            except Exception:
+                logger.exception("Failed to relay the outbox")
+                relayed = 0
+
+            if relayed < self.batch_size and not self._stopping:
+                # caught up: wait for new messages
+                try:
+                    await asyncio.wait_for(
+                        self._wakeup.wait(), timeout=self.interval
+                    )
+                except TimeoutError:
+                    pass
+                self._wakeup.clear()
+
+
+outbox_relay = OutboxRelay(
+    batch_size=PROJECT_SETTINGS.OUTBOX_RELAY_BATCH_SIZE,
+    interval=PROJECT_SETTINGS.OUTBOX_RELAY_INTERVAL_SECONDS,
+)
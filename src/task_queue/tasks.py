@@ -7,59 +7,39 @@ ones. This is just for demonstrating the use of Celery, and is NOT the best
 solution.
 """
 
-from celery import Celery, Task
+from celery import Task
 from celery.utils.log import get_task_logger
 from sqlalchemy import create_engine
-from sqlalchemy.orm import Session, sessionmaker
+from sqlalchemy.orm import sessionmaker
 
-import repository.email as repo_email
 from core.config import PROJECT_SETTINGS
-from model.email import NotificationType, SystemEmail
-
-from .config import Config
+from model import sql_logger
+from model.partitions import maintain_system_email_partitions
+
+from .app import celery_app
+from .emails import (
+    create_and_send_system_email,
+    create_and_send_system_emails,
+    get_unsent_product_emails,
+)
 
 # Celery doesn't work with async, so we need to use a synchronous session
 engine = create_engine(
     str(PROJECT_SETTINGS.SQLALCHEMY_DATABASE_URL_SYNC),
+    pool_size=PROJECT_SETTINGS.DB_POOL_SIZE,
+    max_overflow=PROJECT_SETTINGS.DB_MAX_OVERFLOW,
+    pool_timeout=PROJECT_SETTINGS.DB_POOL_TIMEOUT,
+    pool_recycle=PROJECT_SETTINGS.DB_POOL_RECYCLE,
+    pool_pre_ping=PROJECT_SETTINGS.DB_POOL_PRE_PING,
 )
+sql_logger.install(engine)
 SessionMaker = sessionmaker(
     bind=engine,
+    expire_on_commit=False,  # like `AsyncSessionMaker`
 )
 
 logger = get_task_logger(__name__)
 
-# Celery app
-celery_app = Celery("tasks")
-celery_app.config_from_object(Config)
-
-
-def create_and_send_system_email(
-    session: Session,
-    task_id: str,
-    product_id: int,
-) -> SystemEmail:
-    """Create system email for the product, send it, and update its status.
-
-    Args:
-        session (Session): The synchronous session object.
-        task_id (str): Celery task UUID.
-        product_id (int): PK of target product.
-
-    Returns:
-        SystemEmail: The system email object created.
-    """
-    repo_email.create_system_email(
-        session,
-        task_id=task_id,
-        target_id=product_id,
-        type=NotificationType.PRODUCT,
-    )
-    # TODO send email, query for current product info to construct it
-    system_email = repo_email.update_system_email_status(
-        session, task_id, status=True
-    )
-    return system_email
-
 
 @celery_app.task(
     bind=True,
@@ -102,3 +82,76 @@ def send_email(self: Task, product_id: int) -> str:
         raise self.retry(exc=exc)
     finally:
         session.close()
+
+
+@celery_app.task(
+    bind=True,
+    queue="default",
+    ignore_result=True,
+    track_started=True,
+    max_retries=3,
+    retry_backoff=3 * 60,
+    compression="gzip",
+)
+def send_emails(self: Task, notifications: list[tuple[int, str]]) -> list[str]:
+    """
+    Task to send the product creation emails of a bulk creation; one task
+    instead of one for each product.
+
+    Args:
+        self (Task): task
+        notifications (list[tuple[int, str]]): (product ID, email task UUID)
+        pairs; the UUIDs are generated by the caller, so each product has its
+        own ID to look its email up with.
+    """
+    session = SessionMaker()
+    try:
+        logger.debug(
+            f"Executing task #{self.request.id}: "
+            f"Sending {len(notifications)} product creation emails..."
+        )
+        return create_and_send_system_emails(session, notifications)
+    except Exception as exc:
+        logger.debug(
+            f"An exception occurred while sending emails "
+            f"for task#{self.request.id}!"
+        )
+        raise self.retry(exc=exc)
+    finally:
+        session.close()
+
+
+@celery_app.task(queue="default", ignore_result=True)
+def resend_unsent_emails() -> int:
+    """
+    Periodic task (Celery beat) to re-enqueue the product emails that
+    couldn't be sent, oldest first, at most a batch at a time (one
+    `send_emails` task).
+
+    The unsent emails are found with a partial index, so this doesn't depend
+    on Celery's retry state, or slow down as the table grows.
+
+    Returns:
+        int: The number of emails re-enqueued.
+    """
+    with SessionMaker() as session:
+        notifications = get_unsent_product_emails(session)
+
+    if notifications:
+        logger.info(f"Re-enqueueing {len(notifications)} unsent emails")
+        send_emails.delay(notifications)
+    return len(notifications)
+
+
+@celery_app.task(queue="default", ignore_result=True)
+def maintain_partitions() -> dict[str, list[str]]:
+    """
+    Periodic task (Celery beat) to create the next monthly partitions of
+    `system_email`, and remove the expired ones (see `model.partitions`).
+
+    Returns:
+        dict: The names of the partitions created and removed.
+    """
+    with engine.begin() as connection:
+        changes = maintain_system_email_partitions(connection)
+    return {"created": changes.created, "removed": changes.removed}
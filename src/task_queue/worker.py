@@ -0,0 +1,389 @@
+"""
+An asyncio worker for the notification tasks, an alternative to the Celery
+worker: it consumes the same queue (the Redis list of the "default" queue),
+runs the jobs on the async engine (`AsyncSessionMaker`, no psycopg2 engine),
+and runs many of them at once in one process.
+
+    python -m task_queue.worker --concurrency 50 --batch-size 100
+
+Messages are taken from the queue in batches (up to `--batch-size`, when
+that many are waiting), and the send_email messages of a batch are handled
+together: one upsert of their system emails instead of one job each.
+
+Unlike Celery, messages are removed from the queue when they're received
+(at most once delivery); failed jobs are retried in the worker a few times,
+then logged. Don't run both workers if that matters. Messages that can't be
+decoded are logged and counted as failed; broker errors (e.g. Redis going
+away) are retried, with a growing delay.
+"""
+
+import argparse
+import asyncio
+import base64
+import json
+import logging
+import math
+import signal
+import zlib
+from collections.abc import Awaitable, Callable, Mapping, Sequence
+from functools import partial
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Any, Protocol
+
+import repository.outbox as outbox_repo
+from core.config import PROJECT_SETTINGS, initialize_settings
+from model import AsyncSessionMaker, engine
+from model.partitions import maintain_system_email_partitions
+from task_queue.emails import (
+    create_and_send_system_email,
+    create_and_send_system_emails,
+    get_unsent_product_emails,
+)
+
+if TYPE_CHECKING:
+    from redis.asyncio import Redis
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class TaskMessage:
+    task_name: str
+    task_id: str
+    args: list[Any]
+    kwargs: dict[str, Any] = field(default_factory=dict)
+
+
+# a message as received: encoded (decoded by the worker, one at a time) or
+# already decoded
+RawMessage = bytes | TaskMessage
+
+# max. delay between retries of a failing broker, in seconds
+MAX_BROKER_RETRY_DELAY = 30.0
+
+
+class Broker(Protocol):
+    async def get_batch(
+        self, max_count: int, timeout: float
+    ) -> list[RawMessage]:
+        """Up to `max_count` messages: waits up to `timeout` seconds for the
+        first one (returns [] after that), the others only if they're already
+        queued."""
+        ...
+
+
+def decode_message(raw: bytes | str) -> TaskMessage:
+    """Decode a Celery (kombu) message as stored in a Redis list.
+
+    The envelope is JSON; the body is base64 encoded, possibly compressed
+    (kombu's "gzip" is zlib), and holds `[args, kwargs, embed]` (task
+    protocol 2).
+    """
+    envelope = json.loads(raw)
+    headers = envelope["headers"]
+    if envelope["properties"].get("body_encoding") == "base64":
+        body = base64.b64decode(envelope["body"])
+    else:
+        body = str(envelope["body"]).encode()
+    if headers.get("compression") in ("application/x-gzip", "zlib"):
+        body = zlib.decompress(body)
+
+    args, kwargs, _ = json.loads(body)
+    return TaskMessage(
+        task_name=headers["task"],
+        task_id=headers["id"],
+        args=args,
+        kwargs=kwargs,
+    )
+
+
+class RedisBroker:
+    """Reads the messages of a Celery queue from Redis."""
+
+    def __init__(self, url: str, queue: str) -> None:
+        self.url = url
+        self.queue = queue
+        self._client: Redis | None = None
+
+    @property
+    def client(self) -> "Redis":
+        if self._client is None:
+            from redis.asyncio import Redis
+
+            self._client = Redis.from_url(self.url)
+        return self._client
+
+    async def get_batch(
+        self, max_count: int, timeout: float
+    ) -> list[RawMessage]:
+        # kombu pushes to the head of the list, consumers pop the tail
+        item = await self.client.brpop(  # type: ignore[misc]
+            [self.queue], timeout=math.ceil(timeout)
+        )
+        if item is None:
+            return []
+
+        raw_messages: list[RawMessage] = [item[1]]
+        if max_count > 1:
+            try:
+                # RPOP with a count (Redis >= 6.2), doesn't block
+                raw_messages += (
+                    await self.client.rpop(  # type: ignore[misc]
+                        self.queue, max_count - 1
+                    )
+                    or []
+                )
+            except Exception:
+                # the message popped already would be lost
+                logger.exception("Failed to pop more messages")
+        return raw_messages
+
+
+class InMemoryBroker:
+    """A broker stand-in, for tests and benchmarks."""
+
+    def __init__(self) -> None:
+        self.queue: asyncio.Queue[RawMessage] = asyncio.Queue()
+
+    def put(self, message: RawMessage) -> None:
+        self.queue.put_nowait(message)
+
+    async def get_batch(
+        self, max_count: int, timeout: float
+    ) -> list[RawMessage]:
+        try:
+            messages = [await asyncio.wait_for(self.queue.get(), timeout)]
+        except TimeoutError:
+            return []
+        while len(messages) < max_count and not self.queue.empty():
+            messages.append(self.queue.get_nowait())
+        return messages
+
+
+# (task ID, *args) -> None
+Handler = Callable[..., Awaitable[None]]
+# handles all the messages of a task in a batch at once
+BatchHandler = Callable[[Sequence[TaskMessage]], Awaitable[None]]
+
+
+async def handle_send_email(task_id: str, product_id: int) -> None:
+    async with AsyncSessionMaker() as session:
+        await session.run_sync(
+            create_and_send_system_email, task_id, product_id
+        )
+
+
+async def handle_send_emails(
+    task_id: str,
+    notifications: list[tuple[int, str]],
+) -> None:
+    async with AsyncSessionMaker() as session:
+        await session.run_sync(create_and_send_system_emails, notifications)
+
+
+async def handle_send_email_batch(messages: Sequence[TaskMessage]) -> None:
+    # a message can be delivered twice (at least once delivery), even in
+    # the same batch: one email per task
+    by_task_id = {message.task_id: message for message in messages}
+    notifications = [
+        (message.args[0], message.task_id) for message in by_task_id.values()
+    ]
+    async with AsyncSessionMaker() as session:
+        await session.run_sync(create_and_send_system_emails, notifications)
+
+
+async def handle_resend_unsent_emails(task_id: str) -> None:
+    # the periodic sweep (Celery beat): the emails are sent right away
+    # instead of being re-enqueued
+    async with AsyncSessionMaker() as session:
+        notifications = await session.run_sync(get_unsent_product_emails)
+        if notifications:
+            await session.run_sync(
+                create_and_send_system_emails, notifications
+            )
+
+
+async def handle_maintain_partitions(task_id: str) -> None:
+    async with engine.begin() as conn:
+        await conn.run_sync(maintain_system_email_partitions)
+
+
+# the periodic tasks (Celery beat)
+RESEND_UNSENT_EMAILS_TASK = "task_queue.tasks.resend_unsent_emails"
+MAINTAIN_PARTITIONS_TASK = "task_queue.tasks.maintain_partitions"
+
+HANDLERS: dict[str, Handler] = {
+    outbox_repo.SEND_EMAIL_TASK: handle_send_email,
+    outbox_repo.SEND_EMAILS_TASK: handle_send_emails,
+    RESEND_UNSENT_EMAILS_TASK: handle_resend_unsent_emails,
+    MAINTAIN_PARTITIONS_TASK: handle_maintain_partitions,
+}
+BATCH_HANDLERS: dict[str, BatchHandler] = {
+    outbox_repo.SEND_EMAIL_TASK: handle_send_email_batch,
+}
+
+
+class AsyncWorker:
+    def __init__(
+        self,
+        broker: Broker,
+        concurrency: int,
+        handlers: Mapping[str, Handler] = HANDLERS,
+        batch_handlers: Mapping[str, BatchHandler] = BATCH_HANDLERS,
+        batch_size: int = 1,
+        max_retries: int = 3,
+        retry_delay: float = 1.0,
+    ) -> None:
+        self.broker = broker
+        self.concurrency = concurrency  # batches handled at the same time
+        self.handlers = handlers
+        self.batch_handlers = batch_handlers
+        self.batch_size = batch_size
+        self.max_retries = max_retries
+        self.retry_delay = retry_delay  # doubled after each retry
+
+        # counted by message
+        self.succeeded = 0
+        self.failed = 0
+        self._jobs: set[asyncio.Task[None]] = set()
+
+    async def run(self, stop: asyncio.Event) -> None:
+        """Consume messages until `stop` is set, then wait for the running
+        jobs."""
+        slots = asyncio.Semaphore(self.concurrency)
+        broker_delay = self.retry_delay
+        while not stop.is_set():
+            # only take messages when a job can start right away
+            await slots.acquire()
+            try:
+                raw_messages = await self.broker.get_batch(
+                    self.batch_size, timeout=1.0
+                )
+            except Exception:
+                slots.release()
+                logger.exception(
+                    f"Failed to get messages, retrying in {broker_delay}s"
+                )
+                await asyncio.sleep(broker_delay)
+                broker_delay = min(broker_delay * 2, MAX_BROKER_RETRY_DELAY)
+                continue
+            broker_delay = self.retry_delay
+
+            messages = self._decode(raw_messages)
+            if not messages:
+                slots.release()
+                continue
+
+            job = asyncio.create_task(self._handle_batch(messages))
+            self._jobs.add(job)
+            job.add_done_callback(self._jobs.discard)
+            job.add_done_callback(lambda _: slots.release())
+
+        if self._jobs:
+            await asyncio.wait(self._jobs)
+
+    def _decode(self, raw_messages: Sequence[RawMessage]) -> list[TaskMessage]:
+        """Decode the messages one by one: the others are kept if one can't
+        be decoded (e.g. a message of another app)."""
+        messages = []
+        for raw in raw_messages:
+            if isinstance(raw, TaskMessage):
+                messages.append(raw)
+                continue
+            try:
+                messages.append(decode_message(raw))
+            except Exception:
+                logger.exception(
+                    f"Can't decode message, dropped: {raw[:200]!r}"
+                )
+                self.failed += 1
+        return messages
+
+    async def _handle_batch(self, messages: Sequence[TaskMessage]) -> None:
+        by_task: dict[str, list[TaskMessage]] = {}
+        for message in messages:
+            by_task.setdefault(message.task_name, []).append(message)
+
+        jobs = []
+        for task_name, task_messages in by_task.items():
+            batch_handler = self.batch_handlers.get(task_name)
+            if batch_handler is not None:
+                jobs.append(
+                    self._run(
+                        f"{len(task_messages)} tasks ({task_name})",
+                        len(task_messages),
+                        partial(batch_handler, task_messages),
+                    )
+                )
+            else:
+                jobs.extend(self._handle(message) for message in task_messages)
+        await asyncio.gather(*jobs)
+
+    async def _handle(self, message: TaskMessage) -> None:
+        handler = self.handlers.get(message.task_name)
+        if handler is None:
+            logger.error(f"No handler for task {message.task_name}, dropped")
+            self.failed += 1
+            return
+
+        await self._run(
+            f"Task #{message.task_id} ({message.task_name})",
+            1,
+            partial(handler, message.task_id, *message.args, **message.kwargs),
+        )
+
+    async def _run(
+        self,
+        name: str,
+        count: int,
+        job: Callable[[], Awaitable[None]],
+    ) -> None:
+        """Run the job of `count` messages, with retries."""
+        delay = self.retry_delay
+        for attempt in range(self.max_retries + 1):
+            try:
+                await job()
+                self.succeeded += count
+                return
+            except Exception:
+                logger.exception(f"{name} failed, attempt {attempt + 1}")
+                if attempt < self.max_retries:
+                    await asyncio.sleep(delay)
+                    delay *= 2
+        self.failed += count
+
+
+async def main(concurrency: int, batch_size: int) -> None:
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, stop.set)
+
+    broker = RedisBroker(str(PROJECT_SETTINGS.CELERY_BROKER_URL), "default")
+    worker = AsyncWorker(broker, concurrency, batch_size=batch_size)
+    logger.info(
+        f"Async worker started (concurrency: {concurrency}, "
+        f"batch size: {batch_size})"
+    )
+    await worker.run(stop)
+    logger.info(
+        f"Async worker stopped: {worker.succeeded} succeeded, "
+        f"{worker.failed} failed"
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=PROJECT_SETTINGS.ASYNC_WORKER_CONCURRENCY,
+    )
+    parser.add_argument(
+        "--batch-size",
+        type=int,
+        default=PROJECT_SETTINGS.ASYNC_WORKER_BATCH_SIZE,
+    )
+    args = parser.parse_args()
+    initialize_settings()
+    asyncio.run(main(args.concurrency, args.batch_size))
@@ -1,18 +1,18 @@
 from datetime import timedelta
-from typing import Annotated, Any
+from typing import Annotated
 
 from fastapi import APIRouter, Depends, HTTPException
 from fastapi.security import OAuth2PasswordRequestForm
-from jose import jwt
 from starlette import status
 
 import service.auth as auth_service
 from core.auth import create_access_token
 from core.config import PROJECT_SETTINGS
-from core.dependency import AsyncSessionDep, CurrentUserDep, TokenDep
+from core.dependency import AsyncSessionDep, ClaimsDep, CurrentUserDep
 from model.employee import Employee
-from schema.employee import EmployeeBase
+from schema.employee import EmployeeBase, EmployeePrincipal
 from schema.token import Token
+from schema.user import User
 
 router = APIRouter()
 
@@ -63,35 +63,32 @@ async def login(
 @router.get("/employee-info", response_model=EmployeeBase)
 async def get_employee_info(
     employee: CurrentUserDep,
-) -> Employee:
-    """For a logged in user with a JWT token, query the database
-    for employee info.
+) -> EmployeePrincipal:
+    """For a logged in user with a JWT token, get the employee info
+    (cached, see `service.auth.get_principal`).
 
     Args:
-        employee (Annotated[Employee, Depends): The target SQLAlchemy
-        employee model.
+        employee (Annotated[EmployeePrincipal, Depends): The snapshot of the
+        logged in employee.
 
     Returns:
-        Employee (converted to EmployeeBase): The employee Pydantic model.
+        EmployeePrincipal (converted to EmployeeBase): The employee Pydantic
+        model.
     """
     return employee
 
 
 @router.get("/user-info")
 async def get_user_info(
-    token: TokenDep,
-) -> dict[str, Any]:
-    """Get user info by decoding the JWT token
+    claims: ClaimsDep,
+) -> User:
+    """Get user info from the claims of the JWT token
     (although probably not necessary).
 
     Args:
-        token (Annotated[str, Depends): The JWT token from the client.
+        claims (Annotated[User, Depends): The verified claims of the token.
 
     Returns:
-        dict: The decoded JWT token.
+        User: The decoded JWT token.
     """
-    return jwt.decode(
-        token,
-        PROJECT_SETTINGS.JWT_SECRET_KEY,
-        algorithms=[PROJECT_SETTINGS.JWT_ALGORITHM],
-    )
+    return claims
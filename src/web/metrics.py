@@ -0,0 +1,82 @@
+from dataclasses import asdict
+from typing import Any
+
+from fastapi import APIRouter, Depends
+
+from core.auth import token_claims_cache
+from core.dependency import check_logged_in_user_is_manager
+from core.hashing import password_hashing_executor
+from model import engine
+from model.pool import get_pool_stats, hold_times
+from model.replicas import replica_set
+from repository.product import product_cache
+from service.auth import principal_cache
+from service.task import task_status_cache
+
+router = APIRouter(dependencies=[Depends(check_logged_in_user_is_manager)])
+
+
+@router.get("/password-hashing")
+async def get_password_hashing_stats() -> dict[str, Any]:
+    """Metrics of the password hashing executor (bcrypt).
+    Only managers can access this endpoint.
+
+    Returns:
+        dict: Worker count, in-flight jobs and queue depth.
+    """
+    return asdict(password_hashing_executor.stats())
+
+
+@router.get("/caches")
+async def get_cache_stats() -> dict[str, dict[str, Any]]:
+    """Hit/miss counters and sizes of the in-process caches.
+    Only managers can access this endpoint.
+
+    Returns:
+        dict: The stats of each cache, by name.
+    """
+    return {
+        "jwt_claims": asdict(token_claims_cache.stats()),
+        "principals": asdict(principal_cache.stats()),
+        "products": asdict(product_cache.stats()),
+        "task_statuses": asdict(task_status_cache.stats()),
+    }
+
+
+@router.get("/db-pool")
+async def get_db_pool_stats() -> dict[str, Any]:
+    """Metrics of the database connection pool (of this worker process).
+    Only managers can access this endpoint.
+
+    Returns:
+        dict: Connections checked out and in, overflow, and a histogram of
+        the time taken to get a connection.
+    """
+    return asdict(get_pool_stats(engine))
+
+
+@router.get("/db-hold-times")
+async def get_db_hold_time_stats() -> dict[str, dict[str, float]]:
+    """How long each route keeps its database connections checked out.
+    Only managers can access this endpoint.
+
+    Returns:
+        dict: Checkouts, average and max. hold time (ms), by route ("-" for
+        background jobs).
+    """
+    return hold_times.stats()
+
+
+@router.get("/db-replicas")
+async def get_db_replica_stats() -> dict[str, Any]:
+    """Health of the read replicas, as of their last check.
+    Only managers can access this endpoint.
+
+    Returns:
+        dict: The state and replication lag of each replica, and the number
+        of read sessions that fell back to the primary.
+    """
+    return {
+        "replicas": [asdict(stats) for stats in replica_set.stats()],
+        "primary_reads": replica_set.primary_reads,
+    }
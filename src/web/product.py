@@ -1,19 +1,65 @@
 from collections.abc import Sequence
-from typing import Any
+from typing import Annotated, Any, Literal
 
-from fastapi import APIRouter, Depends
+from fastapi import (
+    APIRouter,
+    Body,
+    Depends,
+    Header,
+    HTTPException,
+    Query,
+    Request,
+    Response,
+)
+from fastapi.responses import StreamingResponse
 
 import service.product as product_service
+import service.product_import as product_import_service
+from core.config import PROJECT_SETTINGS
 from core.dependency import (
     AsyncSessionDep,
+    ReadSessionDep,
     check_logged_in_user_is_manager,
-    oauth2_scheme,
+    get_token_claims,
 )
+from model.pool import release_connection
 from model.product import Product
-from schema.product import ProductCreate, ProductOutput, ProductUpdate
+from schema.product import (
+    ProductCreate,
+    ProductDetailOutput,
+    ProductImportSummary,
+    ProductOutput,
+    ProductPage,
+    ProductSortField,
+    ProductUpdate,
+)
 
 router = APIRouter()
 
+EXPORT_MEDIA_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv",
+}
+
+
+def make_etag(version: int) -> str:
+    return f'"{version}"'
+
+
+def parse_if_match(if_match: str | None) -> int | None:
+    """The product version expected by an `If-Match` header (ETag of a
+    previous response), None if any version is fine."""
+    if if_match is None or if_match.strip() == "*":
+        return None
+
+    etag = if_match.strip().removeprefix("W/").strip('"')
+    if not etag.isdigit():
+        raise HTTPException(
+            status_code=400,
+            detail="Invalid If-Match header, use the ETag of the product.",
+        )
+    return int(etag)
+
 
 @router.post(
     "/",
@@ -44,34 +90,191 @@ async def create_product(
     }
 
 
+@router.post(
+    "/bulk",
+    dependencies=[Depends(check_logged_in_user_is_manager)],
+    status_code=201,
+)
+async def create_products(
+    products: Annotated[
+        list[ProductCreate],
+        Body(
+            min_length=1,
+            max_length=PROJECT_SETTINGS.PRODUCT_BULK_MAX_ITEMS,
+        ),
+    ],
+    session: AsyncSessionDep,
+) -> dict[str, list[Any]]:
+    """Create many products at once (one transaction).
+    Only managers can access this endpoint.
+
+    Args:
+        products (list[ProductCreate]): The product input models.
+        session (AsyncSessionDep): The injected session object.
+
+    Returns:
+        dict: The new product IDs, and the task ID of each product's
+        notification email (in the same order as the input).
+    """
+    product_ids, task_ids = await product_service.create_products(
+        session,
+        products,
+    )
+    return {
+        "product_ids": product_ids,
+        "task_ids": task_ids,
+    }
+
+
+@router.post(
+    "/import",
+    dependencies=[Depends(check_logged_in_user_is_manager)],
+)
+async def import_products(
+    request: Request,
+    session: AsyncSessionDep,
+    format: Literal["ndjson", "csv"] = "ndjson",
+) -> ProductImportSummary:
+    """Import products from an NDJSON or CSV upload (the request body).
+    Products are matched by name: existing ones are updated, the others are
+    created. The body is read as it arrives, and written in batches.
+    Only managers can access this endpoint.
+
+    Args:
+        request (Request): The request, for its body stream.
+        session (AsyncSessionDep): The injected session object.
+        format (str, optional): "ndjson" (one JSON product per line) or
+        "csv" (with a header row). Defaults to "ndjson".
+
+    Returns:
+        ProductImportSummary: Row counts, and the first row errors.
+    """
+    return await product_import_service.import_products(
+        session,
+        request.stream(),
+        format,
+    )
+
+
+# declare this before "/{product_id}", or that route would match first
+@router.get(
+    "/export",
+    dependencies=[Depends(get_token_claims)],
+    response_class=StreamingResponse,
+)
+async def export_products(
+    format: Literal["ndjson", "csv"] = "ndjson",
+    order_by: ProductSortField = ProductSortField.PRODUCT_ID,
+    direction: str = "asc",
+) -> StreamingResponse:
+    """Export all products, streamed from a server side cursor (constant
+    memory, whatever the number of products).
+    Only logged in users can access this endpoint.
+
+    Args:
+        format (str, optional): "ndjson" (one JSON product per line) or
+        "csv" (with a header row). Defaults to "ndjson".
+        order_by (ProductSortField, optional): The field to sort by.
+        Defaults to "product_id".
+        direction (str, optional): The direction of the sort.
+        Defaults to "asc".
+
+    Returns:
+        StreamingResponse: The products.
+    """
+    content = product_service.export_products(order_by, direction, format)
+    return StreamingResponse(
+        content,
+        media_type=EXPORT_MEDIA_TYPES[format],
+        headers={
+            "Content-Disposition": f'attachment; filename="products.{format}"'
+        },
+    )
+
+
+# declare this before "/{product_id}", or that route would match first
+@router.get("/keyset", response_model=ProductPage)
+async def get_products_by_cursor(
+    session: ReadSessionDep,
+    cursor: str | None = None,
+    page_size: Annotated[int, Query(ge=1, le=100)] = 3,
+    order_by: ProductSortField = ProductSortField.PRODUCT_ID,
+    direction: str = "asc",
+) -> ProductPage:
+    """Get a page of products (keyset/cursor pagination).
+    Unlike `page`, the cost of a page doesn't grow with its position.
+
+    Args:
+        cursor (str, optional): `next_cursor` or `prev_cursor` of the last
+        response; leave it out for the first page.
+        page_size (int, optional): The size of each page, 1 to 100.
+        Defaults to 3.
+        order_by (ProductSortField, optional): The field to sort by.
+        Defaults to "product_id". Cursors keep the sort they were made with.
+        direction (str, optional): The direction of the sort.
+        Defaults to "asc".
+        session (ReadSessionDep): The injected (read-only) session object.
+
+    Returns:
+        ProductPage: The products, and cursors for the next/previous pages.
+    """
+    page = await product_service.get_products_by_cursor(
+        session,
+        page_size,
+        order_by,
+        direction,
+        cursor,
+    )
+    await release_connection(session)
+    return page
+
+
 @router.get(
     "/{product_id}",
-    response_model=ProductOutput,
-    dependencies=[Depends(oauth2_scheme)],
+    response_model=ProductDetailOutput,
+    response_model_exclude_none=True,
+    dependencies=[Depends(get_token_claims)],
 )
 async def get_product(
     product_id: int,
-    session: AsyncSessionDep,
-) -> Product:
-    """Get the product detail of a product by its id.
+    session: ReadSessionDep,
+    response: Response,
+    include: str | None = None,
+    orders_limit: Annotated[int, Query(ge=1, le=100)] = 20,
+) -> ProductDetailOutput:
+    """Get the product detail of a product by its id (cached).
     Only logged in users can access this endpoint.
 
     Args:
         product_id (int): The product ID (primary key).
-        session (AsyncSession, optional): The injected session object.
+        session (ReadSessionDep): The injected (read-only) session object.
+        include (str, optional): Comma separated relationships to include;
+        only "orders" for now (the latest `orders_limit` orders).
+        orders_limit (int, optional): Max. number of orders to include.
+        Defaults to 20.
 
     Returns:
-        ProductOutput: The output model of the target product.
+        ProductDetailOutput: The output model of the target product.
     """
-    return await product_service.get_product(session, product_id)
+    includes = frozenset(include.split(",")) if include else frozenset()
+    product = await product_service.get_product(
+        session,
+        product_id,
+        include=includes,
+        orders_limit=orders_limit,
+    )
+    await release_connection(session)
+    response.headers["ETag"] = make_etag(product.version)
+
+    return product
 
 
 @router.get("/", response_model=list[ProductOutput])
 async def get_products(
-    session: AsyncSessionDep,
+    session: ReadSessionDep,
     page: int = 1,
     page_size: int = 3,
-    order_by: str = "product_id",
+    order_by: ProductSortField = ProductSortField.PRODUCT_ID,
     direction: str = "asc",
 ) -> Sequence[Product]:
     """Get a page of products (pagination).
@@ -79,22 +282,24 @@ async def get_products(
     Args:
         page (int, optional): The page number. Defaults to 1.
         page_size (int, optional): The size of each page. Defaults to 3.
-        order_by (str, optional): The column to sort by.
+        order_by (ProductSortField, optional): The field to sort by.
         Defaults to "product_id".
         direction (str, optional): The direction of the sort.
         Defaults to "asc".
-        session (AsyncSession, optional): The injected session object.
+        session (ReadSessionDep): The injected (read-only) session object.
 
     Returns:
         list[ProductOutput]: The list of products in the requested page.
     """
-    return await product_service.get_products(
+    products = await product_service.get_products(
         session,
         page,
         page_size,
         order_by,
         direction,
     )
+    await release_connection(session)  # before serializing the products
+    return products
 
 
 @router.put(
@@ -106,6 +311,8 @@ async def update_product(
     session: AsyncSessionDep,
     product_id: int,
     product_data: ProductUpdate,
+    response: Response,
+    if_match: Annotated[str | None, Header()] = None,
 ) -> Product:
     """An endpoint to update products. Only managers can access this endpoint.
 
@@ -113,13 +320,17 @@ async def update_product(
         session (AsyncSessionDep): Injected async session object.
         product_id (int): product primary key
         product_data (ProductInput): The product input model (fields to update)
+        if_match (str, optional): The ETag of the product (from GET or a
+        previous update); if set, the update fails with 412 when the product
+        has changed since.
 
     Returns:
-        _type_: _description_
+        ProductOutput: The updated product; its new ETag is in the headers.
     """
     product = await product_service.update_product(
-        session, product_id, product_data
+        session, product_id, product_data, parse_if_match(if_match)
     )
+    response.headers["ETag"] = make_etag(product.version)
 
     return product
 
@@ -140,3 +351,31 @@ async def delete_product(
         product_id (int): The product's primary key.
     """
     await product_service.delete_product(session, product_id)
+
+
+@router.delete(
+    "/",
+    dependencies=[Depends(check_logged_in_user_is_manager)],
+)
+async def delete_products(
+    session: AsyncSessionDep,
+    ids: Annotated[
+        list[int],
+        Query(
+            min_length=1,
+            max_length=PROJECT_SETTINGS.PRODUCT_BULK_MAX_ITEMS,
+        ),
+    ],
+) -> dict[str, list[int]]:
+    """Delete many products in one statement (`?ids=1&ids=2...`).
+    Only managers can access this endpoint.
+
+    Args:
+        session (AsyncSessionDep): DI injected async session object.
+        ids (list[int]): The primary keys of the products to delete.
+
+    Returns:
+        dict: The IDs of the deleted products; unknown IDs are skipped.
+    """
+    deleted_ids = await product_service.delete_products(session, ids)
+    return {"deleted_ids": deleted_ids}
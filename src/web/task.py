@@ -0,0 +1,50 @@
+import uuid
+from typing import Annotated
+
+from fastapi import APIRouter, Depends, Query
+
+import service.task as task_service
+from core.config import PROJECT_SETTINGS
+from core.dependency import AsyncSessionDep, get_token_claims
+from schema.task import TaskStatus
+
+router = APIRouter(dependencies=[Depends(get_token_claims)])
+
+
+@router.get("/{task_id}")
+async def get_task(
+    task_id: uuid.UUID,
+    session: AsyncSessionDep,
+) -> TaskStatus:
+    """Get the status of a task, by the task ID returned when creating a
+    product. The statuses are cached for a couple of seconds.
+
+    Args:
+        task_id (uuid.UUID): The task ID.
+        session (AsyncSessionDep): The injected session object.
+
+    Returns:
+        TaskStatus: The state of the task ("pending", "retrying" or "sent").
+    """
+    return await task_service.get_task_status(session, task_id)
+
+
+@router.get("/")
+async def get_tasks(
+    ids: Annotated[
+        list[uuid.UUID],
+        Query(min_length=1, max_length=PROJECT_SETTINGS.TASK_STATUS_MAX_IDS),
+    ],
+    session: AsyncSessionDep,
+) -> list[TaskStatus]:
+    """Get the status of many tasks at once (`?ids=...&ids=...`), e.g. the
+    task IDs of a bulk creation.
+
+    Args:
+        ids (list[uuid.UUID]): The task IDs.
+        session (AsyncSessionDep): The injected session object.
+
+    Returns:
+        list[TaskStatus]: The statuses, in the order of `ids`.
+    """
+    return await task_service.get_task_statuses(session, ids)
@@ -0,0 +1,98 @@
+from httpx import AsyncClient
+
+from tests.integration import UNAUTHORIZED_RESPONSE
+
+
+async def test_admin_get_password_hashing_stats(
+    async_client: AsyncClient,
+    auth_header_admin: dict[str, str],
+) -> None:
+    response = await async_client.get(
+        "/api/v1/metrics/password-hashing",
+        headers=auth_header_admin,
+    )
+
+    assert response.status_code == 200
+
+    json_result = response.json()
+    assert json_result["kind"] in ("thread", "process")
+    assert json_result["completed"] >= 1  # at least the admin login
+    assert json_result["queue_depth"] >= 0
+
+
+async def test_user_get_password_hashing_stats_failure(
+    async_client: AsyncClient,
+    auth_header_user: dict[str, str],
+) -> None:
+    response = await async_client.get(
+        "/api/v1/metrics/password-hashing",
+        headers=auth_header_user,
+    )
+
+    assert response.status_code == 403
+    assert response.json() == UNAUTHORIZED_RESPONSE
+
+
+async def test_admin_get_cache_stats(
+    async_client: AsyncClient,
+    auth_header_admin: dict[str, str],
+) -> None:
+    response = await async_client.get(
+        "/api/v1/metrics/caches",
+        headers=auth_header_admin,
+    )
+
+    assert response.status_code == 200
+
+    jwt_claims = response.json()["jwt_claims"]
+    assert jwt_claims["size"] >= 1  # the admin token was just verified
+    assert 0 <= jwt_claims["hit_rate"] <= 1
+
+
+async def test_admin_get_db_pool_stats(
+    async_client: AsyncClient,
+    auth_header_admin: dict[str, str],
+) -> None:
+    response = await async_client.get(
+        "/api/v1/metrics/db-pool",
+        headers=auth_header_admin,
+    )
+
+    assert response.status_code == 200
+
+    json_result = response.json()
+    assert json_result["checkouts"] >= 1  # at least the admin login
+    assert sum(json_result["wait_ms"].values()) == json_result["checkouts"]
+
+
+async def test_admin_get_db_replica_stats(
+    async_client: AsyncClient,
+    auth_header_admin: dict[str, str],
+) -> None:
+    response = await async_client.get(
+        "/api/v1/metrics/db-replicas",
+        headers=auth_header_admin,
+    )
+
+    assert response.status_code == 200
+
+    json_result = response.json()
+    assert json_result["replicas"] == []  # none in the tests
+    assert json_result["primary_reads"] >= 0
+
+
+async def test_admin_get_db_hold_time_stats(
+    async_client: AsyncClient,
+    auth_header_admin: dict[str, str],
+) -> None:
+    await async_client.get("/api/v1/products/", headers=auth_header_admin)
+    response = await async_client.get(
+        "/api/v1/metrics/db-hold-times",
+        headers=auth_header_admin,
+    )
+
+    assert response.status_code == 200
+
+    products = response.json()["GET /api/v1/products/"]
+    assert products["count"] >= 1
+    assert products["max_ms"] >= products["avg_ms"]
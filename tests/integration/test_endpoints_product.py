@@ -1,3 +1,5 @@
+import csv
+import json
 import logging
 from decimal import Decimal
 from tests.conftest import PRODUCT_DATA
@@ -7,10 +9,12 @@ from tests.integration import (
     is_valid_uuid,
 )
 
+import pytest
 from httpx import AsyncClient, Response
+from sqlalchemy import func, select
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from model import ProductType
+from model import Product, ProductType
 from repository import product as product_repo
 from schema.product import ProductCreate
 
@@ -47,6 +51,48 @@ async def test_admin_create_product(
     assert is_valid_uuid(response.json()["task_id"])
 
 
+async def test_admin_create_products(
+    async_client: AsyncClient,
+    auth_header_admin: dict[str, str],
+) -> None:
+    data = [
+        {"product_name": f"bulk phone {i}", "unit_price": 10 + i}
+        for i in range(3)
+    ]
+    response = await async_client.post(
+        "/api/v1/products/bulk",
+        headers=auth_header_admin,
+        json=data,
+    )
+
+    assert response.status_code == 201
+
+    json_result = response.json()
+    assert len(json_result["product_ids"]) == 3
+    assert len(json_result["task_ids"]) == 3
+    assert all(is_valid_uuid(task_id) for task_id in json_result["task_ids"])
+
+    response = await async_client.get(
+        f"/api/v1/products/{json_result['product_ids'][1]}",
+        headers=auth_header_admin,
+    )
+    assert response.json()["product_name"] == "Bulk Phone 1"
+    assert response.json()["unit_price"] == "11.00"
+
+
+async def test_admin_create_no_products(
+    async_client: AsyncClient,
+    auth_header_admin: dict[str, str],
+) -> None:
+    response = await async_client.post(
+        "/api/v1/products/bulk",
+        headers=auth_header_admin,
+        json=[],
+    )
+
+    assert response.status_code == 422
+
+
 async def test_user_get_product_detail(
     async_client: AsyncClient,
     auth_header_user: dict[str, str],
@@ -65,7 +111,38 @@ async def test_user_get_product_detail(
     x["product_id"] = product_id
     x["product_name"] = str(x["product_name"]).title()
     x["unit_price"] = "{:.2f}".format(float(str(x["unit_price"])))
+    x["version"] = 1
     assert response.json() == x
+    assert response.headers["ETag"] == '"1"'
+
+
+async def test_user_get_product_detail_with_orders(
+    async_client: AsyncClient,
+    auth_header_user: dict[str, str],
+) -> None:
+    response = await async_client.get(
+        "/api/v1/products/1",
+        headers=auth_header_user,
+        params={"include": "orders", "orders_limit": 5},
+    )
+
+    assert response.status_code == 200
+    assert response.json()["product_id"] == 1
+    assert response.json()["orders"] == []
+
+
+async def test_user_get_product_detail_with_unknown_include(
+    async_client: AsyncClient,
+    auth_header_user: dict[str, str],
+) -> None:
+    response = await async_client.get(
+        "/api/v1/products/1",
+        headers=auth_header_user,
+        params={"include": "orders,customers"},
+    )
+
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Cannot include: customers."
 
 
 async def test_user_get_non_existing_product_detail(
@@ -140,6 +217,175 @@ async def test_get_product_pages(
     assert product_id_11 > product_id_12 > product_id_21 > product_id_22
 
 
+async def test_get_product_pages_by_cursor(
+    async_client: AsyncClient,
+) -> None:
+    params = {
+        "page_size": "2",
+        "order_by": "unit_price",
+        "direction": "desc",
+    }
+    response = await async_client.get("/api/v1/products/keyset", params=params)
+    assert response.status_code == 200
+    first_page = response.json()
+    assert len(first_page["items"]) == 2
+    assert first_page["prev_cursor"] is None
+    assert first_page["next_cursor"] is not None
+
+    # the cursor keeps the sort
+    response = await async_client.get(
+        "/api/v1/products/keyset",
+        params={"cursor": first_page["next_cursor"], "page_size": "2"},
+    )
+    assert response.status_code == 200
+    second_page = response.json()
+    assert len(second_page["items"]) == 2
+    assert second_page["prev_cursor"] is not None
+
+    prices = [
+        Decimal(item["unit_price"])
+        for item in first_page["items"] + second_page["items"]
+    ]
+    assert prices == sorted(prices, reverse=True)
+
+    response = await async_client.get(
+        "/api/v1/products/keyset",
+        params={"cursor": second_page["prev_cursor"], "page_size": "2"},
+    )
+    assert response.status_code == 200
+    assert response.json()["items"] == first_page["items"]
+
+
+async def test_get_product_pages_by_invalid_cursor(
+    async_client: AsyncClient,
+) -> None:
+    response = await async_client.get(
+        "/api/v1/products/keyset",
+        params={"cursor": "invalid"},
+    )
+    assert response.status_code == 400
+    assert response.json() == {"detail": "Invalid cursor."}
+
+
+@pytest.mark.parametrize("page_size", [-1, 0, 101])
+async def test_get_product_pages_by_cursor_with_invalid_page_size(
+    async_client: AsyncClient,
+    page_size: int,
+) -> None:
+    response = await async_client.get(
+        "/api/v1/products/keyset",
+        params={"page_size": page_size},
+    )
+    assert response.status_code == 422
+
+
+async def test_get_product_pages_with_unknown_sort_field(
+    async_client: AsyncClient,
+) -> None:
+    response = await async_client.get(
+        "/api/v1/products/",
+        params={"order_by": "password_hash"},
+    )
+    assert response.status_code == 422
+
+
+async def test_export_products(
+    session: AsyncSession,
+    async_client: AsyncClient,
+    auth_header_user: dict[str, str],
+) -> None:
+    count = await session.scalar(select(func.count()).select_from(Product))
+
+    response = await async_client.get(
+        "/api/v1/products/export",
+        headers=auth_header_user,
+        params={"order_by": "unit_price", "direction": "desc"},
+    )
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/x-ndjson"
+
+    products = [json.loads(line) for line in response.text.splitlines()]
+    assert len(products) == count
+    prices = [Decimal(p["unit_price"]) for p in products]
+    assert prices == sorted(prices, reverse=True)
+
+    response = await async_client.get(
+        "/api/v1/products/export",
+        headers=auth_header_user,
+        params={"format": "csv"},
+    )
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/csv")
+
+    rows = list(csv.DictReader(response.text.splitlines()))
+    assert len(rows) == count
+    assert [int(row["product_id"]) for row in rows] == sorted(
+        p["product_id"] for p in products
+    )
+
+
+async def test_export_products_with_wrong_direction(
+    async_client: AsyncClient,
+    auth_header_user: dict[str, str],
+) -> None:
+    response = await async_client.get(
+        "/api/v1/products/export",
+        headers=auth_header_user,
+        params={"direction": "up"},
+    )
+    assert response.status_code == 400
+
+
+async def test_export_products_without_login(
+    async_client: AsyncClient,
+) -> None:
+    response = await async_client.get("/api/v1/products/export")
+    assert response.status_code == 401
+
+
+async def test_admin_import_products(
+    async_client: AsyncClient,
+    auth_header_admin: dict[str, str],
+) -> None:
+    body = (
+        '{"product_name": "uploaded phone", "unit_price": 250, "type": 0}\n'
+        '{"product_name": "uploaded case"}\n'
+    )
+    response = await async_client.post(
+        "/api/v1/products/import",
+        headers=auth_header_admin,
+        params={"format": "ndjson"},
+        content=body.encode(),
+    )
+
+    assert response.status_code == 200
+    assert response.json() == {
+        "rows": 2,
+        "created": 1,
+        "updated": 0,
+        "failed": 1,
+        "errors": [
+            {
+                "line": 2,
+                "error": "unit_price: should be greater than 0 "
+                "and less than 10000000000",
+            }
+        ],
+    }
+
+
+async def test_user_import_products_failure(
+    async_client: AsyncClient,
+    auth_header_user: dict[str, str],
+) -> None:
+    response = await async_client.post(
+        "/api/v1/products/import",
+        headers=auth_header_user,
+        content=b"",
+    )
+    assert response.status_code == 403
+
+
 async def test_admin_delete_product(
     session: AsyncSession,
     async_client: AsyncClient,
@@ -177,6 +423,48 @@ async def test_admin_delete_non_existing_product(
     }
 
 
+async def test_admin_delete_products(
+    session: AsyncSession,
+    async_client: AsyncClient,
+    auth_header_admin: dict[str, str],
+) -> None:
+    product_ids = [
+        (
+            await product_repo.create_product(
+                session,
+                ProductCreate(product_name=f"bulk {i}", unit_price=Decimal(1)),
+            )
+        ).product_id
+        for i in range(3)
+    ]
+
+    response = await async_client.delete(
+        "/api/v1/products/",
+        headers=auth_header_admin,
+        params={"ids": [*product_ids, NON_EXISTING_PRODUCT_ID]},
+    )
+    assert response.status_code == 200
+    assert sorted(response.json()["deleted_ids"]) == product_ids
+
+    for product_id in product_ids:
+        response = await async_client.get(
+            f"/api/v1/products/{product_id}",
+            headers=auth_header_admin,
+        )
+        assert response.status_code == 404
+
+
+async def test_admin_delete_products_without_ids(
+    async_client: AsyncClient,
+    auth_header_admin: dict[str, str],
+) -> None:
+    response = await async_client.delete(
+        "/api/v1/products/",
+        headers=auth_header_admin,
+    )
+    assert response.status_code == 422
+
+
 async def test_user_delete_product_failure(
     async_client: AsyncClient,
     auth_header_user: dict[str, str],
@@ -266,6 +554,45 @@ async def test_admin_update_product_units_in_stock(
     assert json_result["type"] == ProductType.PHONE.value
 
 
+async def test_admin_update_product_if_match(
+    session: AsyncSession,
+    async_client: AsyncClient,
+    auth_header_admin: dict[str, str],
+) -> None:
+    product = await product_repo.create_product(
+        session,
+        ProductCreate(product_name="test etag", unit_price=Decimal(1)),
+    )
+    url = f"/api/v1/products/{product.product_id}"
+
+    response = await async_client.get(url, headers=auth_header_admin)
+    etag = response.headers["ETag"]
+
+    response = await async_client.put(
+        url,
+        headers={**auth_header_admin, "If-Match": etag},
+        json={"units_in_stock": 3},
+    )
+    assert response.status_code == 200
+    assert response.json()["version"] == 2
+    assert response.headers["ETag"] == '"2"'
+
+    # someone else updated it in the meantime: the old ETag is stale
+    response = await async_client.put(
+        url,
+        headers={**auth_header_admin, "If-Match": etag},
+        json={"units_in_stock": 4},
+    )
+    assert response.status_code == 412
+
+    response = await async_client.put(
+        url,
+        headers={**auth_header_admin, "If-Match": "not-an-etag"},
+        json={"units_in_stock": 4},
+    )
+    assert response.status_code == 400
+
+
 async def test_admin_update_non_existing_product(
     async_client: AsyncClient,
     auth_header_admin: dict[str, str],
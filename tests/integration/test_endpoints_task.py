@@ -0,0 +1,110 @@
+import uuid
+
+from httpx import AsyncClient
+
+import repository.email as email_repo
+from model.email import NotificationType
+from service.task import task_status_cache
+from task_queue.tasks import SessionMaker
+
+
+async def create_product_task(
+    async_client: AsyncClient,
+    auth_header_admin: dict[str, str],
+    name: str,
+) -> tuple[int, str]:
+    response = await async_client.post(
+        "/api/v1/products/",
+        headers=auth_header_admin,
+        json={"product_name": name, "unit_price": 10.0},
+    )
+    assert response.status_code == 201
+    return response.json()["product"]["product_id"], response.json()["task_id"]
+
+
+async def test_get_task(
+    async_client: AsyncClient,
+    auth_header_admin: dict[str, str],
+) -> None:
+    product_id, task_id = await create_product_task(
+        async_client, auth_header_admin, "task status phone"
+    )
+
+    response = await async_client.get(
+        f"/api/v1/tasks/{task_id}", headers=auth_header_admin
+    )
+    assert response.status_code == 200
+    assert response.json() == {
+        "task_id": task_id,
+        "state": "pending",
+        "target_id": None,
+    }
+
+    # the worker sends the email
+    with SessionMaker() as session:
+        email_repo.upsert_system_emails(
+            session,
+            [(task_id, product_id)],
+            type=NotificationType.PRODUCT,
+            is_sent=True,
+        )
+
+    # cached for a short time
+    response = await async_client.get(
+        f"/api/v1/tasks/{task_id}", headers=auth_header_admin
+    )
+    assert response.json()["state"] == "pending"
+
+    task_status_cache.clear_local()
+    response = await async_client.get(
+        f"/api/v1/tasks/{task_id}", headers=auth_header_admin
+    )
+    assert response.json() == {
+        "task_id": task_id,
+        "state": "sent",
+        "target_id": product_id,
+    }
+
+
+async def test_get_tasks(
+    async_client: AsyncClient,
+    auth_header_user: dict[str, str],
+) -> None:
+    task_ids = [str(uuid.uuid4()) for _ in range(3)]
+    with SessionMaker() as session:
+        email_repo.upsert_system_emails(
+            session,
+            [(task_ids[0], 1), (task_ids[1], 2)],
+            type=NotificationType.PRODUCT,
+        )
+        email_repo.update_system_emails_status(session, [task_ids[1]])
+
+    response = await async_client.get(
+        "/api/v1/tasks/",
+        params={"ids": task_ids},
+        headers=auth_header_user,
+    )
+
+    assert response.status_code == 200
+    assert [
+        (status["task_id"], status["state"]) for status in response.json()
+    ] == [
+        (task_ids[0], "retrying"),
+        (task_ids[1], "sent"),
+        (task_ids[2], "pending"),
+    ]
+
+
+async def test_get_task_invalid_id(
+    async_client: AsyncClient,
+    auth_header_user: dict[str, str],
+) -> None:
+    response = await async_client.get(
+        "/api/v1/tasks/not-a-uuid", headers=auth_header_user
+    )
+    assert response.status_code == 422
+
+
+async def test_get_task_not_logged_in(async_client: AsyncClient) -> None:
+    response = await async_client.get(f"/api/v1/tasks/{uuid.uuid4()}")
+    assert response.status_code == 401
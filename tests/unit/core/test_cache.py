@@ -0,0 +1,128 @@
+import time
+
+import pytest
+
+from core.cache import RedisCache, TieredCache, TTLCache
+from schema.employee import EmployeePrincipal
+
+
+class InMemoryRedisCache(RedisCache):
+    """A stand-in for the Redis tier."""
+
+    def __init__(self) -> None:
+        super().__init__(url="redis://unused", prefix="test")
+        self.data: dict[str, str] = {}
+        self.ttls: dict[str, float] = {}
+
+    async def get(self, key: str) -> bytes | None:
+        value = self.data.get(key)
+        return None if value is None else value.encode("utf-8")
+
+    async def get_with_ttl(self, key: str) -> tuple[bytes | None, float]:
+        return await self.get(key), self.ttls.get(key, 0.0)
+
+    async def set(self, key: str, value: str, ttl: float) -> None:
+        self.data[key] = value
+        self.ttls[key] = ttl
+
+    async def delete(self, *keys: str) -> None:
+        for key in keys:
+            self.data.pop(key, None)
+
+
+PRINCIPAL = EmployeePrincipal(
+    employee_id=1,
+    email="alice@meowfish.org",
+    first_name="Alice",
+    last_name="Maxwell",
+    is_manager=False,
+)
+
+
+def test_ttl_cache_evicts_least_recently_used() -> None:
+    cache: TTLCache[str, int] = TTLCache(max_size=2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1  # "b" is now the least recently used
+
+    cache.set("c", 3)
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
+
+    stats = cache.stats()
+    assert stats.size == 2
+    assert stats.hits == 3
+    assert stats.misses == 1
+    assert stats.hit_rate == 0.75
+
+
+def test_ttl_cache_expires_entries(monkeypatch: pytest.MonkeyPatch) -> None:
+    cache: TTLCache[str, int] = TTLCache(max_size=2, ttl=10)
+    cache.set("a", 1)
+    cache.set("b", 2, ttl=100)
+
+    now = time.monotonic()
+    monkeypatch.setattr(time, "monotonic", lambda: now + 50)
+
+    assert cache.get("a") is None
+    assert cache.get("b") == 2
+    assert len(cache) == 1
+
+
+async def test_tiered_cache_reads_through_redis_tier() -> None:
+    redis = InMemoryRedisCache()
+    cache = TieredCache(EmployeePrincipal, max_size=10, ttl=60, redis=redis)
+
+    await cache.set(PRINCIPAL.email, PRINCIPAL)
+    assert PRINCIPAL.email in redis.data
+
+    # another worker: empty in-process tier, shared Redis tier
+    cache.clear_local()
+    assert await cache.get(PRINCIPAL.email) == PRINCIPAL
+    assert await cache.get(PRINCIPAL.email) == PRINCIPAL
+
+    stats = cache.stats()
+    assert stats.hits == 2
+    assert stats.redis_hits == 1
+    assert stats.misses == 0
+
+    await cache.delete(PRINCIPAL.email)
+    assert await cache.get(PRINCIPAL.email) is None
+    assert redis.data == {}
+    assert cache.stats().redis_misses == 1
+
+
+async def test_tiered_cache_discard() -> None:
+    redis = InMemoryRedisCache()
+    cache = TieredCache(EmployeePrincipal, max_size=10, ttl=60, redis=redis)
+    await cache.set(PRINCIPAL.email, PRINCIPAL)
+
+    cache.discard(PRINCIPAL.email)
+    assert cache.local.get(PRINCIPAL.email) is None
+
+    # the Redis entry is deleted by a background task
+    for task in list(cache._tasks):
+        await task
+    assert redis.data == {}
+
+
+async def test_tiered_cache_entry_ttl(monkeypatch: pytest.MonkeyPatch) -> None:
+    redis = InMemoryRedisCache()
+    cache = TieredCache(EmployeePrincipal, max_size=10, ttl=60, redis=redis)
+
+    await cache.set(PRINCIPAL.email, PRINCIPAL, ttl=5)
+    assert redis.ttls[PRINCIPAL.email] == 5
+
+    # another worker keeps the shorter TTL
+    cache.clear_local()
+    assert await cache.get(PRINCIPAL.email) == PRINCIPAL
+    now = time.monotonic()
+    monkeypatch.setattr(time, "monotonic", lambda: now + 10)
+    assert cache.local.get(PRINCIPAL.email) is None
+
+    # not cached at all
+    await cache.delete(PRINCIPAL.email)
+    await cache.set(PRINCIPAL.email, PRINCIPAL, ttl=0)
+    assert cache.local.get(PRINCIPAL.email) is None
+    assert redis.data == {}
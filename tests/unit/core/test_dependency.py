@@ -1,4 +1,4 @@
-from datetime import datetime, timezone
+from datetime import datetime, timedelta, timezone
 from typing import Any
 
 import pytest
@@ -6,47 +6,113 @@ from fastapi import HTTPException
 from jose import jwt
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from core.auth import token_claims_cache
 from core.config import PROJECT_SETTINGS
-from core.dependency import get_current_user
+from core.dependency import (
+    check_logged_in_user_is_manager,
+    get_current_user,
+    get_token_claims,
+)
 from schema.user import User
 
 
-async def test_get_current_user_without_token(session: AsyncSession) -> None:
+def encode_token(user: User) -> str:
+    return jwt.encode(
+        user.model_dump(),
+        PROJECT_SETTINGS.JWT_SECRET_KEY,
+        algorithm=PROJECT_SETTINGS.JWT_ALGORITHM,
+    )
+
+
+async def test_get_token_claims_without_token() -> None:
     with pytest.raises(HTTPException) as excinfo:
-        await get_current_user("", session)
+        await get_token_claims("")
 
     assert excinfo.value.status_code == 401
     assert excinfo.value.detail == "Could not validate credentials"
     assert excinfo.value.headers == {"WWW-Authenticate": "Bearer"}
 
 
+async def test_get_token_claims_with_expired_token() -> None:
+    token = encode_token(
+        User(
+            sub="alice@meowfish.org",
+            first_name="Alice",
+            exp=datetime.now(timezone.utc) - timedelta(minutes=1),
+        )
+    )
+
+    with pytest.raises(HTTPException) as excinfo:
+        await get_token_claims(token)
+
+    assert excinfo.value.status_code == 401
+
+
+async def test_get_token_claims_is_cached(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    token = encode_token(
+        User(
+            sub="cached@meowfish.org",
+            first_name="Cached",
+            exp=datetime.now(timezone.utc) + timedelta(minutes=5),
+            is_manager=True,
+        )
+    )
+    calls = []
+    decode = jwt.decode
+
+    def counting_decode(*args: Any, **kwargs: Any) -> dict[str, Any]:
+        calls.append(args)
+        return decode(*args, **kwargs)
+
+    monkeypatch.setattr(jwt, "decode", counting_decode)
+
+    claims = await get_token_claims(token)
+    assert claims == await get_token_claims(token)
+    assert claims.sub == "cached@meowfish.org"
+    assert claims.is_manager is True
+    assert len(calls) == 1  # the signature is only checked once
+
+    assert await check_logged_in_user_is_manager(claims) is True
+
+    token_claims_cache.clear()
+
+
+async def test_check_logged_in_user_is_not_manager() -> None:
+    claims = User(
+        sub="alice@meowfish.org",
+        first_name="Alice",
+        exp=datetime.now(timezone.utc),
+    )
+
+    with pytest.raises(HTTPException) as excinfo:
+        await check_logged_in_user_is_manager(claims)
+
+    assert excinfo.value.status_code == 403
+
+
 @pytest.mark.parametrize("username", ["", "non-existing-username"])
 async def test_get_current_user_with_nonexistent_user_name(
     username: str,
     session: AsyncSession,
 ) -> None:
-    user = User(
+    claims = User(
         sub=username,
         first_name="Test",
         last_name="",
         exp=datetime.now(timezone.utc),
         is_manager=False,
     )
-    token = jwt.encode(
-        user.model_dump(),
-        PROJECT_SETTINGS.JWT_SECRET_KEY,
-        algorithm=PROJECT_SETTINGS.JWT_ALGORITHM,
-    )
     with pytest.raises(HTTPException) as excinfo:
-        await get_current_user(token, session)
+        await get_current_user(claims, session)
 
     assert excinfo.value.status_code == 401
     assert excinfo.value.detail == "Could not validate credentials"
     assert excinfo.value.headers == {"WWW-Authenticate": "Bearer"}
 
 
-async def test_get_current_user_with_username_equaling_none(
-    session: AsyncSession,
+async def test_get_token_claims_with_username_equaling_none(
     monkeypatch: pytest.MonkeyPatch,
 ) -> None:
     # use mocking to test such a situation
@@ -60,7 +126,7 @@ async def test_get_current_user_with_username_equaling_none(
     )
 
     with pytest.raises(HTTPException) as excinfo:
-        await get_current_user("", session)
+        await get_token_claims("")
 
     assert excinfo.value.status_code == 401
     assert excinfo.value.detail == "Could not validate credentials"
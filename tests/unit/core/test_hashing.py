@@ -0,0 +1,54 @@
+import asyncio
+import threading
+
+from core.auth import (
+    get_password_hash,
+    get_password_hash_async,
+    verify_password,
+    verify_password_async,
+)
+from core.hashing import PasswordHashingExecutor
+
+
+async def test_verify_password_async() -> None:
+    password = "mysecretpassword"
+    hashed_password = await get_password_hash_async(password)
+
+    assert await verify_password_async(password, hashed_password)
+    assert not await verify_password_async("wrongpassword", hashed_password)
+
+
+async def test_executor_queue_depth() -> None:
+    executor = PasswordHashingExecutor(kind="thread", max_workers=1)
+    event = threading.Event()
+
+    # one job runs, the other two wait in the queue
+    jobs = [
+        asyncio.create_task(executor.run(event.wait, 5)) for _ in range(3)
+    ]
+    await asyncio.sleep(0)
+
+    stats = executor.stats()
+    assert stats.in_flight == 3
+    assert stats.queue_depth == 2
+
+    event.set()
+    await asyncio.gather(*jobs)
+
+    stats = executor.stats()
+    assert stats.in_flight == 0
+    assert stats.queue_depth == 0
+    assert stats.max_queue_depth == 2
+    assert stats.completed == 3
+
+    executor.shutdown()
+
+
+async def test_process_executor() -> None:
+    executor = PasswordHashingExecutor(kind="process", max_workers=1)
+
+    hashed_password = await executor.run(get_password_hash, "pw")
+    assert await executor.run(verify_password, "pw", hashed_password)
+    assert executor.stats().kind == "process"
+
+    executor.shutdown()
@@ -0,0 +1,62 @@
+import re
+from typing import Any
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from model.base import DATABASE_URL, make_connect_args
+
+# the prepared statements of this connection, for the test query (split,
+# so this one doesn't match itself)
+PREPARED_STATEMENTS = text(
+    "SELECT name FROM pg_prepared_statements "
+    "WHERE statement LIKE '%AS prepared_' || 'statement_test%'"
+)
+# see `unique_statement_name`
+UNIQUE_STATEMENT_NAME = re.compile(
+    r"__asyncpg_[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}__"
+)
+
+
+def test_make_connect_args() -> None:
+    assert make_connect_args("none", 500) == {
+        "prepared_statement_cache_size": 500
+    }
+
+    connect_args = make_connect_args("pgbouncer", 500)
+    assert connect_args["statement_cache_size"] == 0
+    assert connect_args["prepared_statement_cache_size"] == 0
+    name_func = connect_args["prepared_statement_name_func"]
+    assert name_func() != name_func()
+    assert UNIQUE_STATEMENT_NAME.fullmatch(name_func())
+
+
+async def get_prepared_statements(
+    connect_args: dict[str, Any],
+) -> list[str]:
+    engine = create_async_engine(DATABASE_URL, connect_args=connect_args)
+    try:
+        async with engine.connect() as conn:
+            for i in range(3):
+                result = await conn.scalar(
+                    text("SELECT :i AS prepared_statement_test"), {"i": i}
+                )
+                assert result == i
+            return list(await conn.scalars(PREPARED_STATEMENTS))
+    finally:
+        await engine.dispose()
+
+
+async def test_direct_mode_reuses_prepared_statements() -> None:
+    names = await get_prepared_statements(make_connect_args("none", 10))
+
+    assert len(names) == 1  # prepared once, executed 3 times
+
+
+async def test_pgbouncer_mode_names_statements_uniquely() -> None:
+    names = await get_prepared_statements(make_connect_args("pgbouncer", 10))
+
+    # asyncpg's own names ("__asyncpg_stmt_<n>__") clash across server
+    # connections behind PgBouncer
+    assert names
+    assert all(UNIQUE_STATEMENT_NAME.fullmatch(name) for name in names)
@@ -0,0 +1,106 @@
+import datetime
+
+from sqlalchemy import Connection, text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from model import engine
+from model.partitions import (
+    add_months,
+    get_partitions,
+    maintain_partitions,
+    partition_month,
+    partition_name,
+)
+
+
+def test_add_months() -> None:
+    assert add_months(datetime.date(2026, 10, 18), 0) == datetime.date(
+        2026, 10, 1
+    )
+    assert add_months(datetime.date(2026, 11, 30), 2) == datetime.date(
+        2027, 1, 1
+    )
+    assert add_months(datetime.date(2026, 1, 31), -13) == datetime.date(
+        2024, 12, 1
+    )
+
+
+def test_partition_name() -> None:
+    month = datetime.date(2026, 2, 1)
+    assert partition_name("system_email", month) == "system_email_y2026m02"
+    assert partition_month("system_email", "system_email_y2026m02") == month
+    assert partition_month("system_email", "system_email_old") is None
+    assert partition_month("system_email", "other_y2026m02") is None
+
+
+async def test_system_email_partitions(session: AsyncSession) -> None:
+    # created with the table (see `model.email`)
+    async with engine.connect() as conn:
+        today = await conn.scalar(text("SELECT current_date"))
+        partitions = await conn.run_sync(get_partitions, "system_email")
+    assert add_months(today, 0) in partitions.values()
+    assert add_months(today, 1) in partitions.values()
+
+
+def maintain(
+    connection: Connection,
+    today: datetime.date,
+    detach_only: bool = False,
+) -> tuple[list[str], list[str]]:
+    changes = maintain_partitions(
+        connection,
+        "partition_test",
+        months_ahead=2,
+        retention_months=1,
+        detach_only=detach_only,
+        today=today,
+    )
+    return changes.created, changes.removed
+
+
+async def test_maintain_partitions() -> None:
+    async with engine.begin() as conn:
+        await conn.execute(
+            text(
+                "CREATE TABLE partition_test (created_at timestamp) "
+                "PARTITION BY RANGE (created_at)"
+            )
+        )
+        try:
+            assert await conn.run_sync(
+                maintain, datetime.date(2026, 10, 18)
+            ) == (
+                [
+                    "partition_test_y2026m09",
+                    "partition_test_y2026m10",
+                    "partition_test_y2026m11",
+                    "partition_test_y2026m12",
+                ],
+                [],
+            )
+            await conn.execute(
+                text("INSERT INTO partition_test VALUES ('2026-12-31')")
+            )
+
+            # two months later
+            assert await conn.run_sync(
+                maintain, datetime.date(2026, 12, 1), True
+            ) == (
+                ["partition_test_y2027m01", "partition_test_y2027m02"],
+                ["partition_test_y2026m09", "partition_test_y2026m10"],
+            )
+            # detached, not dropped
+            assert await conn.scalar(
+                text("SELECT to_regclass('partition_test_y2026m09')")
+            )
+            assert (
+                await conn.scalar(text("SELECT count(*) FROM partition_test"))
+                == 1
+            )
+        finally:
+            await conn.execute(
+                text(
+                    "DROP TABLE IF EXISTS partition_test, "
+                    "partition_test_y2026m09, partition_test_y2026m10"
+                )
+            )
@@ -0,0 +1,90 @@
+from decimal import Decimal
+from pathlib import Path
+
+import pytest
+from sqlalchemy import create_engine, exc, text
+
+from model import AsyncSessionMaker
+from model.pool import (
+    ConnectionHoldTimes,
+    InstrumentedQueuePool,
+    current_route,
+    get_pool_stats,
+    release_connection,
+)
+from model.product import Product
+
+
+def test_pool_stats(tmp_path: Path) -> None:
+    engine = create_engine(
+        f"sqlite:///{tmp_path / 'pool.db'}",
+        poolclass=InstrumentedQueuePool,
+        pool_size=1,
+        max_overflow=0,
+        pool_timeout=0.1,
+    )
+    stats = get_pool_stats(engine)
+    assert stats.pool_size == 1
+    assert stats.checkouts == 0
+
+    with engine.connect() as conn:
+        conn.execute(text("SELECT 1"))
+        stats = get_pool_stats(engine)
+        assert stats.checked_out == 1
+
+        # the only connection is in use
+        with pytest.raises(exc.TimeoutError):
+            engine.connect()
+
+    stats = get_pool_stats(engine)
+    assert stats.checked_out == 0
+    assert stats.checked_in == 1
+    assert stats.checkouts == 1
+    assert stats.timeouts == 1
+    assert sum(stats.wait_ms.values()) == 1
+
+    # the histogram outlives the pool
+    engine.dispose()
+    assert get_pool_stats(engine).timeouts == 1
+
+
+def test_hold_times() -> None:
+    engine = create_engine("sqlite://")
+    hold_times = ConnectionHoldTimes()
+    hold_times.install(engine)
+
+    token = current_route.set("GET /products")
+    try:
+        for _ in range(2):
+            with engine.connect() as conn:
+                conn.execute(text("SELECT 1"))
+    finally:
+        current_route.reset(token)
+    with engine.connect() as conn:
+        conn.execute(text("SELECT 1"))
+
+    stats = hold_times.stats()
+    assert stats.keys() == {"GET /products", "-"}
+    assert stats["GET /products"]["count"] == 2
+    assert stats["GET /products"]["max_ms"] >= stats["GET /products"][
+        "avg_ms"
+    ]
+
+
+async def test_release_connection() -> None:
+    async with AsyncSessionMaker() as session:
+        # no statement yet: no connection
+        assert not session.in_transaction()
+        await release_connection(session)
+
+        product = await session.get(Product, 1)
+        assert product is not None
+        assert session.in_transaction()
+        await release_connection(session)
+        assert not session.in_transaction()
+        assert product.product_name  # still loaded
+
+        # pending changes are kept
+        session.add(Product(product_name="cable", unit_price=Decimal(1.00)))
+        await release_connection(session)
+        assert len(session.new) == 1
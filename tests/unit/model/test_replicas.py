@@ -0,0 +1,90 @@
+import asyncio
+
+import pytest
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from model import engine
+from model.replicas import Replica, ReplicaSet
+
+
+def make_replica_set(*names: str) -> ReplicaSet:
+    # nothing listens on port 1: connections are refused
+    return ReplicaSet(
+        replicas=[
+            Replica(
+                name,
+                create_async_engine("postgresql+asyncpg://p:p@127.0.0.1:1/x"),
+            )
+            for name in names
+        ],
+        max_lag_seconds=5.0,
+        check_interval=1.0,
+        check_timeout=0.1,
+    )
+
+
+def test_read_sessions_use_healthy_replicas() -> None:
+    replica_set = make_replica_set("r1", "r2")
+    r1, r2 = replica_set.replicas
+
+    # not checked yet: the primary
+    assert replica_set.session().bind is engine
+    assert replica_set.primary_reads == 1
+
+    r1.healthy = r2.healthy = True
+    binds = {replica_set.session().bind for _ in range(4)}
+    assert binds == {r1.engine, r2.engine}  # in turn
+
+    r2.healthy = False
+    assert {replica_set.session().bind for _ in range(2)} == {r1.engine}
+    assert replica_set.primary_reads == 1
+
+
+def test_cache_ttl() -> None:
+    replica_set = make_replica_set("r1")
+    (replica,) = replica_set.replicas
+
+    # the TTL of the cache on the primary
+    assert replica_set.cache_ttl(replica_set.session()) is None
+
+    replica.healthy = True
+    assert replica_set.cache_ttl(replica_set.session()) == 5.0
+
+
+async def test_replica_down_falls_back_to_primary() -> None:
+    replica_set = make_replica_set("r1")
+    (replica,) = replica_set.replicas
+    replica.healthy = True
+
+    await replica_set.check_all()
+
+    assert not replica.healthy
+    assert replica.error is not None
+    assert replica.checked_at is not None
+    assert replica_set.session().bind is engine
+    assert replica_set.stats()[0].healthy is False
+    await replica_set.stop()
+
+
+async def test_replica_not_answering(monkeypatch: pytest.MonkeyPatch) -> None:
+    replica_set = make_replica_set("r1")
+    (replica,) = replica_set.replicas
+    replica.healthy = True
+
+    async def hang(replica: Replica) -> float:
+        await asyncio.Event().wait()
+        return 0.0
+
+    monkeypatch.setattr(replica_set, "_get_lag", hang)
+    await replica_set.check_all()
+
+    assert not replica.healthy
+    assert replica.error == "No answer in 0.1s"
+
+    # stopped while checking: the monitor exits before the engines go
+    replica_set.start()
+    runner = replica_set._runner
+    assert runner is not None
+    await asyncio.sleep(0)
+    await replica_set.stop()
+    assert runner.done()
@@ -0,0 +1,77 @@
+import logging
+
+import pytest
+from sqlalchemy import Engine, create_engine, text
+
+from model.sql_logging import (
+    SqlLogger,
+    SqlLogMode,
+    fingerprint_parameters,
+    fingerprint_statement,
+)
+
+
+def test_fingerprint_parameters() -> None:
+    assert (
+        fingerprint_parameters({"name": "secret", "id": 1}, False)
+        == "{id: int, name: str}"
+    )
+    assert fingerprint_parameters(("secret", 1.5), False) == "(str, float)"
+    assert (
+        fingerprint_parameters([{"id": 1}, {"id": 2}], True) == "2 x {id: int}"
+    )
+
+
+def test_fingerprint_statement() -> None:
+    assert fingerprint_statement(
+        "SELECT *\n  FROM product"
+    ) == fingerprint_statement("SELECT * FROM product")
+    assert fingerprint_statement("SELECT 1") != fingerprint_statement(
+        "SELECT 2"
+    )
+
+
+def run_statements(
+    mode: SqlLogMode,
+    sample_rate: float = 1.0,
+    slow_threshold_ms: float = 0.0,
+) -> Engine:
+    engine = create_engine("sqlite://")
+    SqlLogger(mode, sample_rate, slow_threshold_ms).install(engine)
+    with engine.connect() as conn:
+        for _ in range(3):
+            conn.execute(text("SELECT :value"), {"value": "secret"})
+    return engine
+
+
+@pytest.mark.parametrize(
+    "mode, sample_rate, slow_threshold_ms, logged",
+    [
+        ("off", 1.0, 0.0, 0),
+        ("slow", 1.0, 0.0, 3),
+        ("slow", 1.0, 60_000.0, 0),
+        ("sampled", 1.0, 0.0, 3),
+        ("sampled", 0.0, 0.0, 0),
+    ],
+)
+def test_sql_logger(
+    caplog: pytest.LogCaptureFixture,
+    mode: SqlLogMode,
+    sample_rate: float,
+    slow_threshold_ms: float,
+    logged: int,
+) -> None:
+    with caplog.at_level(logging.INFO, logger="model.sql_logging"):
+        engine = run_statements(mode, sample_rate, slow_threshold_ms)
+
+    assert not engine.echo
+    records = [r for r in caplog.records if r.name == "model.sql_logging"]
+    assert len(records) == logged
+    for record in records:
+        # sqlite uses positional parameters
+        assert "params=(str)" in record.getMessage()
+        assert "secret" not in record.getMessage()
+
+
+def test_sql_logger_echo() -> None:
+    assert run_statements("echo").echo
@@ -1,9 +1,14 @@
+import threading
 import uuid
+from concurrent.futures import ThreadPoolExecutor
 
 import pytest
+from sqlalchemy import select
 from sqlalchemy.orm import Session
 
 import repository.email as email_repo
+from model.email import NotificationType, SystemEmail
+from task_queue.tasks import SessionMaker
 
 
 async def test_update_nonexisting_system_email_status(
@@ -14,3 +19,80 @@ async def test_update_nonexisting_system_email_status(
 
     with pytest.raises(ValueError):
         email_repo.update_system_email_status(Session(), str(uuid.uuid4()))
+
+
+async def test_upsert_system_emails() -> None:
+    targets = [(str(uuid.uuid4()), i) for i in range(3)]
+
+    with SessionMaker() as session:
+        emails = email_repo.upsert_system_emails(
+            session, targets, type=NotificationType.PRODUCT
+        )
+        assert [(str(e.task_id), e.target_id) for e in emails] == targets
+        assert not any(e.is_sent for e in emails)
+
+        # the same tasks again (e.g. retries): updated, not duplicated
+        retried = [(task_id, target_id + 10) for task_id, target_id in targets]
+        emails = email_repo.upsert_system_emails(
+            session, retried[1:], type=NotificationType.PRODUCT, is_sent=True
+        )
+        assert [(e.target_id, e.is_sent) for e in emails] == [
+            (11, True),
+            (12, True),
+        ]
+
+        task_ids = email_repo.update_system_emails_status(
+            session, [task_id for task_id, _ in targets], status=True
+        )
+        assert sorted(task_ids) == sorted(task_id for task_id, _ in targets)
+
+        stmt = select(SystemEmail).where(
+            SystemEmail.task_id.in_(task_ids)
+        )
+        assert all(e.is_sent for e in session.scalars(stmt))
+
+
+async def test_upsert_duplicate_system_emails() -> None:
+    task_id = str(uuid.uuid4())
+
+    with SessionMaker() as session:
+        emails = email_repo.upsert_system_emails(
+            session,
+            [(task_id, 1), (task_id, 2)],
+            type=NotificationType.PRODUCT,
+        )
+        assert emails[0] is emails[1]
+        assert emails[0].target_id == 2
+
+        stmt = select(SystemEmail).filter_by(task_id=task_id)
+        assert len(session.scalars(stmt).all()) == 1
+
+
+async def test_upsert_system_emails_concurrently() -> None:
+    task_ids = [str(uuid.uuid4()) for _ in range(20)]
+    barrier = threading.Barrier(2)
+
+    def upsert(target_id: int) -> None:
+        # in a different order each time
+        targets = [(task_id, target_id) for task_id in task_ids]
+        if target_id % 2:
+            targets.reverse()
+        with SessionMaker() as session:
+            barrier.wait()
+            email_repo.upsert_system_emails(
+                session, targets, type=NotificationType.PRODUCT
+            )
+
+    # both write the same new tasks at once
+    with ThreadPoolExecutor(2) as executor:
+        list(executor.map(upsert, [1, 2]))
+
+    with SessionMaker() as session:
+        stmt = select(SystemEmail).where(SystemEmail.task_id.in_(task_ids))
+        emails = session.scalars(stmt).all()
+        assert len(emails) == len(task_ids)
+
+        system_email = email_repo.update_system_email_status(
+            session, task_ids[0]
+        )
+        assert system_email.is_sent
@@ -1,8 +1,50 @@
+from decimal import Decimal
+from typing import Any
+
 import pytest
 from fastapi import HTTPException
+from sqlalchemy import Select, desc, select, text
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from repository.product import get_products
+from model import Customer, Order, OrderDetail, engine
+from model.product import Product
+from repository.product import (
+    SORT_COLUMNS,
+    build_products_by_cursor_statement,
+    build_products_statement,
+    create_product,
+    create_products,
+    delete_product,
+    delete_products,
+    get_products,
+    get_products_by_cursor,
+    get_sort_key,
+    update_product,
+)
+from schema.product import (
+    ProductCreate,
+    ProductCursor,
+    ProductSortField,
+    ProductUpdate,
+)
+from tests.integration import NON_EXISTING_PRODUCT_ID
+
+
+async def explain(stmt: Select[Any]) -> str:
+    """Get the query plan of a statement.
+
+    Sequential scans are disabled: the test tables are tiny, so the planner
+    would rather read and sort the whole table than use an index.
+    """
+    sql = stmt.compile(
+        dialect=engine.dialect,
+        compile_kwargs={"literal_binds": True},
+    )
+    async with engine.connect() as conn:
+        # SET LOCAL: only for this transaction (rolled back on exit)
+        await conn.execute(text("SET LOCAL enable_seqscan = off"))
+        result = await conn.execute(text(f"EXPLAIN {sql}"))
+        return "\n".join(result.scalars().all())
 
 
 async def test_get_products_with_wrong_direction(
@@ -34,3 +76,266 @@ async def test_get_products_asc(session: AsyncSession) -> None:
 
     assert products[0].product_id == 1
     assert products[1].product_id == 2
+
+
+@pytest.mark.parametrize("direction", ["asc", "desc"])
+@pytest.mark.parametrize("order_by", list(SORT_COLUMNS))
+async def test_get_products_by_cursor(
+    session: AsyncSession,
+    order_by: str,
+    direction: str,
+) -> None:
+    column = SORT_COLUMNS[order_by]
+    if direction == "asc":
+        stmt = select(Product.product_id).order_by(column, Product.product_id)
+    else:
+        stmt = select(Product.product_id).order_by(
+            desc(column), desc(Product.product_id)
+        )
+    expected_ids = list((await session.scalars(stmt)).all())
+
+    # walk forward through all the pages
+    pages = []
+    cursor: ProductCursor | None = None
+    while True:
+        products, next_cursor, prev_cursor = await get_products_by_cursor(
+            session,
+            page_size=2,
+            order_by=order_by,
+            direction=direction,
+            cursor=cursor,
+        )
+        pages.append([p.product_id for p in products])
+        assert (prev_cursor is None) == (cursor is None)
+        if next_cursor is None:
+            break
+        cursor = next_cursor
+
+    assert [i for page in pages for i in page] == expected_ids
+
+    # and back again to the first page
+    for page in reversed(pages[:-1]):
+        assert prev_cursor is not None
+        products, _, prev_cursor = await get_products_by_cursor(
+            session,
+            page_size=2,
+            order_by=order_by,
+            direction=direction,
+            cursor=prev_cursor,
+        )
+        assert [p.product_id for p in products] == page
+    assert prev_cursor is None
+
+
+async def test_get_products_by_cursor_with_unknown_column(
+    session: AsyncSession,
+) -> None:
+    with pytest.raises(HTTPException) as excinfo:
+        await get_products_by_cursor(
+            session,
+            page_size=2,
+            order_by="password",
+            direction="asc",
+        )
+
+    assert excinfo.value.status_code == 400
+    assert excinfo.value.detail == "Cannot sort products by password."
+
+
+async def test_get_products_by_invalid_cursor(session: AsyncSession) -> None:
+    cursor = ProductCursor(
+        order_by="unit_price",
+        direction="asc",
+        value="not a number",
+        product_id=1,
+    )
+    with pytest.raises(HTTPException) as excinfo:
+        await get_products_by_cursor(
+            session,
+            page_size=2,
+            order_by="product_id",
+            direction="asc",
+            cursor=cursor,
+        )
+
+    assert excinfo.value.status_code == 400
+    assert excinfo.value.detail == "Invalid cursor."
+
+
+def test_sort_registry() -> None:
+    assert set(SORT_COLUMNS) == set(ProductSortField)
+
+    indexes = {
+        tuple(column.name for column in index.columns)
+        for index in Product.metadata.tables[Product.__tablename__].indexes
+    }
+    for field in ProductSortField:
+        sort_key = tuple(column.key for column in get_sort_key(field, "asc"))
+        # product_id alone is served by the primary key
+        assert sort_key == ("product_id",) or sort_key in indexes
+
+
+async def test_get_products_with_unknown_column(session: AsyncSession) -> None:
+    with pytest.raises(HTTPException) as excinfo:
+        await get_products(
+            session,
+            page=1,
+            page_size=2,
+            order_by="product_id; DROP TABLE product",
+            direction="asc",
+        )
+
+    assert excinfo.value.status_code == 400
+
+
+@pytest.mark.parametrize("direction", ["asc", "desc"])
+@pytest.mark.parametrize("order_by", list(ProductSortField))
+async def test_sorted_products_use_index_scan(
+    order_by: str,
+    direction: str,
+) -> None:
+    stmt = build_products_statement(1, 3, order_by, direction)
+    plan = await explain(stmt)
+    assert "Index Scan" in plan
+    assert "Sort" not in plan
+
+    cursor = ProductCursor(
+        order_by=order_by,
+        direction=direction,
+        value={
+            "product_id": 1,
+            "product_name": "Phone",
+            "unit_price": "9.50",
+            "units_in_stock": 5,
+            "type": "ACCESSORY",
+        }[order_by],
+        product_id=1,
+    )
+    stmt = build_products_by_cursor_statement(3, order_by, direction, cursor)
+    plan = await explain(stmt)
+    assert "Index" in plan
+    assert "Sort" not in plan
+
+
+async def test_update_product_versions(session: AsyncSession) -> None:
+    product = await create_product(
+        session,
+        ProductCreate(product_name="versioned", unit_price=Decimal(1)),
+    )
+    product_id = product.product_id
+    assert product.version == 1
+
+    product = await update_product(
+        session,
+        product_id,
+        ProductUpdate(product_name="versioned again"),
+        expected_version=1,
+    )
+    # names are normalized like with the ORM validator
+    assert product.product_name == "Versioned Again"
+    assert product.unit_price == Decimal(1)
+    assert product.version == 2
+
+    # nothing to update: the version stays the same
+    product = await update_product(session, product_id, ProductUpdate())
+    assert product.version == 2
+
+    with pytest.raises(HTTPException) as excinfo:
+        await update_product(
+            session,
+            product_id,
+            ProductUpdate(units_in_stock=1),
+            expected_version=1,
+        )
+    assert excinfo.value.status_code == 412
+
+    product = await session.get_one(Product, product_id)
+    await session.refresh(product)
+    assert product.units_in_stock == 0  # the stale update wasn't applied
+
+
+async def test_update_non_existing_product_with_version(
+    session: AsyncSession,
+) -> None:
+    with pytest.raises(HTTPException) as excinfo:
+        await update_product(
+            session,
+            NON_EXISTING_PRODUCT_ID,
+            ProductUpdate(units_in_stock=1),
+            expected_version=1,
+        )
+    assert excinfo.value.status_code == 404
+
+
+async def test_delete_product_with_orders(session: AsyncSession) -> None:
+    product = await create_product(
+        session,
+        ProductCreate(product_name="ordered", unit_price=Decimal(1)),
+    )
+    customer = Customer(
+        first_name="Deleting",
+        last_name="Customer",
+        address="Somewhere",
+        email="deleting.customer@meowfish.org",
+    )
+    session.add(customer)
+    await session.flush()
+    order = Order(customer_id=customer.customer_id)
+    session.add(order)
+    await session.flush()
+    session.add(
+        OrderDetail(order_id=order.order_id, product_id=product.product_id)
+    )
+    await session.commit()
+
+    with pytest.raises(HTTPException) as excinfo:
+        await delete_product(session, product.product_id)
+    assert excinfo.value.status_code == 409
+
+    with pytest.raises(HTTPException) as excinfo:
+        await delete_products(session, [product.product_id])
+    assert excinfo.value.status_code == 409
+
+    assert await session.get(Product, product.product_id) is not None
+
+
+async def test_delete_products(session: AsyncSession) -> None:
+    product_ids = [
+        (
+            await create_product(
+                session,
+                ProductCreate(product_name="deleted", unit_price=Decimal(1)),
+            )
+        ).product_id
+        for _ in range(2)
+    ]
+
+    deleted_ids = await delete_products(
+        session, [*product_ids, NON_EXISTING_PRODUCT_ID]
+    )
+    assert sorted(deleted_ids) == product_ids
+    assert await delete_products(session, product_ids) == []
+
+    with pytest.raises(HTTPException) as excinfo:
+        await delete_product(session, product_ids[0])
+    assert excinfo.value.status_code == 404
+
+
+async def test_create_products(session: AsyncSession) -> None:
+    products = [
+        ProductCreate(product_name=f"bulk product {i}", unit_price=Decimal(i))
+        for i in range(1, 6)
+    ]
+
+    product_ids = await create_products(session, products)
+    assert len(product_ids) == len(products)
+
+    stmt = select(Product).where(Product.product_id.in_(product_ids))
+    created = {p.product_id: p for p in (await session.scalars(stmt)).all()}
+    for product_id, product in zip(product_ids, products):
+        # IDs are in input order; names are normalized like with the ORM
+        assert created[product_id].product_name == (
+            product.product_name.title()
+        )
+        assert created[product_id].unit_price == product.unit_price
+        assert created[product_id].version == 1
@@ -0,0 +1,101 @@
+from datetime import date
+from typing import Any
+
+import pytest
+from sqlalchemy.ext.asyncio import AsyncSession
+
+import repository.employee as employee_repo
+from model import AsyncSessionMaker, Employee
+from service.auth import get_principal, principal_cache
+
+
+async def test_get_principal_is_cached(
+    session: AsyncSession,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    email = "cached.principal@meowfish.org"
+    employee = Employee(
+        email=email,
+        first_name="Cached",
+        hire_date=date.today(),
+    )
+    session.add(employee)
+    await session.commit()
+
+    calls = []
+    get_employee_by_email = employee_repo.get_employee_by_email
+
+    async def counting_get(*args: Any, **kwargs: Any) -> Employee | None:
+        calls.append(args)
+        return await get_employee_by_email(*args, **kwargs)
+
+    monkeypatch.setattr(employee_repo, "get_employee_by_email", counting_get)
+
+    principal = await get_principal(session, email)
+    assert principal is not None
+    assert principal.first_name == "Cached"
+    assert not hasattr(principal, "password_hash")
+
+    assert await get_principal(session, email) == principal
+    assert len(calls) == 1  # the second call is a cache hit
+
+
+async def test_get_principal_is_invalidated_on_update(
+    session: AsyncSession,
+) -> None:
+    email = "changed.principal@meowfish.org"
+    employee = Employee(
+        email=email,
+        first_name="Before",
+        hire_date=date.today(),
+    )
+    session.add(employee)
+    await session.commit()
+
+    principal = await get_principal(session, email)
+    assert principal is not None
+    assert principal.first_name == "Before"
+
+    employee.first_name = "After"
+    await session.commit()
+    assert principal_cache.local.get(email) is None
+
+    principal = await get_principal(session, email)
+    assert principal is not None
+    assert principal.first_name == "After"
+
+
+async def test_get_principal_is_invalidated_after_commit(
+    session: AsyncSession,
+) -> None:
+    email = "demoted.principal@meowfish.org"
+    employee = Employee(
+        email=email,
+        first_name="Demoted",
+        hire_date=date.today(),
+        is_manager=True,
+    )
+    session.add(employee)
+    await session.commit()
+
+    employee.is_manager = False
+    await session.flush()
+    # refilled from the old (still committed) row by another request
+    async with AsyncSessionMaker() as other_session:
+        principal = await get_principal(other_session, email)
+    assert principal is not None
+    assert principal.is_manager
+
+    await session.commit()
+    assert principal_cache.local.get(email) is None
+
+    principal = await get_principal(session, email)
+    assert principal is not None
+    assert not principal.is_manager
+
+
+async def test_get_principal_of_nonexistent_employee(
+    session: AsyncSession,
+) -> None:
+    assert await get_principal(session, "nobody@meowfish.org") is None
+    assert principal_cache.local.get("nobody@meowfish.org") is None
@@ -1,11 +1,16 @@
 from decimal import Decimal
+from typing import Any
 
+import pytest
+from fastapi import HTTPException
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from model.product import ProductType
-from schema.product import ProductCreate
-from service.product import create_product
-from tests.integration import is_valid_uuid
+import repository.product as product_repo
+from model import Customer, Order, OrderDetail
+from model.product import Product, ProductType
+from schema.product import ProductCreate, ProductUpdate
+from service.product import create_product, get_product
+from tests.integration import NON_EXISTING_PRODUCT_ID, is_valid_uuid
 
 
 async def test_get_product(session: AsyncSession) -> None:
@@ -21,3 +26,102 @@ async def test_get_product(session: AsyncSession) -> None:
     assert product.type == ProductType.OTHER
 
     assert is_valid_uuid(task_id)
+
+
+async def test_get_product_is_cached(
+    session: AsyncSession,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    product = await product_repo.create_product(
+        session,
+        ProductCreate(product_name="cached product", unit_price=Decimal(10)),
+    )
+    product_id = product.product_id
+    product_repo.product_cache.clear_local()
+
+    calls = []
+    repo_get_product = product_repo.get_product
+
+    async def counting_get_product(*args: Any) -> Product | None:
+        calls.append(args)
+        return await repo_get_product(*args)
+
+    monkeypatch.setattr(product_repo, "get_product", counting_get_product)
+
+    first = await get_product(session, product_id)
+    second = await get_product(session, product_id)
+    assert first == second
+    assert first.product_name == "Cached Product"
+    assert len(calls) == 1  # the second read is a cache hit
+
+    # writes refresh the cache
+    await product_repo.update_product(
+        session, product_id, ProductUpdate(units_in_stock=42)
+    )
+    assert (await get_product(session, product_id)).units_in_stock == 42
+    assert len(calls) == 1
+
+    await product_repo.delete_product(session, product_id)
+    assert await product_repo.product_cache.get(str(product_id)) is None
+    with pytest.raises(HTTPException) as excinfo:
+        await get_product(session, product_id)
+    assert excinfo.value.status_code == 404
+
+
+async def test_get_non_existing_product_is_not_cached(
+    session: AsyncSession,
+) -> None:
+    with pytest.raises(HTTPException):
+        await get_product(session, NON_EXISTING_PRODUCT_ID)
+
+    cached = await product_repo.product_cache.get(str(NON_EXISTING_PRODUCT_ID))
+    assert cached is None
+
+
+async def test_get_product_with_orders(session: AsyncSession) -> None:
+    product = await product_repo.create_product(
+        session,
+        ProductCreate(product_name="ordered product", unit_price=Decimal(10)),
+    )
+    customer = Customer(
+        first_name="Ordering",
+        last_name="Customer",
+        address="Somewhere",
+        email="ordering.customer@meowfish.org",
+    )
+    session.add(customer)
+    await session.flush()
+    orders = [Order(customer_id=customer.customer_id) for _ in range(3)]
+    session.add_all(orders)
+    await session.flush()
+    session.add_all(
+        OrderDetail(order_id=o.order_id, product_id=product.product_id)
+        for o in orders
+    )
+    await session.commit()
+
+    detail = await get_product(session, product.product_id)
+    assert detail.orders is None  # not loaded unless requested
+
+    detail = await get_product(
+        session,
+        product.product_id,
+        include=frozenset({"orders"}),
+        orders_limit=2,
+    )
+    assert detail.product_name == "Ordered Product"
+    assert detail.orders is not None
+    # the latest orders first
+    assert [o.order_id for o in detail.orders] == [
+        orders[2].order_id,
+        orders[1].order_id,
+    ]
+    assert detail.orders[0].customer_id == customer.customer_id
+
+
+async def test_get_product_with_unknown_include(session: AsyncSession) -> None:
+    with pytest.raises(HTTPException) as excinfo:
+        await get_product(session, 1, include=frozenset({"customers"}))
+
+    assert excinfo.value.status_code == 400
+    assert excinfo.value.detail == "Cannot include: customers."
@@ -0,0 +1,114 @@
+from collections.abc import AsyncIterator
+from decimal import Decimal
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+import repository.product as product_repo
+from model.product import Product, ProductType
+from schema.product import ProductCreate
+from service.product_import import (
+    import_products,
+    iter_csv_rows,
+    iter_lines,
+    iter_ndjson_rows,
+    validate_row,
+)
+
+
+async def as_chunks(*chunks: bytes) -> AsyncIterator[bytes]:
+    for chunk in chunks:
+        yield chunk
+
+
+async def test_iter_lines() -> None:
+    # "é" is split between two chunks
+    chunks = as_chunks(b"caf\xc3", b"\xa9\r\nline 2\n", b"", b"last")
+    lines = [line async for line in iter_lines(chunks)]
+
+    assert lines == ["café", "line 2", "last"]
+
+
+async def test_iter_csv_rows() -> None:
+    lines = iter_lines(
+        as_chunks(
+            b"product_name,unit_price,type\n",
+            b'"phone, blue",300,0\n',
+            b"\n",
+            b"case,9.5\n",
+            b"cable,,ACCESSORY\n",
+        )
+    )
+    rows = [row async for row in iter_csv_rows(lines)]
+
+    assert rows == [
+        (2, {"product_name": "phone, blue", "unit_price": "300", "type": 0}),
+        (4, "Expected 3 values, got 2."),
+        (5, {"product_name": "cable", "type": "ACCESSORY"}),
+    ]
+
+
+async def test_iter_ndjson_rows() -> None:
+    lines = iter_lines(
+        as_chunks(b'{"product_name": "phone"}\n[1]\n{"product_name": \n')
+    )
+    rows = [row async for row in iter_ndjson_rows(lines)]
+
+    assert rows[0] == (1, {"product_name": "phone"})
+    assert rows[1] == (2, "Expected a JSON object.")
+    assert rows[2][0] == 3
+    assert str(rows[2][1]).startswith("Invalid JSON")
+
+
+def test_validate_row() -> None:
+    product = validate_row(
+        {"product_name": "phone", "unit_price": "300", "type": 0}
+    )
+    assert product == ProductCreate(
+        product_name="phone",
+        unit_price=Decimal(300),
+        type=ProductType.PHONE,
+    )
+
+    assert isinstance(validate_row({"unit_price": "1"}), str)
+    assert isinstance(validate_row({"product_name": "free"}), str)
+    assert isinstance(
+        validate_row(
+            {"product_name": "x", "unit_price": 1, "units_in_stock": -1}
+        ),
+        str,
+    )
+
+
+async def test_import_products(session: AsyncSession) -> None:
+    existing = await product_repo.create_product(
+        session,
+        ProductCreate(product_name="imported phone", unit_price=Decimal(1)),
+    )
+    chunks = as_chunks(
+        b"product_name,unit_price,units_in_stock,type\n",
+        b"imported phone,200,3,0\n",
+        b"imported case,10,5,1\n",
+        b"imported cable,-1,5,1\n",
+        b"imported case,12,5,1\n",
+        b"imported charger,20,1,1\n",
+    )
+
+    summary = await import_products(session, chunks, "csv", batch_size=2)
+
+    assert summary.rows == 5
+    # the second "imported case" is in the next batch: an update
+    assert summary.created == 2
+    assert summary.updated == 2
+    assert summary.failed == 1
+    assert summary.errors[0].line == 4
+
+    await session.refresh(existing)
+    assert existing.unit_price == Decimal(200)
+    assert existing.units_in_stock == 3
+    assert existing.type == ProductType.PHONE
+    assert existing.version == 2
+
+    stmt = select(Product).where(Product.product_name == "Imported Case")
+    case = (await session.scalars(stmt)).one()
+    assert case.unit_price == Decimal(12)  # the last row wins
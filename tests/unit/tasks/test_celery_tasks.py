@@ -1,14 +1,22 @@
+import datetime
 import uuid
 from unittest.mock import MagicMock
 
 import pytest
 from celery import Task
 from celery.exceptions import Retry
-from sqlalchemy import select
+from sqlalchemy import func, select, update
 from sqlalchemy.ext.asyncio import AsyncSession
 
+import repository.email as email_repo
+from core.config import PROJECT_SETTINGS
 from model.email import NotificationType, SystemEmail
-from task_queue.tasks import send_email
+from task_queue.tasks import (
+    SessionMaker,
+    resend_unsent_emails,
+    send_email,
+    send_emails,
+)
 
 DUMMY_PRODUCT_ID = 999_999
 
@@ -54,3 +62,110 @@ async def test_send_email_exception(
 
     with pytest.raises(Retry):
         await send_email(DUMMY_PRODUCT_ID)
+
+
+async def test_send_emails(
+    session: AsyncSession,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    monkeypatch.setattr(
+        Task, "request", type("Request", (object,), {"id": uuid.uuid4()})
+    )
+    notifications = [
+        (DUMMY_PRODUCT_ID + i, str(uuid.uuid4())) for i in range(1, 4)
+    ]
+
+    task_ids = send_emails(notifications)
+    assert task_ids == [task_id for _, task_id in notifications]
+
+    stmt = select(SystemEmail).where(SystemEmail.task_id.in_(task_ids))
+    system_emails = {
+        str(e.task_id): e for e in (await session.scalars(stmt)).all()
+    }
+    for product_id, task_id in notifications:
+        assert system_emails[task_id].target_id == product_id
+        assert system_emails[task_id].type == NotificationType.PRODUCT
+        assert system_emails[task_id].is_sent
+
+
+async def test_resend_unsent_emails(monkeypatch: pytest.MonkeyPatch) -> None:
+    delay = MagicMock()
+    monkeypatch.setattr(send_emails, "delay", delay)
+
+    ages = {
+        "stuck": datetime.timedelta(hours=1),
+        "new": datetime.timedelta(),  # still retried by its own task
+        "expired": datetime.timedelta(days=2),
+    }
+    task_ids = {name: str(uuid.uuid4()) for name in ages}
+    with SessionMaker() as session:
+        email_repo.upsert_system_emails(
+            session,
+            [(task_id, DUMMY_PRODUCT_ID) for task_id in task_ids.values()],
+            type=NotificationType.PRODUCT,
+        )
+        for name, age in ages.items():
+            session.execute(
+                update(SystemEmail)
+                .filter_by(task_id=task_ids[name])
+                .values(created_at=func.now() - age)
+            )
+        session.commit()
+
+    assert resend_unsent_emails() >= 1
+
+    (notifications,) = delay.call_args.args
+    assert (DUMMY_PRODUCT_ID, task_ids["stuck"]) in notifications
+    assert (DUMMY_PRODUCT_ID, task_ids["new"]) not in notifications
+    assert (DUMMY_PRODUCT_ID, task_ids["expired"]) not in notifications
+
+    # the attempt is recorded: the next sweep skips the email
+    with SessionMaker() as session:
+        system_email = session.get(SystemEmail, task_ids["stuck"])
+        assert system_email is not None
+        assert system_email.attempts == 1
+        assert system_email.last_attempt_at is not None
+
+    delay.reset_mock()
+    resend_unsent_emails()
+    for call in delay.call_args_list:
+        (notifications,) = call.args
+        assert (DUMMY_PRODUCT_ID, task_ids["stuck"]) not in notifications
+
+
+async def test_resend_unsent_emails_retry_interval(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    delay = MagicMock()
+    monkeypatch.setattr(send_emails, "delay", delay)
+
+    retry_interval = datetime.timedelta(
+        seconds=PROJECT_SETTINGS.SYSTEM_EMAIL_SWEEP_RETRY_INTERVAL_SECONDS
+    )
+    max_attempts = PROJECT_SETTINGS.SYSTEM_EMAIL_SWEEP_MAX_ATTEMPTS
+    attempts = {"retried": max_attempts - 1, "given_up": max_attempts}
+    task_ids = {name: str(uuid.uuid4()) for name in attempts}
+    with SessionMaker() as session:
+        email_repo.upsert_system_emails(
+            session,
+            [(task_id, DUMMY_PRODUCT_ID) for task_id in task_ids.values()],
+            type=NotificationType.PRODUCT,
+        )
+        for name, count in attempts.items():
+            session.execute(
+                update(SystemEmail)
+                .filter_by(task_id=task_ids[name])
+                .values(
+                    created_at=func.now() - datetime.timedelta(hours=2),
+                    attempts=count,
+                    # the retry interval has passed
+                    last_attempt_at=func.now() - 2 * retry_interval,
+                )
+            )
+        session.commit()
+
+    assert resend_unsent_emails() >= 1
+
+    (notifications,) = delay.call_args.args
+    assert (DUMMY_PRODUCT_ID, task_ids["retried"]) in notifications
+    assert (DUMMY_PRODUCT_ID, task_ids["given_up"]) not in notifications
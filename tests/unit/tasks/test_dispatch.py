@@ -0,0 +1,134 @@
+import os
+import subprocess
+import sys
+import time
+from collections.abc import Iterator
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any
+from unittest.mock import MagicMock
+
+import pytest
+
+from task_queue.dispatch import PendingTask, TaskRef, send_tasks
+from task_queue.outbox import OUTBOX_TASKS
+
+SRC_PATH = Path(__file__).parents[3] / "src"
+
+
+class FakeApp:
+    def __init__(self) -> None:
+        self.producers = 0
+        self.sent: list[tuple[str, tuple[Any, ...], dict[str, Any]]] = []
+
+    @contextmanager
+    def producer_or_acquire(self) -> Iterator[object]:
+        self.producers += 1
+        yield object()
+
+    def send_task(
+        self,
+        name: str,
+        args: tuple[Any, ...],
+        **options: Any,
+    ) -> None:
+        self.sent.append((name, args, options))
+
+
+class FakeTask:
+    """Records `apply_async` calls instead of sending them to a broker."""
+
+    def __init__(self, fail: bool = False, delay: float = 0.0) -> None:
+        self.app = FakeApp()
+        self.fail = fail
+        self.delay = delay  # seconds each call blocks, like a slow broker
+        self.calls: list[tuple[tuple[Any, ...], str]] = []
+
+    def apply_async(
+        self,
+        args: tuple[Any, ...],
+        task_id: str,
+        producer: object,
+    ) -> None:
+        time.sleep(self.delay)
+        if self.fail:
+            raise ConnectionError("broker is down")
+        self.calls.append((args, task_id))
+
+
+def test_send_tasks() -> None:
+    task = FakeTask()
+    batch = [PendingTask(task, (i,), f"id-{i}") for i in range(3)]
+
+    send_tasks(batch)
+
+    assert task.calls == [((i,), f"id-{i}") for i in range(3)]
+    assert task.app.producers == 1  # one connection for the batch
+
+
+def test_task_ref(monkeypatch: pytest.MonkeyPatch) -> None:
+    app = FakeApp()
+    monkeypatch.setattr("task_queue.app.celery_app", app)
+
+    task = TaskRef("task_queue.tasks.send_email", compression="gzip")
+    task.apply_async((1,), task_id="id")
+
+    assert task.app is app
+    assert app.sent == [
+        (
+            "task_queue.tasks.send_email",
+            (1,),
+            {
+                "task_id": "id",
+                "producer": None,
+                "ignore_result": True,
+                "compression": "gzip",
+            },
+        )
+    ]
+
+
+def test_outbox_tasks_ignore_results(monkeypatch: pytest.MonkeyPatch) -> None:
+    from task_queue.app import celery_app
+
+    on_task_call = MagicMock()
+    monkeypatch.setattr(
+        type(celery_app.backend), "on_task_call", on_task_call
+    )
+
+    with celery_app.connection_for_write("memory://") as connection:
+        producer = celery_app.amqp.Producer(connection)
+        for name, task in OUTBOX_TASKS.items():
+            task.apply_async((1,), task_id=name, producer=producer)
+
+    # would subscribe to the result of each task
+    on_task_call.assert_not_called()
+
+
+def test_outbox_tasks_are_registered() -> None:
+    from task_queue.tasks import celery_app
+
+    for name, task in OUTBOX_TASKS.items():
+        assert celery_app.tasks[name].compression == task.options.get(
+            "compression"
+        )
+        assert celery_app.tasks[name].ignore_result == task.options.get(
+            "ignore_result"
+        )
+
+
+def test_web_process_imports_no_celery() -> None:
+    # in a new interpreter, since the tests import Celery
+    code = (
+        "import sys, main\n"
+        "print(sorted(m for m in sys.modules if m == 'task_queue.tasks' or "
+        "m.split('.')[0] in ('celery', 'kombu', 'psycopg2')))"
+    )
+    result = subprocess.run(
+        [sys.executable, "-c", code],
+        env={**os.environ, "PYTHONPATH": str(SRC_PATH)},
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    assert result.stdout.splitlines()[-1] == "[]"
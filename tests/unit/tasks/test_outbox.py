@@ -0,0 +1,103 @@
+import asyncio
+import uuid
+from decimal import Decimal
+
+import pytest
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+import repository.outbox as outbox_repo
+import repository.product as product_repo
+from model.outbox import OutboxMessage
+from schema.product import ProductCreate
+from task_queue.outbox import OutboxRelay
+from tests.unit.tasks.test_dispatch import FakeTask
+
+
+async def count_messages(session: AsyncSession) -> int:
+    count = await session.scalar(
+        select(func.count()).select_from(OutboxMessage)
+    )
+    return count or 0
+
+
+async def test_create_product_writes_outbox(session: AsyncSession) -> None:
+    task_id = str(uuid.uuid4())
+    product = await product_repo.create_product(
+        session,
+        ProductCreate(product_name="outbox product", unit_price=Decimal(1)),
+        notification_task_id=task_id,
+    )
+
+    stmt = select(OutboxMessage).filter_by(task_id=task_id)
+    message = (await session.scalars(stmt)).one()
+    assert message.task_name == outbox_repo.SEND_EMAIL_TASK
+    assert message.args == [product.product_id]
+
+
+async def test_relay_outbox(session: AsyncSession) -> None:
+    task = FakeTask()
+    relay = OutboxRelay(
+        batch_size=2,
+        interval=0.1,
+        tasks={
+            outbox_repo.SEND_EMAIL_TASK: task,
+            outbox_repo.SEND_EMAILS_TASK: task,
+        },
+    )
+    task_ids = [str(uuid.uuid4()) for _ in range(3)]
+    for i, task_id in enumerate(task_ids):
+        outbox_repo.add_message(
+            session, outbox_repo.SEND_EMAIL_TASK, task_id, [i]
+        )
+    await session.commit()
+
+    await relay.relay_pending()
+
+    assert await count_messages(session) == 0
+    published = {task_id: args for args, task_id in task.calls}
+    for i, task_id in enumerate(task_ids):
+        assert published[task_id] == (i,)
+
+
+async def test_relay_outbox_failure(session: AsyncSession) -> None:
+    task = FakeTask(fail=True)
+    relay = OutboxRelay(
+        batch_size=10,
+        interval=0.1,
+        tasks={outbox_repo.SEND_EMAIL_TASK: task},
+    )
+    outbox_repo.add_message(
+        session, outbox_repo.SEND_EMAIL_TASK, str(uuid.uuid4()), [1]
+    )
+    await session.commit()
+
+    with pytest.raises(ConnectionError):
+        await relay.relay_once()
+
+    # kept for the next try
+    assert await count_messages(session) == 1
+
+    task.fail = False
+    await relay.relay_pending()
+    assert await count_messages(session) == 0
+
+
+async def test_stop_relay_while_publishing(session: AsyncSession) -> None:
+    task = FakeTask(delay=0.5)
+    relay = OutboxRelay(
+        batch_size=10,
+        interval=0.1,
+        tasks={outbox_repo.SEND_EMAIL_TASK: task},
+    )
+    task_id = str(uuid.uuid4())
+    outbox_repo.add_message(session, outbox_repo.SEND_EMAIL_TASK, task_id, [1])
+    await session.commit()
+
+    relay.start()
+    await asyncio.sleep(0.2)  # the batch is being published
+    await relay.stop()
+
+    # published once, not again by the shutdown relay
+    assert [id for _, id in task.calls].count(task_id) == 1
+    assert await count_messages(session) == 0
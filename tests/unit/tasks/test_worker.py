@@ -0,0 +1,254 @@
+import asyncio
+import base64
+import json
+import uuid
+import zlib
+from collections.abc import Sequence
+from typing import Any
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+import repository.outbox as outbox_repo
+from model.email import NotificationType, SystemEmail
+from task_queue.worker import (
+    AsyncWorker,
+    InMemoryBroker,
+    RawMessage,
+    TaskMessage,
+    decode_message,
+)
+
+DUMMY_PRODUCT_ID = 999_990
+
+
+def make_envelope(
+    task_name: str,
+    task_id: str,
+    args: list[Any],
+    compress: bool,
+) -> bytes:
+    """A message as kombu stores it in the Redis list."""
+    body = json.dumps([args, {}, {}]).encode()
+    headers: dict[str, Any] = {"task": task_name, "id": task_id}
+    if compress:
+        body = zlib.compress(body)
+        headers["compression"] = "application/x-gzip"
+    return json.dumps(
+        {
+            "body": base64.b64encode(body).decode(),
+            "headers": headers,
+            "properties": {"body_encoding": "base64"},
+        }
+    ).encode()
+
+
+def test_decode_message() -> None:
+    task_id = str(uuid.uuid4())
+    for compress in (False, True):
+        raw = make_envelope(
+            outbox_repo.SEND_EMAIL_TASK, task_id, [1], compress
+        )
+        assert decode_message(raw) == TaskMessage(
+            task_name=outbox_repo.SEND_EMAIL_TASK,
+            task_id=task_id,
+            args=[1],
+        )
+
+
+async def run_worker(worker: AsyncWorker, jobs: int) -> None:
+    """Run the worker until `jobs` messages are handled."""
+    stop = asyncio.Event()
+    run = asyncio.create_task(worker.run(stop))
+    while worker.succeeded + worker.failed < jobs:
+        await asyncio.sleep(0.01)
+    stop.set()
+    await run
+
+
+async def test_worker_drops_undecodable_messages() -> None:
+    handled: list[str] = []
+
+    async def handler(task_id: str, value: int) -> None:
+        handled.append(task_id)
+
+    broker = InMemoryBroker()
+    broker.put(make_envelope("job", "before", [1], compress=True))
+    broker.put(b"not a kombu message")
+    broker.put(json.dumps({"body": "", "headers": {}}).encode())
+    broker.put(make_envelope("job", "after", [2], compress=False))
+    worker = AsyncWorker(
+        broker, concurrency=1, handlers={"job": handler}, batch_size=10
+    )
+
+    await run_worker(worker, 4)
+
+    # the other messages of the batch are still handled
+    assert handled == ["before", "after"]
+    assert worker.succeeded == 2
+    assert worker.failed == 2
+
+
+class FailingBroker(InMemoryBroker):
+    """Fails like Redis going away, a few times."""
+
+    def __init__(self, failures: int) -> None:
+        super().__init__()
+        self.failures = failures
+
+    async def get_batch(
+        self, max_count: int, timeout: float
+    ) -> list[RawMessage]:
+        if self.failures:
+            self.failures -= 1
+            raise ConnectionError("Connection closed by server.")
+        return await super().get_batch(max_count, timeout)
+
+
+async def test_worker_retries_broker_errors() -> None:
+    handled: list[str] = []
+
+    async def handler(task_id: str) -> None:
+        handled.append(task_id)
+
+    broker = FailingBroker(failures=2)
+    broker.put(TaskMessage("job", "1", []))
+    worker = AsyncWorker(
+        broker, concurrency=1, handlers={"job": handler}, retry_delay=0.01
+    )
+
+    await run_worker(worker, 1)
+
+    assert broker.failures == 0
+    assert handled == ["1"]
+
+
+async def test_worker_runs_jobs_concurrently() -> None:
+    running = 0
+    max_running = 0
+    handled: list[tuple[str, int]] = []
+
+    async def handler(task_id: str, value: int) -> None:
+        nonlocal running, max_running
+        running += 1
+        max_running = max(max_running, running)
+        await asyncio.sleep(0.01)
+        handled.append((task_id, value))
+        running -= 1
+
+    broker = InMemoryBroker()
+    for i in range(10):
+        broker.put(TaskMessage("job", str(i), [i]))
+    worker = AsyncWorker(broker, concurrency=4, handlers={"job": handler})
+
+    await run_worker(worker, 10)
+
+    assert sorted(handled) == sorted((str(i), i) for i in range(10))
+    assert worker.succeeded == 10
+    assert 1 < max_running <= 4
+
+
+async def test_worker_retries_then_gives_up() -> None:
+    attempts: dict[str, int] = {}
+
+    async def handler(task_id: str) -> None:
+        attempts[task_id] = attempts.get(task_id, 0) + 1
+        if task_id == "broken" or attempts[task_id] < 2:
+            raise RuntimeError("Error sending system email!")
+
+    broker = InMemoryBroker()
+    broker.put(TaskMessage("job", "flaky", []))
+    broker.put(TaskMessage("job", "broken", []))
+    broker.put(TaskMessage("unknown", "unknown", []))
+    worker = AsyncWorker(
+        broker,
+        concurrency=2,
+        handlers={"job": handler},
+        max_retries=2,
+        retry_delay=0.01,
+    )
+
+    await run_worker(worker, 3)
+
+    assert attempts == {"flaky": 2, "broken": 3}
+    assert worker.succeeded == 1
+    assert worker.failed == 2
+
+
+async def test_worker_batches_messages() -> None:
+    batches: list[list[str]] = []
+    single: list[str] = []
+
+    async def batch_handler(messages: Sequence[TaskMessage]) -> None:
+        batches.append([message.task_id for message in messages])
+
+    async def handler(task_id: str) -> None:
+        single.append(task_id)
+
+    broker = InMemoryBroker()
+    for i in range(5):
+        broker.put(TaskMessage("batched", f"b{i}", []))
+        broker.put(TaskMessage("single", f"s{i}", []))
+    worker = AsyncWorker(
+        broker,
+        concurrency=1,
+        handlers={"single": handler},
+        batch_handlers={"batched": batch_handler},
+        batch_size=4,
+    )
+
+    await run_worker(worker, 10)
+
+    assert worker.succeeded == 10
+    assert batches == [["b0", "b1"], ["b2", "b3"], ["b4"]]
+    assert single == [f"s{i}" for i in range(5)]
+
+
+async def test_worker_sends_emails(session: AsyncSession) -> None:
+    task_ids = [str(uuid.uuid4()) for _ in range(3)]
+    broker = InMemoryBroker()
+    for i, task_id in enumerate(task_ids):
+        broker.put(
+            TaskMessage(
+                outbox_repo.SEND_EMAIL_TASK, task_id, [DUMMY_PRODUCT_ID + i]
+            )
+        )
+    worker = AsyncWorker(broker, concurrency=1, batch_size=10)
+
+    await run_worker(worker, 3)
+
+    assert worker.succeeded == 3
+    stmt = select(SystemEmail).where(SystemEmail.task_id.in_(task_ids))
+    system_emails = {
+        str(e.task_id): e for e in (await session.scalars(stmt)).all()
+    }
+    for i, task_id in enumerate(task_ids):
+        assert system_emails[task_id].target_id == DUMMY_PRODUCT_ID + i
+        assert system_emails[task_id].type == NotificationType.PRODUCT
+        assert system_emails[task_id].is_sent
+
+
+async def test_worker_sends_duplicate_messages_once(
+    session: AsyncSession,
+) -> None:
+    task_ids = [str(uuid.uuid4()) for _ in range(2)]
+    broker = InMemoryBroker()
+    # the first message is delivered twice, in the same batch
+    for task_id in [task_ids[0], *task_ids, task_ids[0]]:
+        broker.put(
+            TaskMessage(
+                outbox_repo.SEND_EMAIL_TASK, task_id, [DUMMY_PRODUCT_ID]
+            )
+        )
+    worker = AsyncWorker(broker, concurrency=1, batch_size=10)
+
+    await run_worker(worker, 4)
+
+    assert worker.succeeded == 4
+    assert worker.failed == 0
+    stmt = select(SystemEmail.task_id).where(
+        SystemEmail.task_id.in_(task_ids)
+    )
+    assert sorted(str(id) for id in await session.scalars(stmt)) == sorted(
+        task_ids
+    )